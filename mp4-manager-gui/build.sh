@@ -51,6 +51,11 @@ echo -e "${GREEN}tkinter is available${NC}"
 echo -e "${YELLOW}Installing required Python packages...${NC}"
 pip3 install --user pyinstaller
 
+# paramiko is optional: it enables the in-process SFTP transport
+if ! pip3 install --user paramiko; then
+    echo -e "${YELLOW}Warning: paramiko could not be installed, the build will only support the scp transport${NC}"
+fi
+
 # Check if PyInstaller was installed successfully
 if ! command -v ~/.local/bin/pyinstaller &> /dev/null; then
     echo -e "${RED}Error: PyInstaller installation failed${NC}"
@@ -78,8 +83,8 @@ fi
 mkdir -p "$BUILD_DIR"
 cd "$BUILD_DIR"
 
-# Copy the Python script
-cp ../mp4_manager_gui.py .
+# Copy the Python scripts (the GUI imports the UI-free core module)
+cp ../mp4_manager_gui.py ../mp4_manager_core.py .
 
 # Create spec file for PyInstaller
 cat > mp4_manager.spec << 'EOF'
@@ -103,7 +108,8 @@ a = Analysis(
         'subprocess',
         'tempfile',
         'datetime',
-        'json'
+        'json',
+        'mp4_manager_core'
     ],
     hookspath=[],
     hooksconfig={},
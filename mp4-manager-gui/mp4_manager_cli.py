@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Remote MP4 File Manager CLI
+Headless access to the manager's operations with JSON output, for scripted
+pulls and benchmarks. Does not import tkinter.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from mp4_manager_core import MP4Manager, OffloadPipeline, OFFLOAD_SAMPLE_INTERVAL
+
+SERVICE_ACTIONS = {
+    "enable": ["enable", "start"],
+    "start": ["start"],
+    "stop": ["stop"],
+    "restart": ["restart"],
+}
+
+
+def build_parser():
+    defaults = MP4Manager.DEFAULTS
+    parser = argparse.ArgumentParser(description="Manage MP4 recordings on remote hosts without the GUI")
+    parser.add_argument("--host", action="append", dest="hosts", metavar="[USER@]HOST",
+                        help=f"remote host, repeatable for fleet mode (default {defaults['remote_host']})")
+    parser.add_argument("--user", default=defaults["remote_user"], help="remote user for hosts without user@")
+    parser.add_argument("--password", default=os.environ.get("MP4_MANAGER_PASSWORD", defaults["remote_password"]),
+                        help="SSH password (default: $MP4_MANAGER_PASSWORD)")
+    parser.add_argument("--sudo-password", default=os.environ.get("MP4_MANAGER_SUDO_PASSWORD", ""),
+                        help="sudo password for service control (default: $MP4_MANAGER_SUDO_PASSWORD)")
+    parser.add_argument("--remote-dir", default=defaults["remote_dir"])
+    parser.add_argument("--local-dir", default=defaults["local_dir"])
+    parser.add_argument("--service", default=defaults["service_name"])
+    parser.add_argument("--transport", choices=("auto", "sftp", "scp"), default=defaults["transport_mode"])
+    parser.add_argument("--throttle", choices=("auto", "always", "off"), default=defaults["throttle_mode"])
+    parser.add_argument("--rate", type=float, default=defaults["throttle_rate"], help="per-host rate limit in MB/s")
+    parser.add_argument("--total-rate", type=float, default=defaults["total_rate"],
+                        help="rate limit shared by all hosts in MB/s, 0 = unlimited")
+    parser.add_argument("--parallel", type=int, default=defaults["max_parallel_hosts"],
+                        help="hosts downloaded at the same time")
+    parser.add_argument("--verify", action="store_true", help="verify downloads against remote sha256sum")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print log and progress lines on stderr")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("test", help="test SSH connection")
+    commands.add_parser("sudo-test", help="test sudo access")
+    commands.add_parser("status", help="show service status")
+    service = commands.add_parser("service", help="control the recorder service")
+    service.add_argument("action", choices=sorted(SERVICE_ACTIONS))
+    listing = commands.add_parser("list", help="list remote MP4 files")
+    listing.add_argument("--media", action="store_true",
+                         help="include duration, resolution, codecs and bitrate read from the MP4 headers")
+    download = commands.add_parser("download", help="download files by name, or all files")
+    download.add_argument("names", nargs="*", help="file names; omit to download everything")
+    sync = commands.add_parser("sync", help="download new or changed files")
+    sync.add_argument("--delete-after", action="store_true",
+                      help="delete remote copies once their checksums are verified (implies --verify)")
+    sync.add_argument("--dry-run", action="store_true", help="only report what would be downloaded")
+    delete = commands.add_parser("delete", help="delete remote files by name")
+    delete.add_argument("names", nargs="+")
+    offload = commands.add_parser("offload", help="move the oldest recordings off hosts that are running out of space")
+    offload.add_argument("--min-free", type=float, default=defaults["offload_min_free_gb"],
+                         help="free space to keep on each host in GB")
+    offload.add_argument("--lead", type=float, default=defaults["offload_lead_minutes"],
+                         help="offload when the disk is forecast to reach --min-free within this many minutes")
+    offload.add_argument("--once", action="store_true", help="check each host once instead of running until interrupted")
+    return parser
+
+
+def host_results(results):
+    return {host: {"ok": success, "stdout": stdout, "stderr": stderr}
+            for host, (success, stdout, stderr) in results.items()}
+
+
+def file_entry(record):
+    entry = {"host": record.host, "filename": record.filename, "path": record.full_path,
+             "size": record.size, "mtime": record.mtime}
+    if record.media:
+        entry["media"] = record.media.to_dict()
+    return entry
+
+
+def select_records(records, names):
+    """Return the records matching names (all records if names is empty) and the unmatched names"""
+    if not names:
+        return records, []
+    wanted = set(names)
+    selected = [record for record in records if record.filename in wanted]
+    found = {record.filename for record in selected}
+    return selected, [name for name in names if name not in found]
+
+
+def run_offload(manager, args):
+    """Sample every host (once, or every OFFLOAD_SAMPLE_INTERVAL until interrupted) and offload when needed"""
+    manager.configure(offload_min_free_gb=args.min_free, offload_lead_minutes=args.lead)
+    moved = {}
+
+    def notify(message):
+        if message[0] == "offload_complete":
+            host, count, size, failed = message[1:]
+            totals = moved.setdefault(host, {"moved": 0, "bytes": 0, "failed": 0})
+            totals["moved"] += count
+            totals["bytes"] += size
+            totals["failed"] += failed
+        manager.notify(message)
+
+    pipeline = OffloadPipeline(manager, notify=notify)
+    statuses = {}
+    try:
+        while True:
+            for host in pipeline.hosts:
+                statuses[host] = pipeline.run_once(host)
+            if args.once:
+                break
+            time.sleep(OFFLOAD_SAMPLE_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
+        pipeline.worker.close()
+    ok = all(status is not None for status in statuses.values()) and \
+        not any(totals["failed"] for totals in moved.values())
+    return ok, {"hosts": statuses, "offloaded": moved}
+
+
+def run(manager, args):
+    """Run one command, returning (ok, result) where result is JSON serializable"""
+    if args.command == "test":
+        results = manager.test_connection()
+        return bool(manager.connected_hosts), {"hosts": host_results(results)}
+
+    if args.command == "sudo-test":
+        results = manager.test_sudo()
+        return all(result[0] for result in results.values()), {"hosts": host_results(results)}
+
+    if args.command == "status":
+        results = manager.service_status()
+        hosts = host_results(results)
+        for host, entry in hosts.items():
+            entry["active"] = manager.service_states.get(host)
+        return all(result[0] for result in results.values()), {"hosts": hosts}
+
+    if args.command == "service":
+        results = manager.service_action(SERVICE_ACTIONS[args.action])
+        return all(result[0] for result in results.values()), {"hosts": host_results(results)}
+
+    if args.command == "offload":
+        return run_offload(manager, args)
+
+    success, records, errors = manager.list_files()
+    if not success:
+        return False, {"error": errors}
+
+    if args.command == "list":
+        if args.media:
+            manager.probe_media(records)
+        return True, {"files": [file_entry(record) for record in records], "errors": errors}
+
+    if args.command == "download":
+        selected, missing = select_records(records, args.names)
+        stats = manager.download(selected) if selected else {"downloaded": 0, "failed": 0, "total": 0}
+        return not stats["failed"] and not missing, dict(stats, missing=missing)
+
+    if args.command == "sync":
+        pending = manager.pending_sync(records)
+        result = {"pending": len(pending), "up_to_date": len(records) - len(pending)}
+        if args.dry_run or not pending:
+            result["files"] = [file_entry(record) for record in pending]
+            return True, result
+        stats = manager.download(pending, delete_after=args.delete_after)
+        return not stats["failed"], dict(result, **stats)
+
+    if args.command == "delete":
+        selected, missing = select_records(records, args.names)
+        results = manager.delete(selected)
+        deleted = {host: names for host, (names, _) in results.items()}
+        failed = {host: names for host, (_, names) in results.items() if names}
+        return not failed and not missing, {"deleted": deleted, "failed": failed, "missing": missing}
+
+    raise ValueError(f"unknown command: {args.command}")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def notify(message):
+        if not args.verbose:
+            return
+        if message[0] == "log":
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            print(f"[{timestamp}] {message[2]}: {message[1]}", file=sys.stderr)
+        elif message[0] == "progress_update":
+            print(f"[{message[1]:5.1f}%] {message[2]}", file=sys.stderr)
+
+    manager = MP4Manager(
+        notify=notify,
+        fleet_hosts=",".join(args.hosts or []),
+        remote_host=(args.hosts or [MP4Manager.DEFAULTS["remote_host"]])[0],
+        remote_user=args.user,
+        remote_password=args.password,
+        sudo_password=args.sudo_password,
+        remote_dir=args.remote_dir,
+        local_dir=args.local_dir,
+        service_name=args.service,
+        transport_mode=args.transport,
+        throttle_mode=args.throttle,
+        throttle_rate=args.rate,
+        total_rate=args.total_rate,
+        max_parallel_hosts=args.parallel,
+        verify_transfers=args.verify,
+    )
+    try:
+        ok, result = run(manager, args)
+    finally:
+        manager.close()
+
+    json.dump(dict(result, ok=ok), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
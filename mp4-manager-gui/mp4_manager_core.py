@@ -0,0 +1,2071 @@
+#!/usr/bin/env python3
+"""
+Remote MP4 File Manager core
+UI-free transfer, listing and service operations shared by the GUI and the CLI
+"""
+
+import subprocess
+import threading
+import os
+from datetime import datetime
+import json
+import shlex
+import struct
+import math
+import collections
+import re
+import hashlib
+import socket
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import paramiko
+except ImportError:  # SFTP transport is optional; scp/ssh processes are used without it
+    paramiko = None
+
+# find -printf format used for file listings: size in bytes, mtime (epoch), path
+FILE_LIST_FORMAT = "%s\\t%T@\\t%p\\n"
+
+# Number of files removed per remote invocation in batched deletes
+DELETE_BATCH_SIZE = 1000
+
+# Read size for streamed transfers, and attempts before a checksum mismatch is fatal
+STREAM_CHUNK_SIZE = 256 * 1024
+VERIFY_ATTEMPTS = 3
+
+# SFTP pipelining: bytes requested per readv window and read requests kept in flight
+SFTP_WINDOW_SIZE = 8 * 1024 * 1024
+SFTP_MAX_REQUESTS = 64
+
+# Seconds between progress notifications during a batch, and the time constant
+# of the smoothed transfer rate used for the ETA
+PROGRESS_INTERVAL = 0.25
+RATE_SMOOTHING = 5.0
+
+# Seconds between `systemctl is-active` probes while an adaptive throttle is running
+SERVICE_PROBE_INTERVAL = 15
+
+# Prefix that runs a remote reader at idle I/O and lowest CPU priority
+LOW_PRIORITY_PREFIX = "$(command -v ionice >/dev/null 2>&1 && echo ionice -c 3) nice -n 19"
+
+# Media header probing: bytes read per request when walking top-level boxes
+# (covers ftyp plus a front-loaded moov in one read), and the largest moov read
+MEDIA_HEAD_SIZE = 64 * 1024
+MEDIA_MAX_MOOV = 16 * 1024 * 1024
+
+# Thumbnail previews: frame size, local cache cap, remote ffmpeg runs at once,
+# and seconds before a remote ffmpeg run is killed
+THUMBNAIL_WIDTH = 96
+THUMBNAIL_HEIGHT = 54
+THUMBNAIL_CACHE_BYTES = 64 * 1024 * 1024
+THUMBNAIL_WORKERS = 3
+THUMBNAIL_TIMEOUT = 20
+
+# Seconds between recorder health samples, and samples kept per host for trends
+SERVICE_SAMPLE_INTERVAL = 2
+SERVICE_HISTORY = 300
+
+# Offload pipeline: seconds between free-space samples, window used to estimate
+# the write rate, age below which a file counts as still being recorded, and
+# the most files moved off one host at once
+OFFLOAD_SAMPLE_INTERVAL = 10
+OFFLOAD_RATE_WINDOW = 300
+OFFLOAD_ACTIVE_AGE = 120
+OFFLOAD_MAX_WORKERS = 3
+
+# Remote loop run by `xargs -0 sh -c`; reports one NUL-terminated "OK\t<name>"
+# or "FAIL\t<name>" record per file, so names containing newlines round-trip
+BATCH_DELETE_SCRIPT = (
+    'for f; do if rm -- "$f" 2>/dev/null; then printf \'OK\\t%s\\0\' "$f"; '
+    'else printf \'FAIL\\t%s\\0\' "$f"; fi; done'
+)
+
+
+def format_size(num_bytes):
+    """Format a byte count the way `ls -lh` does (e.g. 512, 1.5K, 3.2G)"""
+    size = float(num_bytes)
+    for unit in ("", "K", "M", "G", "T"):
+        if size < 1024 or unit == "T":
+            if not unit:
+                return str(int(size))
+            return f"{size:.1f}{unit}" if size < 10 else f"{size:.0f}{unit}"
+        size /= 1024
+
+
+class RemoteFile:
+    """Compact record for one remote file, with precomputed sort keys
+
+    key is (host, full_path) and identifies the file across a fleet of hosts.
+    media holds the file's MediaInfo once its headers have been read.
+    """
+    __slots__ = ("host", "filename", "full_path", "size", "mtime", "name_key", "key", "media")
+
+    def __init__(self, full_path, size, mtime, host=""):
+        self.host = host
+        self.full_path = full_path
+        self.key = (host, full_path)
+        self.filename = os.path.basename(full_path)
+        self.size = size
+        self.mtime = mtime
+        self.name_key = self.filename.casefold()
+        self.media = None
+
+    @property
+    def size_text(self):
+        return format_size(self.size)
+
+    @property
+    def date_text(self):
+        return datetime.fromtimestamp(self.mtime).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def parse_file_listing(output, host=""):
+    """Parse `find -printf FILE_LIST_FORMAT` output into RemoteFile records for host"""
+    records = []
+    for line in output.splitlines():
+        parts = line.split("\t", 2)
+        if len(parts) != 3:
+            continue
+        try:
+            records.append(RemoteFile(parts[2], int(parts[0]), float(parts[1]), host))
+        except ValueError:
+            continue
+    return records
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to cap transfer throughput
+
+    A rate of 0 disables limiting. The bucket holds at most a quarter second of
+    tokens, so throttled transfers stay smooth instead of bursting. Bytes taken
+    from a bucket with a parent are also taken from the parent, so several
+    per-host buckets can share one total budget.
+    """
+
+    def __init__(self, rate=0, parent=None):
+        self.lock = threading.Lock()
+        self.parent = parent
+        self.rate = 0
+        self.capacity = 0
+        self.tokens = 0.0
+        self.timestamp = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.rate = max(0, rate)
+            self.capacity = self.rate / 4
+            self.tokens = min(self.tokens, self.capacity)
+
+    @property
+    def limited(self):
+        """Whether this bucket or any parent currently caps the rate"""
+        return bool(self.rate) or (self.parent is not None and self.parent.limited)
+
+    def consume(self, amount):
+        """Block until amount bytes may be sent under the current rate"""
+        delay = 0
+        with self.lock:
+            if self.rate:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.timestamp) * self.rate)
+                self.timestamp = now
+                self.tokens -= amount
+                delay = -self.tokens / self.rate if self.tokens < 0 else 0
+        if delay:
+            time.sleep(delay)
+        if self.parent is not None:
+            self.parent.consume(amount)
+
+
+def write_stream(chunks, local_path, limiter=None, progress=None):
+    """Write byte chunks to local_path via a .part file, returning their SHA-256 digest
+
+    The hash is computed while writing, so no second read pass is needed.
+    progress, if given, is called with the size of each chunk as it lands.
+    """
+    part_path = local_path + ".part"
+    digest = hashlib.sha256()
+    try:
+        with open(part_path, "wb") as f:
+            for chunk in chunks:
+                if limiter:
+                    limiter.consume(len(chunk))
+                f.write(chunk)
+                digest.update(chunk)
+                if progress:
+                    progress(len(chunk))
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    os.replace(part_path, local_path)
+    return digest.hexdigest()
+
+
+def format_eta(seconds):
+    """Format a remaining time as H:MM:SS or M:SS"""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class TransferProgress:
+    """Byte-accurate progress for a batch of downloads, reported at a fixed rate
+
+    The per-chunk callbacks from begin() only add to counters; a reporter
+    thread turns them into ("progress_update", percent, status) every
+    PROGRESS_INTERVAL seconds with the current and smoothed rate and the ETA,
+    however many hosts and files are in flight. A file counts towards
+    progress with at most its listed size, so a re-fetch after a checksum
+    mismatch does not push the bar past 100%, but its bytes still count
+    towards the rate.
+    """
+
+    def __init__(self, total_bytes, total_files, notify, interval=PROGRESS_INTERVAL):
+        self.total_bytes = total_bytes
+        self.total_files = total_files
+        self.notify = notify
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        # Bytes received, re-fetches included
+        self.received = 0
+        # Listed bytes of finished files, and [counted, size, name] of the ones in flight
+        self.finished_bytes = 0
+        self.finished_files = 0
+        self.active = {}
+        self.rate = 0.0
+        self.smoothed_rate = 0.0
+        self.started = time.monotonic()
+        self._last_time = self.started
+        self._last_received = 0
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        """Stop the reporter after sending a final update"""
+        self.stopped.set()
+        self.report()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.report()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def begin(self, key, name, size):
+        """Start tracking a file, returning the callback for its received byte counts"""
+        entry = [0, size, name]
+        with self.lock:
+            self.active[key] = entry
+
+        def received(num_bytes):
+            with self.lock:
+                self.received += num_bytes
+                entry[0] = min(entry[1], entry[0] + num_bytes)
+
+        return received
+
+    def finish(self, key, size=0):
+        """Count a file as done (downloaded or failed) at its full listed size"""
+        with self.lock:
+            entry = self.active.pop(key, None)
+            self.finished_bytes += entry[1] if entry else size
+            self.finished_files += 1
+
+    def report(self):
+        now = time.monotonic()
+        with self.lock:
+            received = self.received
+            done = self.finished_bytes + sum(entry[0] for entry in self.active.values())
+            names = [entry[2] for entry in self.active.values()]
+            finished_files = self.finished_files
+
+        interval = now - self._last_time
+        if interval > 0:
+            self.rate = (received - self._last_received) / interval
+            if now - self.started < RATE_SMOOTHING:
+                # Until the smoothing window has filled, the average since the start is steadier
+                self.smoothed_rate = received / (now - self.started)
+            else:
+                self.smoothed_rate += (1 - math.exp(-interval / RATE_SMOOTHING)) * (self.rate - self.smoothed_rate)
+            self._last_time, self._last_received = now, received
+
+        if self.total_bytes:
+            percent = min(100.0, done / self.total_bytes * 100)
+        else:
+            percent = finished_files / self.total_files * 100 if self.total_files else 100.0
+        if names:
+            status = f"Downloading {names[0]}" + (f" (+{len(names) - 1} more)" if len(names) > 1 else "")
+        else:
+            status = f"Downloaded {finished_files}/{self.total_files} files"
+        status += (f" - {format_size(done)}/{format_size(self.total_bytes)}, "
+                   f"{self.rate / 1e6:.1f} MB/s (avg {self.smoothed_rate / 1e6:.1f} MB/s)")
+        remaining = self.total_bytes - done
+        if names and remaining > 0 and self.smoothed_rate > 0:
+            status += f", ETA {format_eta(remaining / self.smoothed_rate)}"
+        self.notify(("progress_update", percent, status))
+
+
+class SubprocessTransport:
+    """Transport that runs each operation as its own sshpass ssh/scp process"""
+
+    name = "scp"
+
+    def __init__(self, host, user, password):
+        self.host = host
+        self.user = user
+        self.password = password
+
+    def ssh_command(self, command=None):
+        """Build the sshpass/ssh argument list for the host"""
+        cmd = [
+            "sshpass", "-p", self.password,
+            "ssh", "-o", "StrictHostKeyChecking=no",
+            f"{self.user}@{self.host}"
+        ]
+        if command is not None:
+            cmd.append(command)
+        return cmd
+
+    def is_alive(self):
+        return True
+
+    def run(self, command, input_data=None, timeout=30):
+        """Run a remote command, returning (success, stdout, stderr)"""
+        try:
+            result = subprocess.run(self.ssh_command(command), input=input_data,
+                                    capture_output=True, text=True, timeout=timeout)
+            return result.returncode == 0, result.stdout, result.stderr
+        except subprocess.TimeoutExpired:
+            return False, "", "Command timed out"
+        except Exception as e:
+            return False, "", str(e)
+
+    def popen(self, command):
+        """Start a remote command with binary stdin/stdout/stderr pipes"""
+        return subprocess.Popen(self.ssh_command(command), stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def fetch(self, remote_path, local_path, limiter=None, progress=None):
+        """Stream a remote file over `ssh cat`, returning the SHA-256 of the received bytes
+
+        When the limiter caps the rate, the remote cat runs at idle I/O priority.
+        """
+        reader = "cat"
+        if limiter and limiter.limited:
+            reader = f"{LOW_PRIORITY_PREFIX} cat"
+        process = self.popen(f"{reader} -- {shlex.quote(remote_path)}")
+        process.stdin.close()
+        try:
+            digest = write_stream(iter(lambda: process.stdout.read(STREAM_CHUNK_SIZE), b""),
+                                  local_path, limiter, progress)
+            stderr = process.stderr.read().decode(errors="replace").strip()
+            if process.wait() != 0:
+                os.remove(local_path)
+                raise RuntimeError(stderr or f"ssh exited with status {process.returncode}")
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        return digest
+
+    def read_range(self, remote_path, offset, length):
+        """Return up to length bytes of a remote file starting at offset"""
+        process = self.popen(f"tail -c +{offset + 1} -- {shlex.quote(remote_path)} | head -c {length}")
+        process.stdin.close()
+        data = process.stdout.read()
+        process.wait()
+        return data
+
+    def download(self, remote_path, local_path, limiter=None, progress=None):
+        """Download a file; returns its SHA-256 when it was computed in flight, else None
+
+        Unthrottled downloads use scp; their progress is the growth of the
+        local file, polled every PROGRESS_INTERVAL seconds.
+        """
+        if limiter and limiter.limited:
+            return self.fetch(remote_path, local_path, limiter, progress)
+
+        cmd = [
+            "sshpass", "-p", self.password,
+            "scp", "-o", "StrictHostKeyChecking=no",
+            f"{self.user}@{self.host}:{remote_path}",
+            local_path
+        ]
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        stderr = []
+        reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+        reader.start()
+        deadline = time.monotonic() + 300
+        reported = 0
+        while True:
+            try:
+                process.wait(timeout=PROGRESS_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                if time.monotonic() > deadline:
+                    process.kill()
+                    process.wait()
+                    raise
+            if progress:
+                try:
+                    size = os.path.getsize(local_path)
+                except OSError:
+                    continue
+                if size > reported:
+                    progress(size - reported)
+                    reported = size
+        reader.join()
+        if process.returncode != 0:
+            raise RuntimeError(b"".join(stderr).decode(errors="replace").strip() or "scp failed")
+        if progress and os.path.getsize(local_path) > reported:
+            progress(os.path.getsize(local_path) - reported)
+        return None
+
+    def close(self):
+        pass
+
+
+class ChannelProcess:
+    """Popen-like wrapper around a paramiko exec channel"""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.stdin = channel.makefile_stdin("wb")
+        self.stdout = channel.makefile("rb")
+        self.stderr = channel.makefile_stderr("rb")
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None and self.channel.exit_status_ready():
+            self.returncode = self.channel.recv_exit_status()
+        return self.returncode
+
+    def wait(self):
+        if self.returncode is None:
+            self.returncode = self.channel.recv_exit_status()
+        return self.returncode
+
+    def communicate(self, timeout=None):
+        """Close stdin, read stdout and stderr to the end and wait, like Popen.communicate
+
+        paramiko buffers both streams, so reading them in turn cannot stall the
+        command. timeout bounds each wait for data; subprocess.TimeoutExpired
+        is raised when it passes.
+        """
+        self.stdin.close()
+        self.channel.settimeout(timeout)
+        try:
+            stdout = self.stdout.read()
+            stderr = self.stderr.read()
+        except socket.timeout:
+            raise subprocess.TimeoutExpired("remote command", timeout)
+        self.wait()
+        return stdout, stderr
+
+    def kill(self):
+        self.channel.close()
+        if self.returncode is None:
+            self.returncode = -9
+
+
+class SFTPTransport:
+    """In-process transport over one authenticated SSH connection (requires paramiko)
+
+    Remote commands run as channels on the shared connection and files are read
+    over SFTP with up to SFTP_MAX_REQUESTS reads in flight. Reads are issued in
+    SFTP_WINDOW_SIZE windows, with the next window requested before the current
+    one is written out, so buffered data stays bounded even when throttled.
+    """
+
+    name = "sftp"
+
+    def __init__(self, host, user, password, port=22, connect_timeout=10):
+        self.host = host
+        self.user = user
+        self.client = paramiko.SSHClient()
+        self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        self.client.connect(host, port=port, username=user, password=password,
+                            timeout=connect_timeout, banner_timeout=connect_timeout,
+                            auth_timeout=connect_timeout)
+        self.sftp = self.client.open_sftp()
+
+    def is_alive(self):
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def run(self, command, input_data=None, timeout=30):
+        """Run a remote command, returning (success, stdout, stderr)"""
+        try:
+            stdin, stdout, stderr = self.client.exec_command(command, timeout=timeout)
+            if input_data is not None:
+                stdin.write(input_data)
+            stdin.close()
+            out = stdout.read().decode(errors="replace")
+            err = stderr.read().decode(errors="replace")
+            return stdout.channel.recv_exit_status() == 0, out, err
+        except socket.timeout:
+            return False, "", "Command timed out"
+        except Exception as e:
+            return False, "", str(e)
+
+    def popen(self, command):
+        channel = self.client.get_transport().open_session()
+        channel.exec_command(command)
+        return ChannelProcess(channel)
+
+    def _read_windows(self, remote, size):
+        """Yield the file's bytes, keeping the next window's reads in flight"""
+        windows = [(offset, min(SFTP_WINDOW_SIZE, size - offset))
+                   for offset in range(0, size, SFTP_WINDOW_SIZE)]
+        chunk = remote.MAX_REQUEST_SIZE
+        pending = None
+        for window in windows + [None]:
+            upcoming = None
+            if window is not None:
+                offset, length = window
+                ranges = [(start, min(chunk, offset + length - start))
+                          for start in range(offset, offset + length, chunk)]
+                try:
+                    upcoming = remote.readv(ranges, SFTP_MAX_REQUESTS)
+                except TypeError:  # paramiko < 3.3 has no request limit argument
+                    upcoming = remote.readv(ranges)
+                # Pulling the first block issues every read request of the window
+                upcoming = (next(upcoming), upcoming)
+            if pending:
+                first, rest = pending
+                yield first
+                yield from rest
+            pending = upcoming
+
+    def fetch(self, remote_path, local_path, limiter=None, progress=None):
+        """Read a remote file over SFTP, returning the SHA-256 of the received bytes"""
+        with self.sftp.open(remote_path, "rb") as remote:
+            size = remote.stat().st_size
+            digest = write_stream(self._read_windows(remote, size), local_path, limiter, progress)
+        if os.path.getsize(local_path) != size:
+            os.remove(local_path)
+            raise RuntimeError(f"short read: expected {size} bytes")
+        return digest
+
+    def read_range(self, remote_path, offset, length):
+        """Return up to length bytes of a remote file starting at offset"""
+        with self.sftp.open(remote_path, "rb") as remote:
+            remote.seek(offset)
+            return remote.read(length)
+
+    def download(self, remote_path, local_path, limiter=None, progress=None):
+        return self.fetch(remote_path, local_path, limiter, progress)
+
+    def close(self):
+        try:
+            self.sftp.close()
+        finally:
+            self.client.close()
+
+
+class RemoteHasher:
+    """Runs sha256sum over a batch of remote files while they are being transferred
+
+    A single SSH session hashes the files in transfer order, so remote hashing
+    overlaps the downloads instead of adding a second pass afterwards.
+    """
+
+    def __init__(self, transport, remote_dir, filenames, low_priority=False):
+        prefix = f"{LOW_PRIORITY_PREFIX} " if low_priority else ""
+        self.transport = transport
+        self.command = f"cd {shlex.quote(remote_dir)} && xargs -0 {prefix}sha256sum -- 2>/dev/null"
+        self.filenames = filenames
+        self.digests = {}
+        self.finished = False
+        self.condition = threading.Condition()
+        self.process = None
+
+    def start(self):
+        self.process = self.transport.popen(self.command)
+        threading.Thread(target=self._feed, daemon=True).start()
+        threading.Thread(target=self._collect, daemon=True).start()
+
+    def _feed(self):
+        try:
+            self.process.stdin.write(("\0".join(self.filenames) + "\0").encode())
+            self.process.stdin.close()
+        except OSError:
+            pass
+
+    def _collect(self):
+        for line in self.process.stdout:
+            line = line.decode(errors="replace").rstrip("\n")
+            escaped = line.startswith("\\")
+            digest, _, name = line[1:].partition("  ") if escaped else line.partition("  ")
+            if escaped:
+                name = name.replace("\\n", "\n").replace("\\\\", "\\")
+            with self.condition:
+                self.digests[name] = digest
+                self.condition.notify_all()
+        self.process.wait()
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+
+    def get(self, filename, timeout=300):
+        """Wait for and return the remote digest of filename, or None if unavailable"""
+        with self.condition:
+            self.condition.wait_for(lambda: filename in self.digests or self.finished, timeout)
+            return self.digests.get(filename)
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+
+# Remote watch loop; expects $dir to be set. Emits "U\tsize\tmtime\tpath" for
+# added or modified files and "D\tpath" for removed ones. Uses inotifywait when
+# available, otherwise polls once a second for files newer than the last poll
+# and sends a one-byte heartbeat every 30 seconds.
+WATCH_SCRIPT = r"""
+if command -v inotifywait >/dev/null 2>&1; then
+  printf 'M\tinotify\n'
+  inotifywait -m -q -e create -e close_write -e moved_to -e moved_from -e delete --format '%e/%f' "$dir" |
+  while IFS= read -r ev; do
+    name=${ev#*/}
+    case "$name" in *.mp4) ;; *) continue ;; esac
+    case "${ev%%/*}" in
+      *DELETE*|*MOVED_FROM*) printf 'D\t%s\n' "$dir/$name" ;;
+      *) find "$dir/$name" -maxdepth 0 -type f -printf 'U\t%s\t%T@\t%p\n' 2>/dev/null ;;
+    esac
+  done
+else
+  printf 'M\tpoll\n'
+  since=$(date +%s); prev_sum=; prev_list=; ticks=0
+  while :; do
+    now=$(date +%s)
+    find "$dir" -maxdepth 1 -name '*.mp4' -type f -newermt "@$((since - 1))" -printf 'U\t%s\t%T@\t%p\n' 2>/dev/null
+    list=$(find "$dir" -maxdepth 1 -name '*.mp4' -type f 2>/dev/null)
+    sum=$(printf '%s' "$list" | cksum)
+    if [ "$sum" != "$prev_sum" ]; then
+      printf '%s\n' "$prev_list" | while IFS= read -r p; do
+        if [ -n "$p" ] && [ ! -e "$p" ]; then printf 'D\t%s\n' "$p"; fi
+      done
+      prev_sum=$sum; prev_list=$list
+    fi
+    since=$now
+    # Heartbeat so the loop dies of SIGPIPE once the session is gone
+    ticks=$((ticks + 1)); if [ $((ticks % 30)) -eq 0 ]; then printf 'H\n'; fi
+    sleep 1
+  done
+fi
+"""
+
+
+class RemoteWatcher:
+    """Streams add/modify/delete events for a remote directory over one long-lived command
+
+    Events are passed to notify as ("file_event", action, payload) where
+    action is "upsert" (payload: RemoteFile) or "remove" (payload: RemoteFile.key).
+    The remote command is restarted after RETRY_DELAY seconds if it exits.
+    """
+
+    RETRY_DELAY = 5
+
+    def __init__(self, get_transport, remote_dir, notify, host=""):
+        self.get_transport = get_transport
+        self.host = host
+        self.remote_dir = remote_dir.rstrip("/") or "/"
+        self.notify = notify
+        self.stopped = threading.Event()
+        self.process = None
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.process:
+            self.process.kill()
+
+    def _run(self):
+        command = f"dir={shlex.quote(self.remote_dir)}\n{WATCH_SCRIPT}"
+        while not self.stopped.is_set():
+            try:
+                self.process = self.get_transport().popen(command)
+                self.process.stdin.close()
+                self._read(self.process)
+                self.process.wait()
+            except Exception as e:
+                self.notify(("log", f"Watch error: {str(e)}", "ERROR"))
+            if self.stopped.is_set():
+                break
+            self.notify(("log", f"Watch connection lost, retrying in {self.RETRY_DELAY}s", "WARNING"))
+            self.stopped.wait(self.RETRY_DELAY)
+
+    def _read(self, process):
+        for raw in process.stdout:
+            kind, _, rest = raw.decode(errors="replace").rstrip("\n").partition("\t")
+            if kind == "U":
+                for record in parse_file_listing(rest, self.host):
+                    self.notify(("file_event", "upsert", record))
+            elif kind == "D":
+                self.notify(("file_event", "remove", (self.host, rest)))
+            elif kind == "M":
+                where = f"{self.host}:{self.remote_dir}" if self.host else self.remote_dir
+                self.notify(("log", f"Watching {where} ({rest})", "INFO"))
+
+
+# Remote loop behind ServiceSampler: one `systemctl show` per interval plus the
+# recorder's disk write counter, emitted as one tab-separated line. Falls back
+# to the total size of the recordings when /proc/PID/io cannot be read.
+SERVICE_SAMPLER_SCRIPT = r"""
+while :; do
+  now=$(date +%s.%N)
+  props=$(systemctl show -p ActiveState -p MainPID -p MemoryCurrent -p CPUUsageNSec -- "$unit" 2>/dev/null)
+  pid=0; line=
+  while IFS= read -r kv; do
+    case "$kv" in MainPID=*) pid=${kv#MainPID=} ;; esac
+    line="$line	$kv"
+  done <<EOF
+$props
+EOF
+  src=io; bytes=
+  if [ "$pid" != 0 ]; then bytes=$(sed -n 's/^write_bytes: //p' "/proc/$pid/io" 2>/dev/null); fi
+  if [ -z "$bytes" ]; then
+    src=dir
+    bytes=$(find "$dir" -maxdepth 1 -name '*.mp4' -type f -printf '%s\n' 2>/dev/null | awk '{s += $1} END {printf "%d", s}')
+  fi
+  printf 'S\t%s\t%s\t%s%s\n' "$now" "$src" "$bytes" "$line"
+  sleep "$interval"
+done
+"""
+
+
+def parse_counter(value):
+    """Parse a systemd counter, returning None for "[not set]" and UINT64_MAX"""
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number >= 2 ** 64 - 1 else number
+
+
+class ServiceSample:
+    """One health sample of the recorder service
+
+    cpu_percent and write_rate are derived from the previous sample and are
+    None for the first one. write_source is "io" when write_bytes is the
+    process's /proc I/O counter and "dir" when it is the total size of the
+    recordings.
+    """
+
+    __slots__ = ("timestamp", "active_state", "main_pid", "memory", "cpu_nsec", "write_bytes",
+                 "write_source", "cpu_percent", "write_rate")
+
+    def __init__(self, timestamp, active_state, main_pid, memory, cpu_nsec, write_bytes, write_source):
+        self.timestamp = timestamp
+        self.active_state = active_state
+        self.main_pid = main_pid
+        self.memory = memory
+        self.cpu_nsec = cpu_nsec
+        self.write_bytes = write_bytes
+        self.write_source = write_source
+        self.cpu_percent = None
+        self.write_rate = None
+
+    @classmethod
+    def parse(cls, line):
+        """Parse the fields of one sampler line after the "S" tag, or return None"""
+        fields = line.split("\t")
+        if len(fields) < 3:
+            return None
+        try:
+            timestamp = float(fields[0])
+        except ValueError:
+            return None
+        props = dict(field.split("=", 1) for field in fields[3:] if "=" in field)
+        return cls(timestamp, props.get("ActiveState", "unknown"), parse_counter(props.get("MainPID")),
+                   parse_counter(props.get("MemoryCurrent")), parse_counter(props.get("CPUUsageNSec")),
+                   parse_counter(fields[2]), fields[1])
+
+    def derive(self, previous):
+        """Fill in cpu_percent and write_rate from the previous sample"""
+        elapsed = self.timestamp - previous.timestamp
+        if elapsed <= 0:
+            return
+        if self.cpu_nsec is not None and previous.cpu_nsec is not None and self.main_pid == previous.main_pid:
+            self.cpu_percent = max(0, self.cpu_nsec - previous.cpu_nsec) / elapsed / 1e7
+        if (self.write_bytes is not None and previous.write_bytes is not None
+                and self.write_source == previous.write_source
+                and (self.write_source != "io" or self.main_pid == previous.main_pid)):
+            # Deleted recordings shrink the directory total; that is not negative writing
+            self.write_rate = max(0, self.write_bytes - previous.write_bytes) / elapsed
+
+
+class ServiceSampler:
+    """Streams recorder health samples from one long-lived remote command
+
+    The remote loop runs `systemctl show` every interval seconds, so a sample
+    costs a few local processes on the host and one short line over the
+    existing SSH session. Samples are passed to notify as
+    ("service_sample", host, ServiceSample). The command is restarted after
+    RETRY_DELAY seconds if it exits.
+    """
+
+    RETRY_DELAY = 5
+
+    def __init__(self, get_transport, service_name, remote_dir, notify, host="", interval=SERVICE_SAMPLE_INTERVAL):
+        self.get_transport = get_transport
+        self.service_name = service_name
+        self.remote_dir = remote_dir.rstrip("/") or "/"
+        self.notify = notify
+        self.host = host
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.process = None
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.process:
+            self.process.kill()
+
+    def _run(self):
+        command = (f"unit={shlex.quote(self.service_name)}; dir={shlex.quote(self.remote_dir)}; "
+                   f"interval={self.interval}\n{SERVICE_SAMPLER_SCRIPT}")
+        while not self.stopped.is_set():
+            try:
+                self.process = self.get_transport().popen(command)
+                self.process.stdin.close()
+                self._read(self.process)
+                self.process.wait()
+            except Exception as e:
+                self.notify(("log", f"Service monitor error: {str(e)}", "ERROR"))
+            if self.stopped.is_set():
+                break
+            self.notify(("log", f"Service monitor connection lost, retrying in {self.RETRY_DELAY}s", "WARNING"))
+            self.stopped.wait(self.RETRY_DELAY)
+
+    def _read(self, process):
+        previous = None
+        for raw in process.stdout:
+            kind, _, rest = raw.decode(errors="replace").rstrip("\n").partition("\t")
+            if kind != "S":
+                continue
+            sample = ServiceSample.parse(rest)
+            if sample is None:
+                continue
+            if previous:
+                sample.derive(previous)
+            previous = sample
+            self.notify(("service_sample", self.host, sample))
+
+
+class LocalManifest:
+    """Persistent record of remote files already downloaded into a local directory
+
+    Entries are keyed by filename and store the remote path, size and mtime seen
+    at download time plus the SHA-256 of the local copy when the transfer
+    computed one (None for plain scp downloads, which are never re-read just
+    to hash them). Whether a file is current is decided by size and mtime.
+    """
+
+    FILENAME = ".remote_mp4_manifest.json"
+    VERSION = 1
+    # Serializes saves from batches running at the same time in this process
+    SAVE_LOCK = threading.Lock()
+
+    def __init__(self, local_dir):
+        self.local_dir = local_dir
+        self.path = os.path.join(local_dir, self.FILENAME)
+        self.entries = {}
+        self.updated = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Write the manifest atomically, keeping entries saved meanwhile by other batches"""
+        with self.SAVE_LOCK:
+            self.load()
+            self.entries.update(self.updated)
+            os.makedirs(self.local_dir, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": self.VERSION, "files": self.entries}, f, indent=1)
+            os.replace(tmp_path, self.path)
+
+    def is_current(self, record):
+        """True if record was downloaded unchanged and the local copy is intact"""
+        entry = self.entries.get(record.filename)
+        if not entry or entry["size"] != record.size or entry["mtime"] != record.mtime:
+            return False
+        try:
+            return os.path.getsize(os.path.join(self.local_dir, record.filename)) == record.size
+        except OSError:
+            return False
+
+    def diff(self, records):
+        """Return the records that are new or changed since the last download"""
+        return [record for record in records if not self.is_current(record)]
+
+    def update(self, record, sha256):
+        self.entries[record.filename] = self.updated[record.filename] = {
+            "remote_path": record.full_path,
+            "size": record.size,
+            "mtime": record.mtime,
+            "sha256": sha256,
+        }
+
+
+class MediaInfo:
+    """Duration, resolution, codecs and bitrate read from an MP4's moov box
+
+    A recording without a moov box (still being written, or cut off) has no
+    duration and is reported as incomplete.
+    """
+    __slots__ = ("duration", "width", "height", "video_codec", "audio_codec", "bitrate")
+
+    def __init__(self, duration=None, width=None, height=None, video_codec=None, audio_codec=None, bitrate=None):
+        self.duration = duration
+        self.width = width
+        self.height = height
+        self.video_codec = video_codec
+        self.audio_codec = audio_codec
+        self.bitrate = bitrate
+
+    @property
+    def complete(self):
+        return self.duration is not None
+
+    @property
+    def duration_text(self):
+        if not self.complete:
+            return "incomplete"
+        minutes, seconds = divmod(int(round(self.duration)), 60)
+        return f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}"
+
+    @property
+    def resolution_text(self):
+        return f"{self.width}x{self.height}" if self.width and self.height else ""
+
+    @property
+    def codec_text(self):
+        return "/".join(codec for codec in (self.video_codec, self.audio_codec) if codec)
+
+    @property
+    def bitrate_text(self):
+        return f"{self.bitrate / 1e6:.1f} Mb/s" if self.bitrate else ""
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+
+def iter_boxes(data, start=0, end=None):
+    """Yield (type, payload_start, box_end) for the ISO BMFF boxes in data[start:end]"""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind.decode("latin-1"), pos + header, min(pos + size, end)
+        pos += size
+
+
+def find_box(data, path, start=0, end=None):
+    """Return (payload_start, box_end) of the first box along path, e.g. ("minf", "stbl")"""
+    for kind, payload, box_end in iter_boxes(data, start, end):
+        if kind == path[0]:
+            return (payload, box_end) if len(path) == 1 else find_box(data, path[1:], payload, box_end)
+    return None
+
+
+def read_moov(read, file_size):
+    """Return the payload of a file's moov box using byte-range reads, or None
+
+    read(offset, length) returns the bytes at offset. Top-level box headers are
+    walked without reading box bodies, so a moov box stored after mdat costs
+    one more read rather than a read of the media data.
+    """
+    data = read(0, min(file_size, MEDIA_HEAD_SIZE))
+    base = 0
+    pos = 0
+    while pos + 8 <= file_size:
+        if pos + 16 > base + len(data):
+            data, base = read(pos, min(file_size - pos, MEDIA_HEAD_SIZE)), pos
+            if len(data) < 8:
+                return None
+        size, kind = struct.unpack_from(">I4s", data, pos - base)
+        header = 8
+        if size == 1:
+            if len(data) < pos - base + 16:
+                return None
+            size = struct.unpack_from(">Q", data, pos - base + 8)[0]
+            header = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header:
+            return None
+        if kind == b"moov":
+            if size > MEDIA_MAX_MOOV or pos + size > file_size:
+                return None
+            if pos + size > base + len(data):
+                data, base = read(pos, size), pos
+            return data[pos - base + header:pos - base + size]
+        pos += size
+    return None
+
+
+def parse_moov(moov, file_size):
+    """Build MediaInfo from a moov box payload (mvhd, tkhd, hdlr and stsd boxes)"""
+    info = MediaInfo()
+    try:
+        for kind, start, end in iter_boxes(moov):
+            if kind == "mvhd":
+                if moov[start] == 1:
+                    timescale, duration = struct.unpack_from(">IQ", moov, start + 20)
+                else:
+                    timescale, duration = struct.unpack_from(">II", moov, start + 12)
+                if timescale:
+                    info.duration = duration / timescale
+            elif kind == "trak":
+                parse_trak(moov, start, end, info)
+    except (struct.error, IndexError):
+        pass
+    if info.duration:
+        info.bitrate = file_size * 8 / info.duration
+    return info
+
+
+def parse_trak(data, start, end, info):
+    """Fill info's resolution and codecs from one trak box"""
+    width = height = handler = codec = None
+    tkhd = find_box(data, ("tkhd",), start, end)
+    if tkhd:
+        offset = tkhd[0] + (88 if data[tkhd[0]] == 1 else 76)
+        width, height = (value >> 16 for value in struct.unpack_from(">II", data, offset))
+    hdlr = find_box(data, ("mdia", "hdlr"), start, end)
+    if hdlr:
+        handler = data[hdlr[0] + 8:hdlr[0] + 12].decode("latin-1")
+    stsd = find_box(data, ("mdia", "minf", "stbl", "stsd"), start, end)
+    if stsd and stsd[0] + 16 <= stsd[1]:
+        codec = data[stsd[0] + 12:stsd[0] + 16].decode("latin-1").strip()
+
+    if handler == "vide" and not info.video_codec:
+        info.video_codec = codec
+        info.width, info.height = width, height
+    elif handler == "soun" and not info.audio_codec:
+        info.audio_codec = codec
+
+
+class MediaInfoCache:
+    """Persistent MediaInfo cache keyed by (host, path, size, mtime)
+
+    A changed file gets a new key, so entries never need invalidating; the
+    oldest entries are dropped once the cache exceeds MAX_ENTRIES.
+    """
+
+    VERSION = 1
+    MAX_ENTRIES = 100000
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(
+            os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+            "remote-mp4-manager", "media_info.json")
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.load()
+
+    @staticmethod
+    def key(record):
+        return f"{record.host}\t{record.full_path}\t{record.size}\t{record.mtime}"
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Write the cache atomically"""
+        with self.lock:
+            if len(self.entries) > self.MAX_ENTRIES:
+                self.entries = dict(list(self.entries.items())[-self.MAX_ENTRIES:])
+            data = {"version": self.VERSION, "files": dict(self.entries)}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, record):
+        entry = self.entries.get(self.key(record))
+        return MediaInfo.from_dict(entry) if entry is not None else None
+
+    def put(self, record, info):
+        with self.lock:
+            self.entries[self.key(record)] = info.to_dict()
+
+
+class ThumbnailCache:
+    """On-disk LRU cache of PNG thumbnails keyed by (host, path, size, mtime)
+
+    Each thumbnail is one file named after a hash of its key; file mtimes
+    record last use, and the least recently used files are removed once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=THUMBNAIL_CACHE_BYTES):
+        self.directory = directory or os.path.join(
+            os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+            "remote-mp4-manager", "thumbnails")
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # file name -> [size, last use], in least recently used first order
+        self.files = {}
+        self.total = 0
+        try:
+            entries = sorted((entry.stat().st_mtime, entry.name, entry.stat().st_size)
+                             for entry in os.scandir(self.directory) if entry.name.endswith(".png"))
+        except OSError:
+            entries = []
+        for used, name, size in entries:
+            self.files[name] = [size, used]
+            self.total += size
+
+    @staticmethod
+    def key(record):
+        return f"{record.host}\t{record.full_path}\t{record.size}\t{record.mtime}"
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".png")
+
+    def get(self, key):
+        """Return the cached PNG bytes for key, or None"""
+        path = self._path(key)
+        name = os.path.basename(path)
+        with self.lock:
+            if name not in self.files:
+                return None
+            self.files[name] = self.files.pop(name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            with self.lock:
+                self.total -= self.files.pop(name, [0])[0]
+            return None
+
+    def put(self, key, data):
+        """Store a thumbnail, evicting the least recently used ones over max_bytes"""
+        path = self._path(key)
+        name = os.path.basename(path)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            self.total -= self.files.pop(name, [0])[0]
+            self.files[name] = [len(data), time.time()]
+            self.total += len(data)
+            evicted = []
+            while self.total > self.max_bytes and len(self.files) > 1:
+                oldest = next(iter(self.files))
+                self.total -= self.files.pop(oldest)[0]
+                evicted.append(oldest)
+        for oldest in evicted:
+            try:
+                os.remove(os.path.join(self.directory, oldest))
+            except OSError:
+                pass
+
+
+class ThumbnailLoader:
+    """Fetches thumbnails in the background with at most `workers` remote commands at once
+
+    request() replaces the set of wanted thumbnails, so work queued for rows
+    that scrolled out of view is skipped. Results are passed to notify as
+    ("thumbnail", ThumbnailCache.key(record), png_bytes). Files whose
+    thumbnail could not be made are not retried until they change.
+    """
+
+    def __init__(self, manager, notify, workers=THUMBNAIL_WORKERS):
+        self.manager = manager
+        self.notify = notify
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.wanted = set()
+        self.pending = set()
+        self.failed = set()
+
+    def request(self, records):
+        """Queue thumbnails for records, dropping queued requests for any others"""
+        with self.lock:
+            self.wanted = {ThumbnailCache.key(record) for record in records}
+            for record in records:
+                key = ThumbnailCache.key(record)
+                if key in self.pending or key in self.failed:
+                    continue
+                self.pending.add(key)
+                self.pool.submit(self._load, record, key)
+
+    def _load(self, record, key):
+        try:
+            with self.lock:
+                if key not in self.wanted:
+                    return
+            data = self.manager.fetch_thumbnail(record)
+            if data:
+                self.notify(("thumbnail", key, data))
+            else:
+                with self.lock:
+                    self.failed.add(key)
+        except Exception:
+            with self.lock:
+                self.failed.add(key)
+        finally:
+            with self.lock:
+                self.pending.discard(key)
+
+    def close(self):
+        """Drop queued thumbnails; a running one ends within THUMBNAIL_TIMEOUT"""
+        with self.lock:
+            self.wanted = set()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_on_daemon_threads(func, items, max_workers):
+    """Run func(item) on at most max_workers daemon threads, yielding (item, result, error) as each call finishes
+
+    ThreadPoolExecutor threads are joined at interpreter exit, so a remote
+    command still running in one would hold up quitting; daemon threads are
+    not. Every item is yielded exactly once: a call that raised has result
+    None and the exception as error, and the calls still running are waited
+    for as usual.
+    """
+    items = list(items)
+    finished = queue.Queue()
+    slots = threading.Semaphore(max(1, max_workers))
+
+    def run(item):
+        try:
+            outcome = (item, func(item), None)
+        except BaseException as e:
+            outcome = (item, None, e)
+        slots.release()
+        finished.put(outcome)
+
+    def start_all():
+        for item in items:
+            slots.acquire()
+            threading.Thread(target=run, args=(item,), daemon=True).start()
+
+    threading.Thread(target=start_all, daemon=True).start()
+    for _ in items:
+        yield finished.get()
+
+
+def daemon_map(func, items, max_workers=None):
+    """Return [func(item) for item in items], run through run_on_daemon_threads
+
+    The first exception raised by func, in item order, is re-raised once
+    every call has returned.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    errors = [None] * len(items)
+    for index, result, error in run_on_daemon_threads(lambda index: func(items[index]), range(len(items)),
+                                                      max_workers or len(items)):
+        results[index] = result
+        errors[index] = error
+    for error in errors:
+        if error is not None:
+            raise error
+    return results
+
+
+def combine_host_output(results, index):
+    """Join one field of {host: (success, stdout, stderr)} results, headed by host when there are several"""
+    if len(results) == 1:
+        return next(iter(results.values()))[index]
+    return "\n".join(f"=== {host} ===\n{result[index]}" for host, result in results.items())
+
+
+class MP4Manager:
+    """UI-free implementation of the manager's remote operations
+
+    Settings are plain attributes named as in DEFAULTS and may be changed
+    between operations with configure(). Operations block until they finish
+    and are safe to call from worker threads. Logs and progress are passed to
+    notify as ("log", text, level) and ("progress_update", percent, status)
+    tuples, the same messages the GUI's queue carries.
+    """
+
+    DEFAULTS = {
+        "remote_user": "autoware",
+        "remote_host": "192.168.20.21",
+        "remote_password": "autoware",
+        "remote_dir": "/tmp",
+        "local_dir": "./downloaded_videos",
+        "service_name": "screen-recorder.service",
+        "sudo_password": "",
+        "fleet_hosts": "",
+        "transport_mode": "auto",
+        "throttle_mode": "auto",
+        "throttle_rate": 10.0,
+        "total_rate": 0.0,
+        "max_parallel_hosts": 4,
+        "verify_transfers": False,
+        "offload_min_free_gb": 5.0,
+        "offload_lead_minutes": 15.0,
+    }
+
+    def __init__(self, notify=None, ask_sudo_password=None, **settings):
+        self.notify = notify or (lambda message: None)
+        # Called without arguments when sudo is needed and no password is set
+        self.ask_sudo_password = ask_sudo_password
+        for name, value in self.DEFAULTS.items():
+            setattr(self, name, value)
+        self.configure(**settings)
+
+        # Hosts that passed the last connection test
+        self.connected_hosts = []
+
+        # Last known recorder service state per host (missing until checked)
+        self.service_states = {}
+
+        # Parsed MP4 headers, shared by every host and kept across runs
+        self.media_cache = MediaInfoCache()
+        self.thumbnail_cache = ThumbnailCache()
+
+        # Hosts where ffmpeg is missing, so no thumbnails are requested from them
+        self.thumbnail_unsupported = set()
+
+        # Connections reused across operations, one per host, rebuilt when settings change
+        self.transports = {}
+        self.transport_host_locks = {}
+        self.transport_lock = threading.Lock()
+
+    def configure(self, **settings):
+        """Update settings by name"""
+        for name, value in settings.items():
+            if name not in self.DEFAULTS:
+                raise TypeError(f"unknown setting: {name}")
+            setattr(self, name, value)
+
+    def log(self, text, level="INFO"):
+        self.notify(("log", text, level))
+
+    def close(self):
+        """Close all cached connections"""
+        with self.transport_lock:
+            transports, self.transports = self.transports, {}
+        for transport, _ in transports.values():
+            transport.close()
+
+    # Hosts
+
+    def fleet_hosts_list(self):
+        """Return the configured host labels: the fleet list, or just remote_host"""
+        hosts = self.fleet_hosts
+        if isinstance(hosts, str):
+            hosts = hosts.replace("\n", ",").split(",")
+        hosts = list(dict.fromkeys(host.strip() for host in hosts if host.strip()))
+        return hosts or [self.remote_host.strip()]
+
+    def is_fleet_mode(self):
+        return len(self.fleet_hosts_list()) > 1
+
+    def target_hosts(self):
+        """Return the hosts that passed the last connection test, else all configured hosts"""
+        return list(self.connected_hosts) or self.fleet_hosts_list()
+
+    def split_host(self, host):
+        """Split a host label ("host" or "user@host") into (user, address)"""
+        if "@" in host:
+            user, address = host.rsplit("@", 1)
+            return user, address
+        return self.remote_user, host
+
+    def host_local_dir(self, host):
+        """Local directory for a host's files; fleet downloads get one subdirectory per host"""
+        if self.is_fleet_mode():
+            return os.path.join(self.local_dir, re.sub(r"[^\w.-]", "_", host))
+        return self.local_dir
+
+    def display_name(self, record):
+        return f"{record.host}:{record.filename}" if self.is_fleet_mode() else record.filename
+
+    def fan_out(self, hosts, func, max_workers=None):
+        """Run func(host) for every host at the same time, returning {host: result}"""
+        if len(hosts) <= 1:
+            return {host: func(host) for host in hosts}
+        return dict(zip(hosts, daemon_map(func, hosts, max_workers)))
+
+    # Connections
+
+    def get_transport(self, host=None):
+        """Return the transport for a host, connecting if needed
+
+        In auto mode an SFTP connection is tried first and scp/ssh processes are
+        used when paramiko is missing or the connection fails. Connections are
+        cached per host and rebuilt when the connection settings change.
+        """
+        host = host or self.target_hosts()[0]
+        user, address = self.split_host(host)
+        mode = self.transport_mode
+        key = (mode, address, user, self.remote_password)
+
+        with self.transport_lock:
+            host_lock = self.transport_host_locks.setdefault(host, threading.Lock())
+
+        with host_lock:
+            transport, transport_key = self.transports.get(host, (None, None))
+            if transport and transport_key == key and transport.is_alive():
+                return transport
+            if transport:
+                transport.close()
+
+            transport = None
+            if mode != "scp":
+                if paramiko is None:
+                    self.log("paramiko is not installed, using scp transport")
+                else:
+                    try:
+                        transport = SFTPTransport(address, user, key[3])
+                    except Exception as e:
+                        self.log(f"SFTP connection to {host} failed, using scp transport: {e}", "WARNING")
+            if transport is None:
+                transport = SubprocessTransport(address, user, key[3])
+
+            self.transports[host] = (transport, key)
+            return transport
+
+    def execute_remote_command(self, command, use_sudo=False, input_data=None, timeout=30, host=None):
+        """Execute command on a remote host, optionally feeding input_data on stdin"""
+        if use_sudo and not self.sudo_password:
+            password = self.ask_sudo_password() if self.ask_sudo_password else None
+            if not password:
+                return False, "", "Sudo password required"
+            self.sudo_password = password
+        if use_sudo:
+            # Use echo to pipe password to sudo -S
+            command = f"echo '{self.sudo_password}' | sudo -S {command}"
+
+        return self.get_transport(host).run(command, input_data=input_data, timeout=timeout)
+
+    def test_connection(self):
+        """Test SSH on every configured host at once, returning {host: (success, stdout, stderr)}
+
+        Hosts that respond become the targets of later operations.
+        """
+        hosts = self.fleet_hosts_list()
+        self.log(f"Testing SSH connection to {len(hosts)} host(s)...")
+        results = self.fan_out(hosts, lambda host: self.execute_remote_command(
+            "echo 'Connection test successful'", host=host))
+
+        self.connected_hosts = [host for host, (success, _, _) in results.items() if success]
+        self.service_states = {}
+        return results
+
+    def test_sudo(self, hosts=None):
+        """Run `sudo whoami` on the hosts, returning {host: (success, stdout, stderr)}"""
+        self.log("Testing sudo access...")
+        return self.fan_out(hosts or self.target_hosts(), lambda host: self.execute_remote_command(
+            "whoami", use_sudo=True, host=host))
+
+    # Service control
+
+    def service_status(self, hosts=None):
+        """Return {host: (success, stdout, stderr)} from `systemctl status` on the hosts"""
+        self.log("Checking service status...")
+        service = self.service_name
+        results = self.fan_out(hosts or self.target_hosts(), lambda host: self.execute_remote_command(
+            f"systemctl status {service}", host=host))
+
+        for host, (success, stdout, stderr) in results.items():
+            self.service_states[host] = "Active: active" in stdout if stdout else None
+        return results
+
+    def service_action(self, actions, hosts=None):
+        """Run systemctl actions (e.g. ["enable", "start"]) on the hosts at the same time
+
+        Returns {host: (success, stdout, stderr)} with the output of each action
+        prefixed by its name when there are several.
+        """
+        hosts = hosts or self.target_hosts()
+        service = self.service_name
+
+        def run_actions(host):
+            outputs = [(action, self.execute_remote_command(f"systemctl {action} {service}",
+                                                            use_sudo=True, host=host))
+                       for action in actions]
+            if len(outputs) == 1:
+                return outputs[0][1]
+            return (all(output[0] for _, output in outputs),
+                    "\n".join(f"{action.capitalize()}: {output[1]}" for action, output in outputs),
+                    "\n".join(f"{action.capitalize()}: {output[2]}" for action, output in outputs))
+
+        self.log(f"Running {'/'.join(actions)} for {service} on {len(hosts)} host(s)...")
+        return self.fan_out(hosts, run_actions)
+
+    def probe_service_active(self, host=None):
+        """Return whether the recorder service is active, or None if it cannot be determined"""
+        success, stdout, stderr = self.execute_remote_command(
+            f"systemctl is-active {self.service_name}", host=host)
+        state = stdout.strip()
+        return state == "active" if state else None
+
+    # Listing
+
+    def list_files(self, hosts=None):
+        """List remote MP4 files on the hosts, returning (success, records, errors)
+
+        success is true if any host could be listed; errors describes the hosts
+        that could not.
+        """
+        command = f"find '{self.remote_dir}' -maxdepth 1 -name '*.mp4' -type f -printf '{FILE_LIST_FORMAT}' 2>/dev/null"
+
+        def list_host(host):
+            success, stdout, stderr = self.execute_remote_command(command, host=host)
+            return success, parse_file_listing(stdout, host) if success else [], stderr
+
+        self.log("Refreshing file list...")
+        results = self.fan_out(hosts or self.target_hosts(), list_host)
+
+        records = [record for _, host_records, _ in results.values() for record in host_records]
+        errors = "; ".join(f"{host}: {stderr.strip()}" for host, (success, _, stderr) in results.items()
+                           if not success)
+        return any(result[0] for result in results.values()), records, errors
+
+    def attach_cached_media(self, records):
+        """Set record.media from the cache, returning the records that still need probing"""
+        missing = []
+        for record in records:
+            record.media = self.media_cache.get(record)
+            if record.media is None:
+                missing.append(record)
+        return missing
+
+    def probe_media(self, records):
+        """Read duration, resolution, codecs and bitrate from the MP4 headers of records
+
+        Only top-level box headers and the moov box are fetched, with byte-range
+        reads, and parsed locally. Results are cached by (host, path, size,
+        mtime) so each version of a file is parsed once. Each new result is set
+        on the record and passed to notify as ("media_info", record.key, info).
+        Returns the number of files probed.
+        """
+        by_host = {}
+        for record in self.attach_cached_media(records):
+            by_host.setdefault(record.host, []).append(record)
+
+        def probe_host(host):
+            try:
+                transport = self.get_transport(host)
+            except Exception as e:
+                self.log(f"Cannot connect to {host}: {str(e)}", "ERROR")
+                return 0
+            probed = 0
+            for record in by_host[host]:
+                def read(offset, length):
+                    return transport.read_range(record.full_path, offset, length)
+                try:
+                    moov = read_moov(read, record.size)
+                except Exception as e:
+                    self.log(f"Cannot read headers of {self.display_name(record)}: {str(e)}", "ERROR")
+                    continue
+                record.media = parse_moov(moov, record.size) if moov else MediaInfo()
+                self.media_cache.put(record, record.media)
+                self.notify(("media_info", record.key, record.media))
+                probed += 1
+            return probed
+
+        probed = sum(self.fan_out(list(by_host), probe_host).values())
+        if probed:
+            try:
+                self.media_cache.save()
+            except OSError as e:
+                self.log(f"Failed to save media info cache: {str(e)}", "ERROR")
+        return probed
+
+    def fetch_thumbnail(self, record):
+        """Return PNG bytes of a keyframe near the start of record, or None if unavailable
+
+        The frame is decoded and scaled by ffmpeg on the remote host at idle
+        priority, so only a few KB cross the network. Results are kept in the
+        on-disk thumbnail cache.
+        """
+        key = ThumbnailCache.key(record)
+        data = self.thumbnail_cache.get(key)
+        if data is not None or record.host in self.thumbnail_unsupported:
+            return data
+
+        position = 1.0
+        if record.media and record.media.duration:
+            position = min(position, record.media.duration / 2)
+        scale = f"scale={THUMBNAIL_WIDTH}:{THUMBNAIL_HEIGHT}:force_original_aspect_ratio=decrease"
+        process = self.get_transport(record.host).popen(
+            f"{LOW_PRIORITY_PREFIX} ffmpeg -nostdin -v error -skip_frame nokey -ss {position:.2f} "
+            f"-i {shlex.quote(record.full_path)} -frames:v 1 -vf {scale} -c:v png -f image2pipe -")
+        try:
+            data, error = process.communicate(timeout=THUMBNAIL_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            self.log(f"No thumbnail for {self.display_name(record)}: ffmpeg timed out", "WARNING")
+            return None
+        error = error.decode(errors="replace").strip()
+        status = process.returncode
+
+        if status == 127:
+            self.thumbnail_unsupported.add(record.host)
+            self.log(f"ffmpeg is not installed on {record.host or self.remote_host}, "
+                     "thumbnails are unavailable", "WARNING")
+            return None
+        if status != 0 or not data.startswith(b"\x89PNG"):
+            if error:
+                self.log(f"No thumbnail for {self.display_name(record)}: {error.splitlines()[-1]}", "WARNING")
+            return None
+        self.thumbnail_cache.put(key, data)
+        return data
+
+    def pending_sync(self, records):
+        """Return the records that are new or changed since they were last downloaded"""
+        manifests = {}
+        pending = []
+        for record in records:
+            manifest = manifests.get(record.host)
+            if manifest is None:
+                manifest = manifests[record.host] = LocalManifest(self.host_local_dir(record.host))
+            if not manifest.is_current(record):
+                pending.append(record)
+        return pending
+
+    # Transfers
+
+    def download(self, records, delete_after=False, verify=None, min_rate=0):
+        """Download records, returning {"downloaded", "failed", "total", "bytes", "seconds"}
+
+        Hosts are downloaded in parallel (up to max_parallel_hosts at a time,
+        one file at a time per host) under a shared total bandwidth budget, and
+        each host's files are recorded in its local manifest. Progress is
+        reported in bytes across the whole batch (see TransferProgress). With
+        checksum verification enabled, files are streamed and hashed while being
+        written and compared against a remote sha256sum that runs alongside the
+        batch. With delete_after, remote files whose local copy matched their
+        remote checksum are deleted once that host's batch has been transferred.
+
+        verify overrides the verify_transfers setting; delete_after always
+        verifies, so nothing is deleted on the strength of a size check. min_rate (bytes/s) raises
+        a throttled per-host cap so a caller that must keep up with the
+        recorder is not held below the rate it needs.
+        """
+        by_host = {}
+        for record in records:
+            by_host.setdefault(record.host, []).append(record)
+
+        for host in by_host:
+            os.makedirs(self.host_local_dir(host), exist_ok=True)
+
+        progress = TransferProgress(sum(record.size for record in records), len(records), self.notify)
+        options = {
+            "throttle_mode": self.throttle_mode,
+            "verify": True if delete_after else (self.verify_transfers if verify is None else verify),
+            "min_rate": min_rate,
+            "remote_dir": self.remote_dir,
+            "delete_after": delete_after,
+            "progress": progress,
+        }
+        budget = TokenBucket(self.total_rate_limit())
+        try:
+            workers = max(1, int(self.max_parallel_hosts))
+        except (TypeError, ValueError):
+            workers = 1
+        stats = {"downloaded": 0, "failed": 0, "total": len(records)}
+        stats_lock = threading.Lock()
+
+        if budget.rate:
+            self.log(f"Total download budget {budget.rate / 1e6:.1f} MB/s")
+        progress.start()
+        try:
+            self.fan_out(list(by_host), lambda host: self.download_host(
+                host, by_host[host], options, budget, stats, stats_lock), max_workers=workers)
+        finally:
+            progress.stop()
+
+        elapsed = progress.elapsed
+        self.log(f"Transferred {format_size(progress.received)} in {elapsed:.1f}s "
+                 f"({progress.received / elapsed / 1e6 if elapsed else 0:.1f} MB/s)")
+        return dict(stats, bytes=progress.received, seconds=round(elapsed, 3))
+
+    def download_host(self, host, records, options, budget, stats, stats_lock):
+        """Download one host's share of a batch, one file at a time"""
+        local_dir = self.host_local_dir(host)
+        remote_dir = options["remote_dir"]
+        throttle_mode = options["throttle_mode"]
+        manifest = LocalManifest(local_dir)
+        verified = []
+
+        try:
+            transport = self.get_transport(host)
+        except Exception as e:
+            with stats_lock:
+                stats["failed"] += len(records)
+            for record in records:
+                options["progress"].finish(record.key, record.size)
+            self.log(f"Cannot connect to {host}: {str(e)}", "ERROR")
+            return
+
+        hasher = None
+        if options["verify"]:
+            hasher = RemoteHasher(transport, remote_dir, [record.filename for record in records],
+                                  low_priority=throttle_mode != "off")
+            hasher.start()
+
+        service_active = self.service_states.get(host)
+        if throttle_mode == "auto" and service_active is None:
+            service_active = self.probe_service_active(host)
+        limiter = TokenBucket(self.transfer_rate_limit(service_active, options["min_rate"]), parent=budget)
+        last_probe = time.monotonic()
+        if limiter.rate:
+            self.log(f"Downloads from {host} throttled to {limiter.rate / 1e6:.1f} MB/s")
+
+        for record in records:
+            name = self.display_name(record)
+            remote_path = f"{remote_dir}/{record.filename}"
+            local_path = os.path.join(local_dir, record.filename)
+            progress = options["progress"].begin(record.key, name, record.size)
+
+            # Re-check the recorder so the cap follows it starting or stopping mid-batch
+            if throttle_mode == "auto" and time.monotonic() - last_probe > SERVICE_PROBE_INTERVAL:
+                last_probe = time.monotonic()
+                active = self.probe_service_active(host)
+                if active is not None and active != service_active:
+                    service_active = active
+                    limiter.set_rate(self.transfer_rate_limit(active, options["min_rate"]))
+                    state = f"throttled to {limiter.rate / 1e6:.1f} MB/s" if limiter.rate else "unthrottled"
+                    self.log(f"Service state changed on {host}, downloads {state}")
+
+            try:
+                if hasher:
+                    digest = self.fetch_verified(transport, record.filename, remote_path, local_path,
+                                                 hasher, limiter, progress)
+                else:
+                    digest = transport.download(remote_path, local_path, limiter, progress)
+
+                with stats_lock:
+                    stats["downloaded"] += 1
+                self.log(f"Downloaded: {name}", "SUCCESS")
+                if os.path.getsize(local_path) == record.size:
+                    manifest.update(record, digest)
+                    verified.append(record.filename)
+            except Exception as e:
+                with stats_lock:
+                    stats["failed"] += 1
+                self.log(f"Error downloading {name}: {str(e)}", "ERROR")
+            options["progress"].finish(record.key)
+
+        if hasher:
+            hasher.stop()
+
+        try:
+            manifest.save()
+        except OSError as e:
+            self.log(f"Failed to save manifest for {host}: {str(e)}", "ERROR")
+
+        if options["delete_after"] and verified:
+            deleted, delete_failed = self.delete_remote_files(verified, host)
+            self.log(f"Deleted {len(deleted)} verified remote files on {host} "
+                     f"({len(delete_failed)} failed)", "SUCCESS")
+
+    def transfer_rate_limit(self, service_active, min_rate=0):
+        """Return the per-host download rate cap in bytes/s for the throttle settings, 0 for none"""
+        mode = self.throttle_mode
+        if mode == "always" or (mode == "auto" and service_active):
+            try:
+                rate = max(0.0, float(self.throttle_rate)) * 1e6
+            except (TypeError, ValueError):
+                return 0
+            return max(rate, min_rate) if rate else 0
+        return 0
+
+    def total_rate_limit(self):
+        """Return the bandwidth budget shared by all hosts in bytes/s, 0 for none"""
+        try:
+            return max(0.0, float(self.total_rate)) * 1e6
+        except (TypeError, ValueError):
+            return 0
+
+    def fetch_verified(self, transport, filename, remote_path, local_path, hasher, limiter=None, progress=None):
+        """Download a file and compare it with the remote checksum, re-fetching on mismatch"""
+        for attempt in range(1, VERIFY_ATTEMPTS + 1):
+            local_digest = transport.fetch(remote_path, local_path, limiter, progress)
+            remote_digest = hasher.get(filename)
+            if remote_digest is None:
+                raise RuntimeError("remote checksum unavailable")
+            if local_digest == remote_digest:
+                return local_digest
+            self.log(f"Checksum mismatch for {filename} (attempt {attempt}/{VERIFY_ATTEMPTS})", "WARNING")
+
+        raise RuntimeError(f"checksum mismatch after {VERIFY_ATTEMPTS} attempts")
+
+    # Deletion
+
+    def delete(self, records):
+        """Delete records from their hosts in parallel, returning {host: (deleted, failed)}"""
+        by_host = {}
+        for record in records:
+            by_host.setdefault(record.host, []).append(record.filename)
+        fleet = self.is_fleet_mode()
+
+        results = self.fan_out(list(by_host), lambda host: self.delete_remote_files(by_host[host], host))
+        for host, (deleted, failed) in results.items():
+            prefix = f"{host}:" if fleet else ""
+            for filename in deleted:
+                self.log(f"Deleted: {prefix}{filename}", "SUCCESS")
+            for filename in failed:
+                self.log(f"Failed to delete: {prefix}{filename}", "ERROR")
+        return results
+
+    def delete_remote_files(self, filenames, host=None):
+        """Delete files in remote_dir in batches, returning (deleted, failed) name lists
+
+        Names are sent NUL-separated on stdin to `xargs -0`, so each batch costs a
+        single SSH session regardless of how many files it contains.
+        """
+        remote_dir = self.remote_dir
+        command = f"cd {shlex.quote(remote_dir)} && xargs -0 sh -c {shlex.quote(BATCH_DELETE_SCRIPT)} _"
+        deleted = []
+        failed = []
+
+        for start in range(0, len(filenames), DELETE_BATCH_SIZE):
+            batch = filenames[start:start + DELETE_BATCH_SIZE]
+            success, stdout, stderr = self.execute_remote_command(
+                command, input_data="\0".join(batch) + "\0", timeout=120, host=host)
+
+            reported = {}
+            for entry in stdout.split("\0"):
+                status, _, name = entry.partition("\t")
+                reported[name] = status
+            for filename in batch:
+                if reported.get(filename) == "OK":
+                    deleted.append(filename)
+                else:
+                    failed.append(filename)
+
+            if not success and not reported:
+                self.log(f"Batch delete failed: {stderr.strip()}", "ERROR")
+
+        return deleted, failed
+
+
+class DiskForecast:
+    """Estimates a remote disk's fill rate from recent free-space samples
+
+    The write rate is the least-squares slope of free space over the last
+    OFFLOAD_RATE_WINDOW seconds, so a single noisy sample does not trigger an
+    offload.
+    """
+
+    def __init__(self, window=OFFLOAD_RATE_WINDOW):
+        self.window = window
+        self.samples = collections.deque()
+
+    def add(self, timestamp, free):
+        self.samples.append((timestamp, free))
+        while self.samples and timestamp - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+    def write_rate(self):
+        """Return the rate free space is shrinking in bytes/s (0 if it is not)"""
+        if len(self.samples) < 2:
+            return 0.0
+        n = len(self.samples)
+        mean_t = sum(t for t, _ in self.samples) / n
+        mean_f = sum(f for _, f in self.samples) / n
+        var_t = sum((t - mean_t) ** 2 for t, _ in self.samples)
+        if not var_t:
+            return 0.0
+        slope = sum((t - mean_t) * (f - mean_f) for t, f in self.samples) / var_t
+        return max(0.0, -slope)
+
+    def seconds_until(self, free_threshold):
+        """Seconds until free space drops to free_threshold at the current rate, or None"""
+        if not self.samples:
+            return None
+        headroom = self.samples[-1][1] - free_threshold
+        if headroom <= 0:
+            return 0.0
+        rate = self.write_rate()
+        return headroom / rate if rate else None
+
+
+class OffloadPipeline:
+    """Keeps remote recording directories from filling up by offloading the oldest files
+
+    Every OFFLOAD_SAMPLE_INTERVAL seconds each host's free space is sampled
+    with one `df` call. When free space is below offload_min_free_gb, or the
+    forecast says it will be within offload_lead_minutes, the oldest finished
+    recordings are downloaded, verified against a remote checksum and deleted
+    remotely, file by file, until the forecast is back above twice the lead
+    time. The transfer rate and the number of files moved at once are chosen
+    from the measured write rate so the pipeline frees space faster than the
+    recorder consumes it.
+
+    Status is passed to notify (the manager's by default) as ("offload_status", host, status) and finished
+    runs as ("offload_complete", host, moved, moved_bytes, failed).
+    """
+
+    def __init__(self, manager, hosts=None, notify=None):
+        self.manager = manager
+        self.notify = notify or manager.notify
+        self.hosts = list(hosts or manager.target_hosts())
+        self.stopped = threading.Event()
+        self.forecasts = {host: DiskForecast() for host in self.hosts}
+        # Measured bytes/s of one offload stream per host, used to pick the concurrency
+        self.stream_rates = {}
+        # Transfers use their own connections and stay off the progress bar
+        self.worker = MP4Manager(notify=self._forward)
+
+    def _forward(self, message):
+        if message[0] != "progress_update":
+            self.notify(message)
+
+    def start(self):
+        for host in self.hosts:
+            threading.Thread(target=self._run, args=(host,), daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self, host):
+        while not self.stopped.is_set():
+            try:
+                self.run_once(host)
+            except Exception as e:
+                self.manager.log(f"Offload error on {host}: {str(e)}", "ERROR")
+            self.stopped.wait(OFFLOAD_SAMPLE_INTERVAL)
+        self.worker.close()
+
+    def sample(self, host):
+        """Return (total, free, remote_now) for the remote directory's filesystem, or None"""
+        success, stdout, stderr = self.worker.execute_remote_command(
+            f"df -P -B1 -- {shlex.quote(self.worker.remote_dir)} | tail -n 1; date +%s", host=host)
+        lines = stdout.split()
+        try:
+            return int(lines[1]), int(lines[3]), float(lines[-1])
+        except (IndexError, ValueError):
+            self.manager.log(f"Cannot read free space on {host}: {stderr.strip() or stdout.strip()}", "WARNING")
+            return None
+
+    def run_once(self, host):
+        """Sample one host, offloading if it is about to run out of space; returns the status"""
+        self.worker.configure(**{name: getattr(self.manager, name) for name in MP4Manager.DEFAULTS})
+        sample = self.sample(host)
+        if sample is None:
+            return None
+        total, free, remote_now = sample
+        forecast = self.forecasts.setdefault(host, DiskForecast())
+        forecast.add(time.monotonic(), free)
+
+        min_free = max(0.0, float(self.manager.offload_min_free_gb)) * 1e9
+        lead = max(0.0, float(self.manager.offload_lead_minutes)) * 60
+        eta = forecast.seconds_until(min_free)
+        status = {"total": total, "free": free, "write_rate": forecast.write_rate(),
+                  "seconds_to_threshold": eta, "offloading": False}
+        self.notify(("offload_status", host, dict(status)))
+
+        if free < min_free or (eta is not None and eta < lead):
+            status["offloading"] = True
+            self.notify(("offload_status", host, dict(status)))
+            self.offload(host, free, remote_now, forecast.write_rate(), min_free, lead)
+            status["offloading"] = False
+            self.notify(("offload_status", host, dict(status)))
+        return status
+
+    def offload(self, host, free, remote_now, write_rate, min_free, lead):
+        """Move the oldest finished recordings off host until the forecast is safe again"""
+        success, records, errors = self.worker.list_files([host])
+        if not success:
+            self.manager.log(f"Offload cannot list {host}: {errors}", "ERROR")
+            return
+        # Files written to recently are probably still being recorded
+        finished = sorted((record for record in records if remote_now - record.mtime > OFFLOAD_ACTIVE_AGE),
+                          key=lambda record: record.mtime)
+        target = min_free + write_rate * lead * 2 - free
+        batch = []
+        for record in finished:
+            if sum(item.size for item in batch) >= target:
+                break
+            batch.append(record)
+        if not batch:
+            self.manager.log(f"{host} is running out of space but has no finished recordings to offload", "WARNING")
+            return
+
+        # Stay ahead of the recorder: at least twice its write rate, and fast
+        # enough that the largest file is moved before the headroom is used up
+        headroom = free - min_free
+        if headroom > 0:
+            required = max(2 * write_rate, write_rate * max(record.size for record in batch) / headroom)
+        else:
+            required = 0  # already past the threshold: no cap at all
+        measured = self.stream_rates.get(host)
+        workers = 1
+        if required and measured:
+            workers = max(1, min(OFFLOAD_MAX_WORKERS, math.ceil(required / measured)))
+        elif not required:
+            workers = OFFLOAD_MAX_WORKERS
+        min_rate = required / workers
+
+        moved_bytes = sum(record.size for record in batch)
+        self.manager.log(f"Offloading {len(batch)} files ({format_size(moved_bytes)}) from {host}, "
+                         f"{workers} at a time, writer at {write_rate / 1e6:.1f} MB/s", "WARNING")
+
+        def move(record):
+            if self.stopped.is_set():
+                return False
+            started = time.monotonic()
+            stats = self.worker.download([record], delete_after=True, verify=True, min_rate=min_rate)
+            elapsed = time.monotonic() - started
+            if stats["downloaded"] and elapsed > 0:
+                self.stream_rates[host] = record.size / elapsed
+            return bool(stats["downloaded"])
+
+        results = daemon_map(move, batch, workers)
+        moved = [record for record, ok in zip(batch, results) if ok]
+        self.notify(("offload_complete", host, len(moved), sum(record.size for record in moved),
+                     len(batch) - len(moved)))
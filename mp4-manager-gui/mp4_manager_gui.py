@@ -13,8 +13,501 @@ import tempfile
 from datetime import datetime
 import queue
 import json
+import logging
+import logging.handlers
+import base64
+from collections import OrderedDict, deque
+
+from mp4_manager_core import (MP4Manager, OffloadPipeline, RemoteWatcher, ServiceSampler, ThumbnailCache,
+                              ThumbnailLoader, combine_host_output, format_size, SERVICE_HISTORY,
+                              THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT)
+
+
+class VirtualFileList:
+    """Virtualized Treeview over a list of RemoteFile records
+
+    Only the rows that fit in the widget are materialized as Treeview items;
+    scrolling rebinds those items to other records. Selection is kept in the
+    model (by record key) so it survives scrolling, sorting and filtering.
+    The host column is only displayed in fleet mode; the media columns stay
+    empty until a record's MP4 headers have been read. With previews enabled,
+    thumbnails for the visible rows are requested through on_thumbnails_needed.
+    """
+
+    COLUMNS = ("host", "filename", "size", "date", "duration", "resolution", "codec", "bitrate")
+    SORT_KEYS = {
+        "host": lambda record: (record.host, record.name_key),
+        "filename": lambda record: record.name_key,
+        "size": lambda record: record.size,
+        "date": lambda record: record.mtime,
+        "duration": lambda record: record.media.duration or 0 if record.media else -1,
+        "resolution": lambda record: (record.media.width or 0) * (record.media.height or 0) if record.media else -1,
+        "codec": lambda record: record.media.codec_text if record.media else "",
+        "bitrate": lambda record: record.media.bitrate or 0 if record.media else -1,
+    }
+    BATCH_SIZE = 5000
+    # Decoded thumbnails kept in memory; older ones are reloaded from the disk cache
+    MAX_THUMBNAILS = 500
+
+    def __init__(self, parent, height=15):
+        self.records = []
+        self.order = []
+        self.selected = set()
+        self.offset = 0
+        self.visible_rows = height
+        self.sort_column = None
+        self.sort_reverse = False
+        self.filter_text = ""
+        self._sorted_cache = {}
+        self._row_keys = {}
+        self._rendered_selection = set()
+        self._pending = None
+        self._refresh_pending = None
+        self._deferred = []
+        self.index = {}
+        self.previews = False
+        self.thumbnails = OrderedDict()
+        self.on_thumbnails_needed = None
+
+        self.tree = ttk.Treeview(parent, columns=self.COLUMNS, displaycolumns=self.COLUMNS[1:],
+                                 show="headings", height=height)
+        self.tree.heading("host", text="Host", command=lambda: self.sort_by("host"))
+        self.tree.heading("filename", text="Filename", command=lambda: self.sort_by("filename"))
+        self.tree.heading("size", text="Size", command=lambda: self.sort_by("size"))
+        self.tree.heading("date", text="Date Modified", command=lambda: self.sort_by("date"))
+        self.tree.heading("duration", text="Duration", command=lambda: self.sort_by("duration"))
+        self.tree.heading("resolution", text="Resolution", command=lambda: self.sort_by("resolution"))
+        self.tree.heading("codec", text="Codec", command=lambda: self.sort_by("codec"))
+        self.tree.heading("bitrate", text="Bitrate", command=lambda: self.sort_by("bitrate"))
+
+        self.tree.column("host", width=150)
+        self.tree.column("filename", width=260)
+        self.tree.column("size", width=70)
+        self.tree.column("date", width=140)
+        self.tree.column("duration", width=70)
+        self.tree.column("resolution", width=80)
+        self.tree.column("codec", width=80)
+        self.tree.column("bitrate", width=80)
+
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.on_scrollbar)
+
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<ButtonPress-1>", self.on_click)
+        self.tree.bind("<Configure>", self.on_configure)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.tree.bind("<Up>", lambda e: self.on_arrow(-1))
+        self.tree.bind("<Down>", lambda e: self.on_arrow(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll_by(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self.scroll_by(self.visible_rows))
+
+    def pack(self):
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def set_show_host(self, show):
+        """Show or hide the host column"""
+        self.tree.configure(displaycolumns=self.COLUMNS if show else self.COLUMNS[1:])
+
+    def set_previews(self, enabled):
+        """Show or hide the thumbnail column, switching to taller rows while shown"""
+        self.previews = enabled
+        if enabled:
+            ttk.Style().configure("Preview.Treeview", rowheight=THUMBNAIL_HEIGHT + 6)
+            self.tree.column("#0", width=THUMBNAIL_WIDTH + 10, stretch=False)
+        self.tree.configure(show="tree headings" if enabled else "headings",
+                            style="Preview.Treeview" if enabled else "Treeview")
+        self.render()
+        # Row height changed, so the number of rows that fit changes too
+        self.tree.after_idle(self.on_configure)
+
+    def add_thumbnail(self, key, data):
+        """Store a thumbnail (PNG bytes) for the record with ThumbnailCache key"""
+        self.thumbnails[key] = tk.PhotoImage(data=base64.b64encode(data))
+        while len(self.thumbnails) > self.MAX_THUMBNAILS:
+            self.thumbnails.popitem(last=False)
+        if self.previews:
+            self.render()
+
+    # Model operations
+
+    def __len__(self):
+        return len(self.records)
+
+    def clear(self):
+        """Drop all records and selection"""
+        if self._pending is not None:
+            self.tree.after_cancel(self._pending)
+            self._pending = None
+        self.records = []
+        self.order = []
+        self.index = {}
+        self._deferred = []
+        self.selected.clear()
+        self._sorted_cache.clear()
+        self.offset = 0
+        self.render()
+
+    def load(self, records, on_done=None):
+        """Replace the contents, feeding records in batches between event-loop ticks"""
+        self.clear()
+        self._feed(records, 0, on_done)
+
+    def _feed(self, records, start, on_done):
+        batch = records[start:start + self.BATCH_SIZE]
+        base = len(self.records)
+        self.records.extend(batch)
+        for i, record in enumerate(batch, base):
+            self.index[record.key] = i
+        needle = self.filter_text
+        self.order.extend(i for i in range(base, base + len(batch))
+                          if not needle or needle in self.records[i].name_key)
+        start += len(batch)
+
+        if start < len(records):
+            if base == 0:
+                self.render()
+            self._pending = self.tree.after(1, self._feed, records, start, on_done)
+            return
+
+        self._pending = None
+        self._sorted_cache.clear()
+        if self.sort_column:
+            self.apply_view()
+        else:
+            self.render()
+        if on_done:
+            on_done()
+
+        deferred, self._deferred = self._deferred, []
+        for method, arg in deferred:
+            method(arg)
+
+    def upsert(self, record):
+        """Insert a record, or replace the one with the same key"""
+        if self._pending is not None:
+            self._deferred.append((self.upsert, record))
+            return
+        i = self.index.get(record.key)
+        if i is None:
+            self.index[record.key] = len(self.records)
+            self.records.append(record)
+        else:
+            self.records[i] = record
+        self._changed()
+
+    def remove(self, key):
+        """Remove the record with the given key, if present"""
+        if self._pending is not None:
+            self._deferred.append((self.remove, key))
+            return
+        i = self.index.pop(key, None)
+        if i is None:
+            return
+        del self.records[i]
+        for j in range(i, len(self.records)):
+            self.index[self.records[j].key] = j
+        # Keep the current order valid until the coalesced refresh runs
+        self.order = [j - (j > i) for j in self.order if j != i]
+        self.selected.discard(key)
+        self._changed()
+
+    def set_media(self, key, media):
+        """Attach MediaInfo to the record with the given key, if present"""
+        i = self.index.get(key)
+        if i is None:
+            return
+        self.records[i].media = media
+        self._changed()
+
+    def _changed(self):
+        """Invalidate sort caches and schedule one view refresh for a burst of changes"""
+        self._sorted_cache.clear()
+        if self._refresh_pending is None:
+            self._refresh_pending = self.tree.after(50, self._refresh)
+
+    def _refresh(self):
+        self._refresh_pending = None
+        self.apply_view()
+
+    def selected_records(self):
+        """Return the selected records in the current view order"""
+        return [self.records[i] for i in self.order if self.records[i].key in self.selected]
+
+    def selected_filenames(self):
+        return [record.filename for record in self.selected_records()]
+
+    # View operations
+
+    def sorted_indices(self, column):
+        """Return record indices ordered by column, cached until the data changes"""
+        if column not in self._sorted_cache:
+            key = self.SORT_KEYS[column]
+            records = self.records
+            self._sorted_cache[column] = sorted(range(len(records)), key=lambda i: key(records[i]))
+        return self._sorted_cache[column]
+
+    def apply_view(self):
+        """Recompute the visible order from the current sort column and filter"""
+        if self.sort_column:
+            indices = self.sorted_indices(self.sort_column)
+            if self.sort_reverse:
+                indices = reversed(indices)
+        else:
+            indices = range(len(self.records))
+
+        needle = self.filter_text
+        if needle:
+            records = self.records
+            self.order = [i for i in indices if needle in records[i].name_key]
+        else:
+            self.order = list(indices)
+
+        self.offset = min(self.offset, max(0, len(self.order) - self.visible_rows))
+        self.render()
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self.apply_view()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip().casefold()
+        self.offset = 0
+        self.apply_view()
+
+    def render(self):
+        """Bind the materialized Treeview rows to the records at the current offset"""
+        count = max(0, min(self.visible_rows, len(self.order) - self.offset))
+        items = self.tree.get_children()
+
+        for iid in items[count:]:
+            self.tree.delete(iid)
+            self._row_keys.pop(iid, None)
+        for _ in range(len(items), count):
+            self.tree.insert("", tk.END)
+        items = self.tree.get_children()
+
+        selection = []
+        missing = []
+        for row, iid in enumerate(items):
+            record = self.records[self.order[self.offset + row]]
+            if self.previews:
+                image = self.thumbnails.get(ThumbnailCache.key(record))
+                if image is None:
+                    missing.append(record)
+                else:
+                    self.thumbnails.move_to_end(ThumbnailCache.key(record))
+                self.tree.item(iid, image=image or "")
+            media = record.media
+            values = (record.host, record.filename, record.size_text, record.date_text)
+            if media:
+                values += (media.duration_text, media.resolution_text, media.codec_text, media.bitrate_text)
+            self.tree.item(iid, values=values)
+            self._row_keys[iid] = record.key
+            if record.key in self.selected:
+                selection.append(iid)
+
+        self._rendered_selection = set(selection)
+        self.tree.selection_set(selection)
+        self.update_scrollbar()
+        if self.previews and self.on_thumbnails_needed:
+            self.on_thumbnails_needed(missing)
+
+    def update_scrollbar(self):
+        total = len(self.order)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible_rows) / total)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), len(self.order) - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    # Event handlers
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(value) * len(self.order))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_by(int(value) * step)
+
+    def on_mousewheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def on_arrow(self, direction):
+        """Scroll when the keyboard focus moves past the first or last materialized row"""
+        items = self.tree.get_children()
+        if not items:
+            return "break"
+        focus = self.tree.focus()
+        edge = items[0] if direction < 0 else items[-1]
+        if focus == edge or not focus:
+            self.scroll_by(direction)
+            return "break"
+        return None
+
+    def on_click(self, event):
+        # A plain click replaces the selection, including rows scrolled out of view
+        if self.tree.identify_region(event.x, event.y) in ("cell", "tree"):
+            if not event.state & 0x0005:  # neither Shift nor Control held
+                self.selected.clear()
+
+    def on_select(self, event=None):
+        current = set(self.tree.selection())
+        if current == self._rendered_selection:
+            return
+        for iid, key in self._row_keys.items():
+            if iid in current:
+                self.selected.add(key)
+            else:
+                self.selected.discard(key)
+        self._rendered_selection = current
+
+    def on_configure(self, event=None):
+        """Resize the pool of materialized rows to fit the widget height"""
+        items = self.tree.get_children()
+        bbox = self.tree.bbox(items[0]) if items else None
+        if not bbox:
+            return
+        header, row_height = bbox[1], max(1, bbox[3])
+        rows = max(1, (self.tree.winfo_height() - header) // row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.offset = min(self.offset, max(0, len(self.order) - rows))
+            self.render()
+
+
+class HealthPanel:
+    """Live recorder health: one summary row per host and trend lines for the selected one
+
+    Samples come from ServiceSampler; the last SERVICE_HISTORY samples per host
+    are kept. Redraws are coalesced into one per idle cycle.
+    """
+
+    COLUMNS = ("host", "state", "pid", "cpu", "memory", "write")
+    # (label, sample attribute, value formatter, line color)
+    TRENDS = (
+        ("CPU", "cpu_percent", lambda value: f"{value:.0f}%", "#1f77b4"),
+        ("Memory", "memory", format_size, "#2ca02c"),
+        ("Write", "write_rate", lambda value: f"{format_size(value)}/s", "#d62728"),
+    )
+
+    def __init__(self, parent):
+        self.history = {}
+        self.shown_host = None
+        self._redraw_pending = None
+
+        self.tree = ttk.Treeview(parent, columns=self.COLUMNS, show="headings", height=3, selectmode="browse")
+        for column, title, width in (("host", "Host", 150), ("state", "State", 90), ("pid", "PID", 70),
+                                     ("cpu", "CPU", 70), ("memory", "Memory", 80), ("write", "Disk Write", 100)):
+            self.tree.heading(column, text=title)
+            self.tree.column(column, width=width)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+        self.canvas = tk.Canvas(parent, height=150, background="white", highlightthickness=0)
+        self.canvas.bind("<Configure>", lambda e: self.schedule_redraw())
+
+    def pack(self):
+        self.tree.pack(fill=tk.X)
+        self.canvas.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
+
+    def clear(self):
+        self.history = {}
+        self.shown_host = None
+        self.tree.delete(*self.tree.get_children())
+        self.canvas.delete("all")
+
+    def add(self, host, sample):
+        """Record a ServiceSample for host and update its row"""
+        samples = self.history.setdefault(host, deque(maxlen=SERVICE_HISTORY))
+        samples.append(sample)
+
+        write = "-" if sample.write_rate is None else f"{format_size(sample.write_rate)}/s"
+        if sample.write_source == "dir" and sample.write_rate is not None:
+            write += " (dir)"
+        values = (host, sample.active_state, sample.main_pid or "-",
+                  "-" if sample.cpu_percent is None else f"{sample.cpu_percent:.1f}%",
+                  "-" if sample.memory is None else format_size(sample.memory), write)
+        if self.tree.exists(host):
+            self.tree.item(host, values=values)
+        else:
+            self.tree.insert("", tk.END, iid=host, values=values)
+
+        if self.shown_host is None:
+            self.shown_host = host
+        if host == self.shown_host:
+            self.schedule_redraw()
+
+    def on_select(self, event=None):
+        selection = self.tree.selection()
+        if selection:
+            self.shown_host = selection[0]
+            self.schedule_redraw()
+
+    def schedule_redraw(self):
+        if self._redraw_pending is None:
+            self._redraw_pending = self.canvas.after_idle(self.redraw)
+
+    def redraw(self):
+        """Draw one sparkline per trend for the shown host, scaled to its own maximum"""
+        self._redraw_pending = None
+        self.canvas.delete("all")
+        samples = self.history.get(self.shown_host)
+        if not samples:
+            return
+        width = max(self.canvas.winfo_width(), 100)
+        height = max(self.canvas.winfo_height(), 60)
+        band = height / len(self.TRENDS)
+        label_width = 140
+        step = (width - label_width - 10) / max(1, SERVICE_HISTORY - 1)
+
+        for row, (label, attribute, formatter, color) in enumerate(self.TRENDS):
+            top = row * band + 4
+            bottom = (row + 1) * band - 4
+            values = [getattr(sample, attribute) for sample in samples]
+            known = [value for value in values if value is not None]
+            current = formatter(known[-1]) if known else "-"
+            self.canvas.create_text(6, (top + bottom) / 2, anchor=tk.W, text=f"{label}: {current}")
+            if not known:
+                continue
+            peak = max(known) or 1
+            self.canvas.create_text(width - 6, top, anchor=tk.NE, text=formatter(peak),
+                                    fill="gray", font=("TkDefaultFont", 7))
+            points = []
+            offset = SERVICE_HISTORY - len(values)
+            for index, value in enumerate(values):
+                if value is None:
+                    continue
+                points.extend((label_width + (offset + index) * step,
+                               bottom - (bottom - top) * value / peak))
+            if len(points) >= 4:
+                self.canvas.create_line(*points, fill=color)
+            self.canvas.create_line(label_width, bottom, width - 10, bottom, fill="#dddddd")
+
 
 class RemoteMP4Manager:
+    # Messages handled per pump tick, and the pump's poll interval bounds
+    QUEUE_BATCH_LIMIT = 500
+    POLL_MIN_MS = 20
+    POLL_MAX_MS = 250
+    # Lines kept in the log view; the log file keeps everything, rotated by size
+    LOG_VIEW_LINES = 5000
+    LOG_FILE_BYTES = 5 * 1024 * 1024
+    LOG_FILE_BACKUPS = 3
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Remote MP4 File Manager")
@@ -29,16 +522,43 @@ class RemoteMP4Manager:
         self.local_dir = tk.StringVar(value="./downloaded_videos")
         self.service_name = tk.StringVar(value="screen-recorder.service")
         self.sudo_password = tk.StringVar(value="")  # 新增sudo密码
+        self.throttle_mode = tk.StringVar(value="auto")
+        self.throttle_rate = tk.DoubleVar(value=10.0)
+        self.transport_mode = tk.StringVar(value="auto")
+        self.fleet_hosts = tk.StringVar(value="")
+        self.max_parallel_hosts = tk.IntVar(value=4)
+        self.total_rate = tk.DoubleVar(value=0.0)
+        self.offload_min_free_gb = tk.DoubleVar(value=5.0)
+        self.offload_lead_minutes = tk.DoubleVar(value=15.0)
         
         # GUI state variables
         self.is_connected = tk.BooleanVar(value=False)
         self.operation_in_progress = tk.BooleanVar(value=False)
         
+        # Remote directory watchers, one per host while "Watch for changes" is on
+        self.watchers = []
+        
+        # Recorder health samplers, one per host while "Live monitor" is on
+        self.samplers = []
+        
+        # Disk-pressure offload pipeline while "Auto offload" is on, and the latest status per host
+        self.offload = None
+        self.offload_states = {}
+        
         # Message queue for thread communication
         self.message_queue = queue.Queue()
+        self.poll_interval = self.POLL_MIN_MS
+        
+        # Log lines waiting for the next pump tick, and the full log on disk
+        self.pending_log = []
+        self.pending_status = None
+        self.log_path = os.path.join(os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"),
+                                     "remote-mp4-manager", "manager.log")
+        self.file_log = self.open_log_file()
         
-        # File list data
-        self.file_list_data = []
+        # Remote operations; settings are copied in from the form before each one
+        self.core = MP4Manager(notify=self.message_queue.put, ask_sudo_password=self.prompt_sudo_password)
+        self.thumbnail_loader = ThumbnailLoader(self.core, self.message_queue.put)
         
         self.setup_gui()
         self.check_dependencies()
@@ -101,6 +621,12 @@ class RemoteMP4Manager:
                              foreground="gray", font=("TkDefaultFont", 8))
         help_label.grid(row=4, column=1, sticky=tk.W, padx=(10, 0))
         
+        ttk.Label(conn_frame, text="Fleet Hosts:").grid(row=5, column=0, sticky=tk.W, pady=5)
+        ttk.Entry(conn_frame, textvariable=self.fleet_hosts, width=50).grid(row=5, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        ttk.Label(conn_frame, text="(Optional, comma separated host or user@host; overrides Remote Host)",
+                  foreground="gray", font=("TkDefaultFont", 8)).grid(row=6, column=1, sticky=tk.W, padx=(10, 0))
+        
         # Directory settings
         dir_frame = ttk.LabelFrame(main_frame, text="Directory Settings", padding=15)
         dir_frame.pack(fill=tk.X, pady=(0, 20))
@@ -121,6 +647,53 @@ class RemoteMP4Manager:
         ttk.Label(service_frame, text="Service Name:").grid(row=0, column=0, sticky=tk.W, pady=5)
         ttk.Entry(service_frame, textvariable=self.service_name, width=40).grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=5)
         
+        # Transfer settings
+        transfer_frame = ttk.LabelFrame(main_frame, text="Transfer Settings", padding=15)
+        transfer_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        ttk.Label(transfer_frame, text="Transport:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        ttk.Combobox(transfer_frame, textvariable=self.transport_mode, values=("auto", "sftp", "scp"),
+                     state="readonly", width=10).grid(row=3, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        ttk.Label(transfer_frame, text="Throttle Downloads:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Combobox(transfer_frame, textvariable=self.throttle_mode, values=("auto", "always", "off"),
+                     state="readonly", width=10).grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        ttk.Label(transfer_frame, text="Rate Limit (MB/s):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        ttk.Spinbox(transfer_frame, textvariable=self.throttle_rate, from_=0.5, to=1000, increment=0.5,
+                    width=10).grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        ttk.Label(transfer_frame, text="(auto: throttle only while the service is active; "
+                                       "throttled reads also run at idle I/O priority)",
+                  foreground="gray", font=("TkDefaultFont", 8)).grid(row=2, column=1, sticky=tk.W, padx=(10, 0))
+        
+        ttk.Label(transfer_frame, text="Parallel Hosts:").grid(row=4, column=0, sticky=tk.W, pady=5)
+        ttk.Spinbox(transfer_frame, textvariable=self.max_parallel_hosts, from_=1, to=64, increment=1,
+                    width=10).grid(row=4, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        ttk.Label(transfer_frame, text="Total Rate Limit (MB/s):").grid(row=5, column=0, sticky=tk.W, pady=5)
+        ttk.Spinbox(transfer_frame, textvariable=self.total_rate, from_=0, to=10000, increment=5,
+                    width=10).grid(row=5, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        ttk.Label(transfer_frame, text="(shared by all hosts in fleet mode, 0 = unlimited)",
+                  foreground="gray", font=("TkDefaultFont", 8)).grid(row=6, column=1, sticky=tk.W, padx=(10, 0))
+        
+        # Offload settings
+        offload_frame = ttk.LabelFrame(main_frame, text="Offload Settings", padding=15)
+        offload_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        ttk.Label(offload_frame, text="Minimum Free Space (GB):").grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Spinbox(offload_frame, textvariable=self.offload_min_free_gb, from_=0, to=10000, increment=1,
+                    width=10).grid(row=0, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        ttk.Label(offload_frame, text="Lead Time (minutes):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        ttk.Spinbox(offload_frame, textvariable=self.offload_lead_minutes, from_=1, to=1440, increment=5,
+                    width=10).grid(row=1, column=1, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        ttk.Label(offload_frame, text="(auto offload moves the oldest recordings off a host when it is forecast "
+                                      "to reach the minimum within the lead time)",
+                  foreground="gray", font=("TkDefaultFont", 8)).grid(row=2, column=1, sticky=tk.W, padx=(10, 0))
+        
         # Connection test
         test_frame = ttk.Frame(main_frame)
         test_frame.pack(fill=tk.X, pady=(0, 20))
@@ -150,6 +723,13 @@ class RemoteMP4Manager:
         self.service_status_text = scrolledtext.ScrolledText(status_frame, height=8, width=80)
         self.service_status_text.pack(fill=tk.BOTH, expand=True)
         
+        # Target hosts for fleet mode
+        hosts_frame = ttk.LabelFrame(main_frame, text="Target Hosts (none selected = all connected)", padding=15)
+        hosts_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        self.service_hosts_list = tk.Listbox(hosts_frame, selectmode=tk.EXTENDED, height=4, exportselection=False)
+        self.service_hosts_list.pack(fill=tk.X)
+        
         # Service control buttons
         control_frame = ttk.Frame(main_frame)
         control_frame.pack(fill=tk.X, pady=(0, 20))
@@ -159,6 +739,17 @@ class RemoteMP4Manager:
         ttk.Button(control_frame, text="Stop Service", command=self.stop_service).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(control_frame, text="Restart Service", command=self.restart_service).pack(side=tk.LEFT)
         
+        # Live recorder health
+        health_frame = ttk.LabelFrame(main_frame, text="Recorder Health", padding=15)
+        health_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.monitor_enabled = tk.BooleanVar(value=False)
+        ttk.Checkbutton(health_frame, text="Live monitor", variable=self.monitor_enabled,
+                        command=self.toggle_monitor).pack(anchor=tk.W, pady=(0, 10))
+        
+        self.health_panel = HealthPanel(health_frame)
+        self.health_panel.pack()
+        
     def setup_files_tab(self, parent):
         """Setup file management tab"""
         main_frame = ttk.Frame(parent)
@@ -168,24 +759,19 @@ class RemoteMP4Manager:
         list_frame = ttk.LabelFrame(main_frame, text="Remote MP4 Files", padding=15)
         list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
         
-        # Treeview for file list
-        columns = ("filename", "size", "date")
-        self.file_tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=15)
-        
-        self.file_tree.heading("filename", text="Filename")
-        self.file_tree.heading("size", text="Size")
-        self.file_tree.heading("date", text="Date Modified")
-        
-        self.file_tree.column("filename", width=400)
-        self.file_tree.column("size", width=100)
-        self.file_tree.column("date", width=200)
-        
-        # Scrollbar for treeview
-        tree_scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.file_tree.yview)
-        self.file_tree.configure(yscrollcommand=tree_scroll.set)
-        
-        self.file_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        # Filter entry
+        filter_frame = ttk.Frame(list_frame)
+        filter_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 10))
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.file_view.set_filter(self.filter_var.get()))
+        ttk.Entry(filter_frame, textvariable=self.filter_var, width=30).pack(side=tk.LEFT, padx=(10, 0))
+
+        # Virtualized treeview for file list
+        self.file_view = VirtualFileList(list_frame, height=15)
+        self.file_view.on_thumbnails_needed = lambda records: self.thumbnail_loader.request(records)
+        self.file_tree = self.file_view.tree
+        self.file_view.pack()
         
         # File operations frame
         ops_frame = ttk.Frame(main_frame)
@@ -194,7 +780,36 @@ class RemoteMP4Manager:
         ttk.Button(ops_frame, text="Refresh List", command=self.refresh_file_list).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(ops_frame, text="Download Selected", command=self.download_selected).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(ops_frame, text="Download All", command=self.download_all).pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Button(ops_frame, text="Delete Selected", command=self.delete_selected).pack(side=tk.LEFT)
+        ttk.Button(ops_frame, text="Sync New", command=self.sync_files).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(ops_frame, text="Delete Selected", command=self.delete_selected).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(ops_frame, text="Read Media Info", command=self.read_media_info).pack(side=tk.LEFT)
+        
+        self.watch_enabled = tk.BooleanVar(value=False)
+        ttk.Checkbutton(ops_frame, text="Watch for changes", variable=self.watch_enabled,
+                        command=self.toggle_watch).pack(side=tk.RIGHT)
+        
+        # Transfer options
+        options_frame = ttk.Frame(main_frame)
+        options_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.verify_transfers = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Verify checksums",
+                        variable=self.verify_transfers).pack(side=tk.LEFT, padx=(0, 20))
+        
+        self.delete_after_sync = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Delete remote after verified sync",
+                        variable=self.delete_after_sync).pack(side=tk.LEFT, padx=(0, 20))
+        
+        self.show_previews = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Show previews", variable=self.show_previews,
+                        command=self.toggle_previews).pack(side=tk.LEFT, padx=(0, 20))
+        
+        self.offload_enabled = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Auto offload", variable=self.offload_enabled,
+                        command=self.toggle_offload).pack(side=tk.LEFT)
+        
+        self.offload_label = ttk.Label(options_frame, text="", foreground="gray")
+        self.offload_label.pack(side=tk.LEFT, padx=(10, 0))
         
         # Progress frame
         progress_frame = ttk.Frame(main_frame)
@@ -240,17 +855,46 @@ class RemoteMP4Manager:
         
         ttk.Label(self.status_bar, text="Connection:").pack(side=tk.RIGHT)
         
+    def open_log_file(self):
+        """Return a logger writing to the rotating log file, or None if it cannot be created"""
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(self.log_path, maxBytes=self.LOG_FILE_BYTES,
+                                                           backupCount=self.LOG_FILE_BACKUPS, encoding="utf-8")
+        except OSError:
+            return None
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger("remote_mp4_manager")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        return logger
+        
     def log_message(self, message, level="INFO"):
-        """Add message to log"""
+        """Add message to log (shown at the next pump tick)"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {level}: {message}\n"
-        
-        self.log_text.insert(tk.END, log_entry)
-        self.log_text.see(tk.END)
+        self.pending_log.append(f"[{timestamp}] {level}: {message}\n")
         
         # Also update status bar for important messages
         if level in ["ERROR", "SUCCESS"]:
-            self.status_label.config(text=message)
+            self.pending_status = message
+            
+    def flush_log(self):
+        """Append pending log lines to the log view and file, trimming the view to LOG_VIEW_LINES"""
+        if self.pending_log:
+            text = "".join(self.pending_log)
+            self.pending_log = []
+            if self.file_log:
+                self.file_log.info(text.rstrip("\n"))
+            self.log_text.insert(tk.END, text)
+            lines = int(self.log_text.index("end-1c").split(".")[0])
+            if lines > self.LOG_VIEW_LINES:
+                self.log_text.delete("1.0", f"{lines - self.LOG_VIEW_LINES}.0")
+            self.log_text.see(tk.END)
+            
+        if self.pending_status is not None:
+            self.status_label.config(text=self.pending_status)
+            self.pending_status = None
             
     def check_dependencies(self):
         """Check if required dependencies are installed"""
@@ -264,33 +908,16 @@ class RemoteMP4Manager:
                                "Please install it with:\n"
                                "sudo apt-get install sshpass")
             
-    def execute_remote_command(self, command, use_sudo=False):
-        """Execute command on remote host"""
-        if use_sudo and self.sudo_password.get():
-            # Use echo to pipe password to sudo -S
-            command = f"echo '{self.sudo_password.get()}' | sudo -S {command}"
-        elif use_sudo:
-            # Ask for sudo password if not set
-            password = self.prompt_sudo_password()
-            if not password:
-                return False, "", "Sudo password required"
-            command = f"echo '{password}' | sudo -S {command}"
-            
-        cmd = [
-            "sshpass", "-p", self.remote_password.get(),
-            "ssh", "-o", "StrictHostKeyChecking=no",
-            f"{self.remote_user.get()}@{self.remote_host.get()}",
-            command
-        ]
+    def apply_settings(self):
+        """Copy the form settings into the core manager before an operation"""
+        settings = {}
+        for name, default in MP4Manager.DEFAULTS.items():
+            try:
+                settings[name] = getattr(self, name).get()
+            except (tk.TclError, ValueError):
+                settings[name] = default
+        self.core.configure(**settings)
         
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            return result.returncode == 0, result.stdout, result.stderr
-        except subprocess.TimeoutExpired:
-            return False, "", "Command timed out"
-        except Exception as e:
-            return False, "", str(e)
-            
     def prompt_sudo_password(self):
         """Prompt user for sudo password"""
         password = simpledialog.askstring("Sudo Password", 
@@ -298,26 +925,26 @@ class RemoteMP4Manager:
                                          show='*')
         if password:
             self.sudo_password.set(password)
+            self.core.sudo_password = password
         return password
         
     def test_connection(self):
-        """Test SSH connection to remote host"""
+        """Test SSH connection to every configured host at the same time"""
         if self.operation_in_progress.get():
             return
             
         self.operation_in_progress.set(True)
         self.test_button.config(state="disabled")
+        self.apply_settings()
         
         def test_thread():
-            self.log_message("Testing SSH connection...")
-            success, stdout, stderr = self.execute_remote_command("echo 'Connection test successful'")
-            
-            self.message_queue.put(("connection_test", success, stdout, stderr))
+            results = self.core.test_connection()
+            self.message_queue.put(("connection_test", results))
             
         threading.Thread(target=test_thread, daemon=True).start()
         
     def test_sudo(self):
-        """Test sudo access on remote host"""
+        """Test sudo access on the connected hosts"""
         if not self.is_connected.get():
             messagebox.showwarning("Not Connected", "Please test SSH connection first")
             return
@@ -332,17 +959,52 @@ class RemoteMP4Manager:
                 
         self.operation_in_progress.set(True)
         self.sudo_test_button.config(state="disabled")
+        self.apply_settings()
         
         def sudo_test_thread():
-            self.log_message("Testing sudo access...")
-            success, stdout, stderr = self.execute_remote_command("whoami", use_sudo=True)
-            
-            self.message_queue.put(("sudo_test", success, stdout, stderr))
+            results = self.core.test_sudo()
+            self.message_queue.put(("sudo_test", results))
             
         threading.Thread(target=sudo_test_thread, daemon=True).start()
         
+    def selected_service_hosts(self):
+        """Hosts selected in the Service Management tab, or all connected hosts"""
+        selection = [self.service_hosts_list.get(i) for i in self.service_hosts_list.curselection()]
+        return selection or self.core.target_hosts()
+        
+    def update_service_hosts(self):
+        """Refill the service host list with the connected hosts"""
+        self.service_hosts_list.delete(0, tk.END)
+        for host in self.core.target_hosts():
+            self.service_hosts_list.insert(tk.END, host)
+            
+    def toggle_monitor(self):
+        """Start or stop streaming recorder health samples from the selected hosts"""
+        if self.samplers:
+            for sampler in self.samplers:
+                sampler.stop()
+            self.samplers = []
+            self.log_message("Stopped service monitor")
+            
+        if not self.monitor_enabled.get():
+            return
+            
+        if not self.is_connected.get():
+            messagebox.showwarning("Not Connected", "Please test connection first")
+            self.monitor_enabled.set(False)
+            return
+            
+        self.apply_settings()
+        self.health_panel.clear()
+        for host in self.selected_service_hosts():
+            sampler = ServiceSampler(lambda host=host: self.core.get_transport(host), self.service_name.get(),
+                                     self.remote_dir.get(), self.message_queue.put, host)
+            sampler.start()
+            self.samplers.append(sampler)
+        self.log_message(f"Monitoring {self.service_name.get()} on {len(self.samplers)} host(s)")
+        
     def check_service_status(self):
-        """Check screen recorder service status"""
+        """Check screen recorder service status on the selected hosts"""
         if not self.is_connected.get():
             messagebox.showwarning("Not Connected", "Please test connection first")
             return
@@ -351,18 +1013,17 @@ class RemoteMP4Manager:
             return
             
         self.operation_in_progress.set(True)
+        self.apply_settings()
+        hosts = self.selected_service_hosts()
         
         def status_thread():
-            self.log_message("Checking service status...")
-            service = self.service_name.get()
-            success, stdout, stderr = self.execute_remote_command(f"systemctl status {service}")
-            
-            self.message_queue.put(("service_status", success, stdout, stderr))
+            results = self.core.service_status(hosts)
+            self.message_queue.put(("service_status", results))
             
         threading.Thread(target=status_thread, daemon=True).start()
         
-    def enable_service(self):
-        """Enable and start the screen recorder service"""
+    def run_service_action(self, msg_type, prompt, actions):
+        """Run systemctl actions on the selected hosts at the same time"""
         if not self.is_connected.get():
             messagebox.showwarning("Not Connected", "Please test connection first")
             return
@@ -370,72 +1031,134 @@ class RemoteMP4Manager:
         if self.operation_in_progress.get():
             return
             
-        result = messagebox.askyesno("Confirm", "Enable and start the screen recorder service?")
+        hosts = self.selected_service_hosts()
+        if len(hosts) > 1:
+            prompt += f"\n\nHosts: {', '.join(hosts)}"
+        result = messagebox.askyesno("Confirm", prompt)
         if not result:
             return
             
+        # Ask once here rather than from every worker thread
+        if not self.sudo_password.get() and not self.prompt_sudo_password():
+            return
+            
         self.operation_in_progress.set(True)
+        self.apply_settings()
         
-        def enable_thread():
-            service = self.service_name.get()
-            self.log_message(f"Enabling service {service}...")
+        def action_thread():
+            results = self.core.service_action(actions, hosts)
+            self.message_queue.put((msg_type, all(result[0] for result in results.values()),
+                                    combine_host_output(results, 1),
+                                    combine_host_output(results, 2)))
             
-            # Enable service
-            success1, stdout1, stderr1 = self.execute_remote_command(f"systemctl enable {service}", use_sudo=True)
-            
-            # Start service
-            success2, stdout2, stderr2 = self.execute_remote_command(f"systemctl start {service}", use_sudo=True)
-            
-            self.message_queue.put(("service_enable", success1 and success2, 
-                                  f"Enable: {stdout1}\nStart: {stdout2}", 
-                                  f"Enable: {stderr1}\nStart: {stderr2}"))
-            
-        threading.Thread(target=enable_thread, daemon=True).start()
+        threading.Thread(target=action_thread, daemon=True).start()
+        
+    def enable_service(self):
+        """Enable and start the screen recorder service"""
+        self.run_service_action("service_enable", "Enable and start the screen recorder service?",
+                                ["enable", "start"])
         
     def stop_service(self):
         """Stop the screen recorder service"""
+        self.run_service_action("service_stop", "Stop the screen recorder service?", ["stop"])
+        
+    def restart_service(self):
+        """Restart the screen recorder service"""
+        self.run_service_action("service_restart", "Restart the screen recorder service?", ["restart"])
+        
+    def refresh_file_list(self):
+        """Refresh the remote MP4 file list from every connected host"""
         if not self.is_connected.get():
             messagebox.showwarning("Not Connected", "Please test connection first")
             return
             
-        result = messagebox.askyesno("Confirm", "Stop the screen recorder service?")
-        if not result:
+        if self.operation_in_progress.get():
             return
             
         self.operation_in_progress.set(True)
+        self.apply_settings()
         
-        def stop_thread():
-            service = self.service_name.get()
-            self.log_message(f"Stopping service {service}...")
-            success, stdout, stderr = self.execute_remote_command(f"systemctl stop {service}", use_sudo=True)
-            
-            self.message_queue.put(("service_stop", success, stdout, stderr))
+        def refresh_thread():
+            # Parsed in the worker so the Tk thread only receives compact records
+            success, records, errors = self.core.list_files()
+            self.core.attach_cached_media(records)
+            self.message_queue.put(("file_list", success, records, errors))
             
-        threading.Thread(target=stop_thread, daemon=True).start()
+        threading.Thread(target=refresh_thread, daemon=True).start()
         
-    def restart_service(self):
-        """Restart the screen recorder service"""
+    def toggle_watch(self):
+        """Start or stop streaming remote directory changes into the file list"""
+        if self.watchers:
+            for watcher in self.watchers:
+                watcher.stop()
+            self.watchers = []
+            self.log_message("Stopped watching remote directory")
+            
+        if not self.watch_enabled.get():
+            return
+            
         if not self.is_connected.get():
             messagebox.showwarning("Not Connected", "Please test connection first")
+            self.watch_enabled.set(False)
             return
             
-        result = messagebox.askyesno("Confirm", "Restart the screen recorder service?")
-        if not result:
+        self.apply_settings()
+        for host in self.core.target_hosts():
+            watcher = RemoteWatcher(lambda host=host: self.core.get_transport(host), self.remote_dir.get(),
+                                    self.message_queue.put, host)
+            watcher.start()
+            self.watchers.append(watcher)
+        
+        # Load the full listing once; the watchers only send changes after that
+        self.refresh_file_list()
+        
+    def toggle_offload(self):
+        """Start or stop offloading the oldest recordings from hosts that are running out of space"""
+        if self.offload:
+            self.offload.stop()
+            self.offload = None
+            self.offload_states = {}
+            self.offload_label.config(text="")
+            self.log_message("Stopped auto offload")
+            
+        if not self.offload_enabled.get():
             return
             
-        self.operation_in_progress.set(True)
-        
-        def restart_thread():
-            service = self.service_name.get()
-            self.log_message(f"Restarting service {service}...")
-            success, stdout, stderr = self.execute_remote_command(f"systemctl restart {service}", use_sudo=True)
+        if not self.is_connected.get():
+            messagebox.showwarning("Not Connected", "Please test connection first")
+            self.offload_enabled.set(False)
+            return
             
-            self.message_queue.put(("service_restart", success, stdout, stderr))
+        self.apply_settings()
+        self.offload = OffloadPipeline(self.core)
+        self.offload.start()
+        self.log_message(f"Auto offload started, keeping {self.core.offload_min_free_gb} GB free")
+        
+    def update_offload_label(self):
+        """Show the host with the least free space and its forecast"""
+        host, status = min(self.offload_states.items(), key=lambda item: item[1]["free"])
+        text = f"{host}: {format_size(status['free'])} free"
+        if status["offloading"]:
+            text += ", offloading"
+        elif status["seconds_to_threshold"] is not None:
+            text += f", limit in {status['seconds_to_threshold'] / 60:.0f} min"
+        self.offload_label.config(text=text)
+        
+    def toggle_previews(self):
+        """Show or hide keyframe thumbnails for the visible rows (needs ffmpeg on the remote host)"""
+        if self.show_previews.get() and not self.is_connected.get():
+            messagebox.showwarning("Not Connected", "Please test connection first")
+            self.show_previews.set(False)
+            return
             
-        threading.Thread(target=restart_thread, daemon=True).start()
+        if self.show_previews.get():
+            self.apply_settings()
+        else:
+            self.thumbnail_loader.request([])
+        self.file_view.set_previews(self.show_previews.get())
         
-    def refresh_file_list(self):
-        """Refresh the remote MP4 file list"""
+    def read_media_info(self):
+        """Read duration, resolution, codec and bitrate from the headers of the selected (or all) files"""
         if not self.is_connected.get():
             messagebox.showwarning("Not Connected", "Please test connection first")
             return
@@ -443,39 +1166,77 @@ class RemoteMP4Manager:
         if self.operation_in_progress.get():
             return
             
+        records = self.file_view.selected_records() or list(self.file_view.records)
+        if not records:
+            messagebox.showwarning("No Files", "No files to read")
+            return
+            
         self.operation_in_progress.set(True)
+        self.apply_settings()
         
-        def refresh_thread():
-            self.log_message("Refreshing file list...")
-            remote_dir = self.remote_dir.get()
-            command = f"find '{remote_dir}' -maxdepth 1 -name '*.mp4' -type f -exec ls -lh {{}} \\; 2>/dev/null"
-            success, stdout, stderr = self.execute_remote_command(command)
-            
-            self.message_queue.put(("file_list", success, stdout, stderr))
+        def media_thread():
+            probed = self.core.probe_media(records)
+            self.message_queue.put(("media_complete", probed, len(records)))
             
-        threading.Thread(target=refresh_thread, daemon=True).start()
+        threading.Thread(target=media_thread, daemon=True).start()
         
     def download_selected(self):
         """Download selected files"""
-        selected_items = self.file_tree.selection()
-        if not selected_items:
+        records = self.file_view.selected_records()
+        if not records:
             messagebox.showwarning("No Selection", "Please select files to download")
             return
             
-        self.download_files([self.file_tree.item(item)["values"][0] for item in selected_items])
+        self.download_files(records)
         
     def download_all(self):
         """Download all files"""
-        if not self.file_list_data:
+        if not len(self.file_view):
             messagebox.showwarning("No Files", "No files to download")
             return
             
-        result = messagebox.askyesno("Confirm", f"Download all {len(self.file_list_data)} files?")
+        result = messagebox.askyesno("Confirm", f"Download all {len(self.file_view)} files?")
         if result:
-            self.download_files([file_data["filename"] for file_data in self.file_list_data])
+            self.download_files(list(self.file_view.records))
+            
+    def sync_files(self):
+        """Download only files that are new or changed since the last download"""
+        if not len(self.file_view):
+            messagebox.showwarning("No Files", "No files to sync")
+            return
+            
+        if self.operation_in_progress.get():
+            return
+            
+        self.operation_in_progress.set(True)
+        self.apply_settings()
+        records = list(self.file_view.records)
+        delete_after = self.delete_after_sync.get()
+        
+        def pending_thread():
+            # Checking the local copies stats every file, so it stays off the Tk thread
+            pending = self.core.pending_sync(records)
+            self.message_queue.put(("sync_pending", pending, len(records), delete_after))
+            
+        threading.Thread(target=pending_thread, daemon=True).start()
+        
+    def confirm_sync(self, pending, total, delete_after):
+        """Ask before downloading the records found by sync_files"""
+        skipped = total - len(pending)
+        if not pending:
+            self.log_message(f"Sync: all {skipped} files already downloaded", "SUCCESS")
+            messagebox.showinfo("Sync", "All remote files are already downloaded")
+            return
+            
+        prompt = f"Download {len(pending)} new or changed files ({skipped} already up to date)?"
+        if delete_after:
+            prompt += "\n\nRemote copies will be deleted once their checksums are verified."
+        if messagebox.askyesno("Confirm Sync", prompt):
+            self.log_message(f"Sync: {len(pending)} to download, {skipped} up to date")
+            self.download_files(pending, delete_after=delete_after)
             
-    def download_files(self, filenames):
-        """Download specified files"""
+    def download_files(self, records, delete_after=False):
+        """Download the given records in the background (see MP4Manager.download)"""
         if not self.is_connected.get():
             messagebox.showwarning("Not Connected", "Please test connection first")
             return
@@ -483,58 +1244,26 @@ class RemoteMP4Manager:
         if self.operation_in_progress.get():
             return
             
-        # Create local directory
-        local_dir = self.local_dir.get()
-        os.makedirs(local_dir, exist_ok=True)
-        
         self.operation_in_progress.set(True)
         self.progress_var.set(0)
+        self.apply_settings()
         
         def download_thread():
-            total_files = len(filenames)
-            downloaded = 0
-            failed = 0
-            
-            for i, filename in enumerate(filenames):
-                self.message_queue.put(("progress_update", (i / total_files) * 100, f"Downloading {filename}..."))
-                
-                remote_path = f"{self.remote_dir.get()}/{filename}"
-                local_path = os.path.join(local_dir, filename)
-                
-                cmd = [
-                    "sshpass", "-p", self.remote_password.get(),
-                    "scp", "-o", "StrictHostKeyChecking=no",
-                    f"{self.remote_user.get()}@{self.remote_host.get()}:{remote_path}",
-                    local_path
-                ]
-                
-                try:
-                    result = subprocess.run(cmd, capture_output=True, timeout=300)
-                    if result.returncode == 0:
-                        downloaded += 1
-                        self.message_queue.put(("log", f"Downloaded: {filename}", "SUCCESS"))
-                    else:
-                        failed += 1
-                        self.message_queue.put(("log", f"Failed to download: {filename}", "ERROR"))
-                except Exception as e:
-                    failed += 1
-                    self.message_queue.put(("log", f"Error downloading {filename}: {str(e)}", "ERROR"))
-                    
-            self.message_queue.put(("download_complete", downloaded, failed, total_files))
+            stats = self.core.download(records, delete_after=delete_after)
+            self.message_queue.put(("download_complete", stats["downloaded"], stats["failed"], stats["total"],
+                                    stats["bytes"], stats["seconds"]))
             
         threading.Thread(target=download_thread, daemon=True).start()
         
     def delete_selected(self):
         """Delete selected remote files"""
-        selected_items = self.file_tree.selection()
-        if not selected_items:
+        records = self.file_view.selected_records()
+        if not records:
             messagebox.showwarning("No Selection", "Please select files to delete")
             return
-            
-        filenames = [self.file_tree.item(item)["values"][0] for item in selected_items]
         
         result = messagebox.askyesno("Confirm Deletion", 
-                                   f"Delete {len(filenames)} selected file(s) from remote host?\n\n"
+                                   f"Delete {len(records)} selected file(s) from remote host?\n\n"
                                    "This action cannot be undone!")
         if not result:
             return
@@ -543,23 +1272,12 @@ class RemoteMP4Manager:
             return
             
         self.operation_in_progress.set(True)
+        self.apply_settings()
         
         def delete_thread():
-            deleted = 0
-            failed = 0
-            
-            for filename in filenames:
-                remote_path = f"{self.remote_dir.get()}/{filename}"
-                success, stdout, stderr = self.execute_remote_command(f"rm '{remote_path}'")
-                
-                if success:
-                    deleted += 1
-                    self.message_queue.put(("log", f"Deleted: {filename}", "SUCCESS"))
-                else:
-                    failed += 1
-                    self.message_queue.put(("log", f"Failed to delete: {filename}", "ERROR"))
-                    
-            self.message_queue.put(("delete_complete", deleted, failed))
+            results = self.core.delete(records)
+            self.message_queue.put(("delete_complete", sum(len(deleted) for deleted, _ in results.values()),
+                                    sum(len(failed) for _, failed in results.values())))
             
         threading.Thread(target=delete_thread, daemon=True).start()
         
@@ -570,7 +1288,8 @@ class RemoteMP4Manager:
             self.local_dir.set(directory)
             
     def clear_logs(self):
-        """Clear the log text area"""
+        """Clear the log text area (the log file is kept)"""
+        self.pending_log = []
         self.log_text.delete(1.0, tk.END)
         
     def save_logs(self):
@@ -588,138 +1307,220 @@ class RemoteMP4Manager:
                 messagebox.showerror("Error", f"Failed to save logs: {str(e)}")
                 
     def process_queue(self):
-        """Process messages from worker threads"""
+        """Handle worker messages in batches, then reschedule at an adaptive interval
+
+        Up to QUEUE_BATCH_LIMIT messages are taken per tick. Progress updates
+        and offload status are coalesced so only the latest is shown, a file
+        list makes earlier lists and file events in the same batch moot, and
+        log lines reach the log view in a single insert. The pump polls every
+        POLL_MIN_MS while messages keep arriving and backs off to POLL_MAX_MS
+        when the queue is idle.
+        """
+        batch = []
+        try:
+            while len(batch) < self.QUEUE_BATCH_LIMIT:
+                batch.append(self.message_queue.get_nowait())
+        except queue.Empty:
+            pass
+            
         try:
-            while True:
-                message = self.message_queue.get_nowait()
+            last_list = max((index for index, message in enumerate(batch) if message[0] == "file_list"), default=-1)
+            # Coalesced messages are applied where their latest one sits in the
+            # batch, so a completion message that follows still has the last word
+            latest = {}
+            for index, message in enumerate(batch):
+                key = self.coalesce_key(message)
+                if key is not None:
+                    latest[key] = index
+            for index, message in enumerate(batch):
                 msg_type = message[0]
-                
-                if msg_type == "connection_test":
-                    success, stdout, stderr = message[1], message[2], message[3]
-                    self.operation_in_progress.set(False)
-                    self.test_button.config(state="normal")
-                    
-                    if success:
-                        self.is_connected.set(True)
-                        self.connection_status.config(text="Connected", foreground="green")
-                        self.conn_indicator.config(foreground="green")
-                        self.log_message("SSH connection successful", "SUCCESS")
-                    else:
-                        self.is_connected.set(False)
-                        self.connection_status.config(text="Connection failed", foreground="red")
-                        self.conn_indicator.config(foreground="red")
-                        self.log_message(f"SSH connection failed: {stderr}", "ERROR")
-                        
-                elif msg_type == "sudo_test":
-                    success, stdout, stderr = message[1], message[2], message[3]
-                    self.operation_in_progress.set(False)
-                    self.sudo_test_button.config(state="normal")
-                    
-                    if success:
-                        self.sudo_status.config(text="Sudo OK", foreground="green")
-                        self.log_message("Sudo access verified", "SUCCESS")
-                    else:
-                        self.sudo_status.config(text="Sudo failed", foreground="red")
-                        self.log_message(f"Sudo access failed: {stderr}", "ERROR")
-                        # Clear stored password if it failed
-                        if "incorrect password" in stderr.lower():
-                            self.sudo_password.set("")
-                        
-                elif msg_type == "service_status":
-                    success, stdout, stderr = message[1], message[2], message[3]
-                    self.operation_in_progress.set(False)
-                                        
-                    self.service_status_text.delete(1.0, tk.END)
-                    if success:
-                        self.service_status_text.insert(tk.END, stdout)
-                        self.log_message("Service status retrieved", "SUCCESS")
-                    else:
-                        self.service_status_text.insert(tk.END, f"Error: {stderr}")
-                        self.log_message(f"Failed to get service status: {stderr}", "ERROR")
-                        
-                elif msg_type in ["service_enable", "service_stop", "service_restart"]:
-                    success, stdout, stderr = message[1], message[2], message[3]
-                    self.operation_in_progress.set(False)
-                    
-                    if success:
-                        self.log_message(f"Service operation completed successfully", "SUCCESS")
-                        # Refresh service status
-                        self.check_service_status()
-                    else:
-                        self.log_message(f"Service operation failed: {stderr}", "ERROR")
-                        
-                elif msg_type == "file_list":
-                    success, stdout, stderr = message[1], message[2], message[3]
-                    self.operation_in_progress.set(False)
-                    
-                    # Clear existing items
-                    for item in self.file_tree.get_children():
-                        self.file_tree.delete(item)
-                    self.file_list_data.clear()
-                    
-                    if success and stdout.strip():
-                        lines = stdout.strip().split('\n')
-                        for line in lines:
-                            if line.strip():
-                                parts = line.split()
-                                if len(parts) >= 9:
-                                    filename = os.path.basename(parts[-1])
-                                    size = parts[4]
-                                    date = f"{parts[5]} {parts[6]} {parts[7]}"
-                                    
-                                    self.file_tree.insert("", tk.END, values=(filename, size, date))
-                                    self.file_list_data.append({
-                                        "filename": filename,
-                                        "size": size,
-                                        "date": date,
-                                        "full_path": parts[-1]
-                                    })
-                        
-                        self.log_message(f"Found {len(self.file_list_data)} MP4 files", "SUCCESS")
-                    else:
-                        self.log_message("No MP4 files found", "INFO")
-                        
-                elif msg_type == "progress_update":
-                    progress, status = message[1], message[2]
-                    self.progress_var.set(progress)
-                    self.progress_label.config(text=status)
-                    
-                elif msg_type == "download_complete":
-                    downloaded, failed, total = message[1], message[2], message[3]
-                    self.operation_in_progress.set(False)
-                    self.progress_var.set(100)
-                    self.progress_label.config(text=f"Download complete: {downloaded}/{total} successful")
-                    
-                    messagebox.showinfo("Download Complete", 
-                                      f"Download completed!\n\n"
-                                      f"Successfully downloaded: {downloaded}\n"
-                                      f"Failed: {failed}\n"
-                                      f"Total: {total}")
-                    
-                    # Refresh file list
-                    self.refresh_file_list()
-                    
-                elif msg_type == "delete_complete":
-                    deleted, failed = message[1], message[2]
-                    self.operation_in_progress.set(False)
-                    
-                    messagebox.showinfo("Delete Complete", 
-                                      f"Delete completed!\n\n"
-                                      f"Successfully deleted: {deleted}\n"
-                                      f"Failed: {failed}")
-                    
-                    # Refresh file list
-                    self.refresh_file_list()
-                    
-                elif msg_type == "log":
-                    message_text, level = message[1], message[2]
-                    self.log_message(message_text, level)
+                if msg_type in ("file_list", "file_event") and index < last_list:
+                    continue
+                key = self.coalesce_key(message)
+                if key is not None and latest[key] != index:
+                    continue
+                self.handle_message(message)
+            self.flush_log()
+        finally:
+            if batch:
+                self.poll_interval = self.POLL_MIN_MS
+            else:
+                self.poll_interval = min(self.POLL_MAX_MS, self.poll_interval * 2)
+            self.root.after(self.poll_interval, self.process_queue)
+            
+    @staticmethod
+    def coalesce_key(message):
+        """Return the key under which only the latest such message matters, or None"""
+        if message[0] == "progress_update":
+            return message[0]
+        if message[0] == "offload_status":
+            return message[0], message[1]
+        return None
+        
+    def handle_message(self, message):
+        """Apply one message from a worker thread to the UI"""
+        msg_type = message[0]
+        
+        if msg_type == "connection_test":
+            results = message[1]
+            self.operation_in_progress.set(False)
+            self.test_button.config(state="normal")
+            
+            connected = self.core.connected_hosts
+            self.update_service_hosts()
+            self.file_view.set_show_host(len(results) > 1)
+            for host, (success, stdout, stderr) in results.items():
+                if not success:
+                    self.log_message(f"SSH connection to {host} failed: {stderr}", "ERROR")
                     
-        except queue.Empty:
-          pass
-          
-        # Schedule next check
-        self.root.after(100, self.process_queue)
+            if connected:
+                complete = len(connected) == len(results)
+                text = "Connected" if len(results) == 1 else f"Connected ({len(connected)}/{len(results)} hosts)"
+                self.is_connected.set(True)
+                self.connection_status.config(text=text, foreground="green" if complete else "orange")
+                self.conn_indicator.config(foreground="green" if complete else "orange")
+                self.log_message(f"SSH connection successful: {', '.join(connected)}", "SUCCESS")
+            else:
+                self.is_connected.set(False)
+                self.connection_status.config(text="Connection failed", foreground="red")
+                self.conn_indicator.config(foreground="red")
+                
+        elif msg_type == "sudo_test":
+            results = message[1]
+            self.operation_in_progress.set(False)
+            self.sudo_test_button.config(state="normal")
+            
+            failed = {host: stderr for host, (success, _, stderr) in results.items() if not success}
+            if not failed:
+                self.sudo_status.config(text="Sudo OK", foreground="green")
+                self.log_message("Sudo access verified", "SUCCESS")
+            else:
+                self.sudo_status.config(text="Sudo failed", foreground="red")
+                for host, stderr in failed.items():
+                    self.log_message(f"Sudo access failed on {host}: {stderr}", "ERROR")
+                # Clear stored password if it failed
+                if any("incorrect password" in stderr.lower() for stderr in failed.values()):
+                    self.sudo_password.set("")
+                
+        elif msg_type == "service_status":
+            results = message[1]
+            self.operation_in_progress.set(False)
+                                
+            self.service_status_text.delete(1.0, tk.END)
+            for host, (success, stdout, stderr) in results.items():
+                if len(results) > 1:
+                    self.service_status_text.insert(tk.END, f"=== {host} ===\n")
+                if success:
+                    self.service_status_text.insert(tk.END, stdout)
+                    self.log_message(f"Service status retrieved from {host}", "SUCCESS")
+                else:
+                    self.service_status_text.insert(tk.END, f"Error: {stderr}\n")
+                    self.log_message(f"Failed to get service status from {host}: {stderr}", "ERROR")
+                
+        elif msg_type == "service_sample":
+            host, sample = message[1], message[2]
+            if self.samplers:
+                # Keeps the auto throttle decision current between downloads
+                self.core.service_states[host] = sample.active_state == "active"
+                self.health_panel.add(host, sample)
+                
+        elif msg_type in ["service_enable", "service_stop", "service_restart"]:
+            success, stdout, stderr = message[1], message[2], message[3]
+            self.operation_in_progress.set(False)
+            
+            if success:
+                self.log_message(f"Service operation completed successfully", "SUCCESS")
+                # Refresh service status
+                self.check_service_status()
+            else:
+                self.log_message(f"Service operation failed: {stderr}", "ERROR")
+                
+        elif msg_type == "file_list":
+            success, records, stderr = message[1], message[2], message[3]
+            self.operation_in_progress.set(False)
+            
+            if stderr:
+                self.log_message(f"File list failed: {stderr}", "ERROR")
+            if success and records:
+                self.file_view.load(records)
+                self.log_message(f"Found {len(records)} MP4 files", "SUCCESS")
+            else:
+                self.file_view.clear()
+                self.log_message("No MP4 files found", "INFO")
+                
+        elif msg_type == "progress_update":
+            progress, status = message[1], message[2]
+            self.progress_var.set(progress)
+            self.progress_label.config(text=status)
+            
+        elif msg_type == "sync_pending":
+            self.operation_in_progress.set(False)
+            self.confirm_sync(message[1], message[2], message[3])
+            
+        elif msg_type == "download_complete":
+            downloaded, failed, total, num_bytes, seconds = message[1:6]
+            self.operation_in_progress.set(False)
+            self.progress_var.set(100)
+            rate = num_bytes / seconds / 1e6 if seconds else 0
+            self.progress_label.config(text=f"Download complete: {downloaded}/{total} successful, "
+                                            f"{format_size(num_bytes)} in {seconds:.0f}s ({rate:.1f} MB/s)")
+            
+            messagebox.showinfo("Download Complete", 
+                              f"Download completed!\n\n"
+                              f"Successfully downloaded: {downloaded}\n"
+                              f"Failed: {failed}\n"
+                              f"Total: {total}")
+            
+            # Refresh file list
+            self.refresh_file_list()
+            
+        elif msg_type == "delete_complete":
+            deleted, failed = message[1], message[2]
+            self.operation_in_progress.set(False)
+            
+            messagebox.showinfo("Delete Complete", 
+                              f"Delete completed!\n\n"
+                              f"Successfully deleted: {deleted}\n"
+                              f"Failed: {failed}")
+            
+            # Refresh file list
+            self.refresh_file_list()
+            
+        elif msg_type == "thumbnail":
+            self.file_view.add_thumbnail(message[1], message[2])
+            
+        elif msg_type == "media_info":
+            self.file_view.set_media(message[1], message[2])
+            
+        elif msg_type == "media_complete":
+            probed, total = message[1], message[2]
+            self.operation_in_progress.set(False)
+            self.log_message(f"Read media info for {probed} files ({total - probed} cached or failed)", "SUCCESS")
+            
+        elif msg_type == "file_event":
+            action, payload = message[1], message[2]
+            if action == "upsert":
+                self.core.attach_cached_media([payload])
+                self.file_view.upsert(payload)
+            elif action == "remove":
+                self.file_view.remove(payload)
+                
+        elif msg_type == "offload_status":
+            if self.offload:
+                self.offload_states[message[1]] = message[2]
+                self.update_offload_label()
+                
+        elif msg_type == "offload_complete":
+            host, moved, moved_bytes, failed = message[1], message[2], message[3], message[4]
+            self.log_message(f"Offloaded {moved} files ({format_size(moved_bytes)}) from {host}, "
+                             f"{failed} failed", "SUCCESS" if not failed else "WARNING")
+            # The watchers already stream the deletions into the list
+            if not self.operation_in_progress.get() and not self.watchers:
+                self.refresh_file_list()
+                
+        elif msg_type == "log":
+            message_text, level = message[1], message[2]
+            self.log_message(message_text, level)
 
 def main():
     """Main function to run the application"""
@@ -735,10 +1536,10 @@ def main():
     # Handle window close
     def on_closing():
         if app.operation_in_progress.get():
-            if messagebox.askokcancel("Quit", "An operation is in progress. Do you want to quit anyway?"):
-                root.destroy()
-        else:
-            root.destroy()
+            if not messagebox.askokcancel("Quit", "An operation is in progress. Do you want to quit anyway?"):
+                return
+        app.thumbnail_loader.close()
+        root.destroy()
             
     root.protocol("WM_DELETE_WINDOW", on_closing)
     
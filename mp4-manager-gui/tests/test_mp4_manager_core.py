@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the UI-free helpers in mp4_manager_core
+Run from the mp4-manager-gui directory with `python -m pytest tests`
+"""
+
+import hashlib
+import io
+import json
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mp4_manager_core as core  # noqa: E402
+
+
+class LocalManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.local_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def download(self, record, manifest):
+        with open(os.path.join(self.local_dir, record.filename), "wb") as f:
+            f.write(b"x" * record.size)
+        manifest.update(record, "0" * 64)
+
+    def test_downloaded_record_is_current(self):
+        record = core.RemoteFile("/data/a.mp4", 10, 100.0)
+        manifest = core.LocalManifest(self.local_dir)
+        self.download(record, manifest)
+        manifest.save()
+
+        reloaded = core.LocalManifest(self.local_dir)
+        self.assertTrue(reloaded.is_current(record))
+        self.assertEqual(reloaded.diff([record]), [])
+
+    def test_changed_or_damaged_records_are_not_current(self):
+        record = core.RemoteFile("/data/a.mp4", 10, 100.0)
+        manifest = core.LocalManifest(self.local_dir)
+        self.download(record, manifest)
+
+        grown = core.RemoteFile("/data/a.mp4", 20, 100.0)
+        touched = core.RemoteFile("/data/a.mp4", 10, 200.0)
+        new = core.RemoteFile("/data/b.mp4", 10, 100.0)
+        self.assertEqual(manifest.diff([record, grown, touched, new]), [grown, touched, new])
+
+        with open(os.path.join(self.local_dir, record.filename), "wb") as f:
+            f.write(b"x" * 5)
+        self.assertFalse(manifest.is_current(record))
+
+    def test_save_keeps_entries_saved_by_other_batches(self):
+        first = core.LocalManifest(self.local_dir)
+        second = core.LocalManifest(self.local_dir)
+        self.download(core.RemoteFile("/data/a.mp4", 10, 100.0), first)
+        self.download(core.RemoteFile("/data/b.mp4", 10, 100.0), second)
+        first.save()
+        second.save()
+
+        with open(os.path.join(self.local_dir, core.LocalManifest.FILENAME), encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(sorted(data["files"]), ["a.mp4", "b.mp4"])
+
+    def test_unknown_version_is_ignored(self):
+        with open(os.path.join(self.local_dir, core.LocalManifest.FILENAME), "w", encoding="utf-8") as f:
+            json.dump({"version": 0, "files": {"a.mp4": {}}}, f)
+        self.assertEqual(core.LocalManifest(self.local_dir).entries, {})
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_unlimited_bucket_never_sleeps(self):
+        bucket = core.TokenBucket()
+        with mock.patch.object(core.time, "sleep") as sleep:
+            bucket.consume(10 * 1024 * 1024)
+        self.assertFalse(bucket.limited)
+        sleep.assert_not_called()
+
+    def test_consume_sleeps_for_the_deficit(self):
+        bucket = core.TokenBucket(1000)
+        with mock.patch.object(core.time, "sleep") as sleep:
+            bucket.consume(500)
+        self.assertTrue(bucket.limited)
+        self.assertAlmostEqual(sleep.call_args[0][0], 0.5, delta=0.05)
+
+    def test_tokens_are_capped_at_a_quarter_second(self):
+        bucket = core.TokenBucket(1000)
+        bucket.timestamp -= 60
+        with mock.patch.object(core.time, "sleep") as sleep:
+            bucket.consume(250)
+            sleep.assert_not_called()
+            bucket.consume(250)
+        self.assertAlmostEqual(sleep.call_args[0][0], 0.25, delta=0.05)
+
+    def test_child_buckets_share_the_parent_budget(self):
+        parent = core.TokenBucket(1000)
+        child = core.TokenBucket(0, parent)
+        self.assertTrue(child.limited)
+        with mock.patch.object(core.time, "sleep") as sleep:
+            child.consume(500)
+        self.assertLess(parent.tokens, 0)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_set_rate_drops_excess_tokens(self):
+        bucket = core.TokenBucket(1000)
+        bucket.tokens = bucket.capacity
+        bucket.set_rate(100)
+        self.assertEqual(bucket.tokens, 25)
+        bucket.set_rate(-5)
+        self.assertEqual(bucket.rate, 0)
+        self.assertFalse(bucket.limited)
+
+
+def box(kind, payload=b""):
+    return struct.pack(">I4s", 8 + len(payload), kind.encode("latin-1")) + payload
+
+
+def mvhd(timescale, duration, version=0):
+    if version == 1:
+        return box("mvhd", bytes([1, 0, 0, 0]) + bytes(16) + struct.pack(">IQ", timescale, duration) + bytes(80))
+    return box("mvhd", bytes(12) + struct.pack(">II", timescale, duration) + bytes(80))
+
+
+def trak(handler, codec, width=0, height=0):
+    tkhd = box("tkhd", bytes(76) + struct.pack(">II", width << 16, height << 16))
+    hdlr = box("hdlr", bytes(8) + handler.encode("latin-1") + bytes(12))
+    stsd = box("stsd", bytes(8) + box(codec, bytes(8)))
+    return box("trak", tkhd + box("mdia", hdlr + box("minf", box("stbl", stsd))))
+
+
+class MediaParserTest(unittest.TestCase):
+    def test_parse_moov_reads_duration_resolution_and_codecs(self):
+        moov = mvhd(1000, 10000) + trak("vide", "avc1", 1920, 1080) + trak("soun", "mp4a")
+        info = core.parse_moov(moov, 10 * 1000 * 1000)
+        self.assertTrue(info.complete)
+        self.assertEqual(info.duration, 10.0)
+        self.assertEqual((info.width, info.height), (1920, 1080))
+        self.assertEqual(info.codec_text, "avc1/mp4a")
+        self.assertEqual(info.bitrate, 8 * 1000 * 1000)
+        self.assertEqual(info.duration_text, "0:00:10")
+
+    def test_parse_moov_reads_version_1_mvhd(self):
+        info = core.parse_moov(mvhd(90000, 90000 * 3725, version=1), 0)
+        self.assertEqual(info.duration_text, "1:02:05")
+
+    def test_first_track_of_each_kind_wins(self):
+        moov = mvhd(1, 1) + trak("vide", "hvc1", 3840, 2160) + trak("vide", "avc1", 640, 480)
+        info = core.parse_moov(moov, 0)
+        self.assertEqual((info.video_codec, info.width), ("hvc1", 3840))
+
+    def test_truncated_moov_is_incomplete(self):
+        moov = mvhd(1000, 10000) + trak("vide", "avc1", 1920, 1080)
+        info = core.parse_moov(moov[:20], 1000)
+        self.assertFalse(info.complete)
+        self.assertEqual(info.duration_text, "incomplete")
+        self.assertIsNone(info.bitrate)
+
+    def test_iter_boxes_handles_large_and_open_ended_sizes(self):
+        large = struct.pack(">I4sQ", 1, b"free", 20) + b"abcd"
+        data = large + struct.pack(">I4s", 0, b"mdat") + b"rest"
+        boxes = list(core.iter_boxes(data))
+        self.assertEqual(boxes, [("free", 16, 20), ("mdat", 28, 32)])
+
+    def test_find_box_walks_nested_path(self):
+        data = trak("vide", "avc1", 1, 1)
+        stsd = core.find_box(data, ("trak", "mdia", "minf", "stbl", "stsd"))
+        self.assertEqual(data[stsd[0] + 12:stsd[0] + 16], b"avc1")
+        self.assertIsNone(core.find_box(data, ("trak", "udta")))
+
+    def test_read_moov_skips_media_data_after_header(self):
+        moov = mvhd(1000, 5000)
+        mdat_size = 4 * core.MEDIA_HEAD_SIZE
+        head = box("ftyp", b"isom") + struct.pack(">I4s", mdat_size, b"mdat")
+        moov_offset = len(head) - 8 + mdat_size
+        file_size = moov_offset + 8 + len(moov)
+        reads = []
+
+        def read(offset, length):
+            reads.append((offset, length))
+            if offset == 0:
+                return (head + bytes(length))[:length]
+            self.assertGreaterEqual(offset, moov_offset)
+            return box("moov", moov)[offset - moov_offset:offset - moov_offset + length]
+
+        self.assertEqual(core.read_moov(read, file_size), moov)
+        self.assertEqual(len(reads), 2)
+
+    def test_read_moov_without_moov_returns_none(self):
+        data = box("ftyp", b"isom") + box("mdat", bytes(32))
+        self.assertIsNone(core.read_moov(lambda offset, length: data[offset:offset + length], len(data)))
+
+
+class DiskForecastTest(unittest.TestCase):
+    def test_steady_writes_give_rate_and_time_to_threshold(self):
+        forecast = core.DiskForecast(window=300)
+        for t in range(0, 60, 10):
+            forecast.add(t, 10000 - 100 * t)
+        self.assertAlmostEqual(forecast.write_rate(), 100.0)
+        self.assertAlmostEqual(forecast.seconds_until(1000), (5000 - 1000) / 100.0)
+
+    def test_noisy_sample_does_not_dominate_the_slope(self):
+        forecast = core.DiskForecast(window=300)
+        for t in range(0, 100, 10):
+            forecast.add(t, 10000 - 10 * t - (500 if t == 50 else 0))
+        self.assertLess(forecast.write_rate(), 20.0)
+
+    def test_samples_outside_the_window_are_dropped(self):
+        forecast = core.DiskForecast(window=30)
+        forecast.add(0, 0)
+        for t in range(100, 140, 10):
+            forecast.add(t, 1000)
+        self.assertEqual([t for t, _ in forecast.samples], [100, 110, 120, 130])
+        self.assertEqual(forecast.write_rate(), 0.0)
+
+    def test_no_forecast_without_shrinking_free_space(self):
+        forecast = core.DiskForecast()
+        self.assertIsNone(forecast.seconds_until(100))
+        forecast.add(0, 500)
+        self.assertEqual(forecast.write_rate(), 0.0)
+        self.assertIsNone(forecast.seconds_until(100))
+        forecast.add(10, 600)
+        self.assertIsNone(forecast.seconds_until(100))
+        self.assertEqual(forecast.seconds_until(1000), 0.0)
+
+
+class DaemonThreadsTest(unittest.TestCase):
+    def test_every_item_is_yielded_after_a_failure(self):
+        def work(item):
+            if item == 0:
+                raise ValueError("boom")
+            time.sleep(0.05)
+            return item * 10
+
+        outcomes = list(core.run_on_daemon_threads(work, range(4), 2))
+        self.assertEqual(outcomes[0][0], 0)
+        self.assertIsInstance(outcomes[0][2], ValueError)
+        self.assertEqual(sorted((item, result) for item, result, error in outcomes[1:] if error is None),
+                         [(1, 10), (2, 20), (3, 30)])
+
+    def test_at_most_max_workers_run_at_once(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def work(item):
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        self.assertEqual(len(list(core.run_on_daemon_threads(work, range(8), 3))), 8)
+        self.assertLessEqual(running[1], 3)
+
+    def test_daemon_map_keeps_order_and_raises_after_every_call(self):
+        self.assertEqual(core.daemon_map(lambda item: item * 2, [3, 1, 2]), [6, 2, 4])
+        finished = []
+
+        def work(item):
+            if item == 0:
+                raise ValueError("boom")
+            time.sleep(0.05)
+            finished.append(item)
+
+        with self.assertRaises(ValueError):
+            core.daemon_map(work, range(3))
+        self.assertEqual(sorted(finished), [1, 2])
+
+
+class FakeProcess:
+    """Stands in for a Popen object whose stdout is already complete"""
+
+    def __init__(self, output):
+        self.stdin = io.BytesIO()
+        self.stdout = io.BytesIO(output)
+        self.returncode = None
+
+    def wait(self):
+        self.returncode = 0
+        return 0
+
+    def poll(self):
+        return self.returncode
+
+    def kill(self):
+        pass
+
+
+class FakeTransport:
+    """Serves files from a dict; fetch returns the queued digests first, if any
+
+    popen answers like sha256sum over the names in hashed (all files by default).
+    """
+
+    def __init__(self, files=None, digests=(), hashed=None):
+        self.files = files or {}
+        self.digests = list(digests)
+        self.hashed = list(self.files) if hashed is None else hashed
+        self.fetches = []
+        self.commands = []
+
+    def run(self, command, input_data=None, timeout=30):
+        """Run command with the local sh, as ssh would run it on the host"""
+        self.commands.append(command)
+        result = subprocess.run(["sh", "-c", command], input=input_data, capture_output=True, text=True,
+                                timeout=timeout)
+        return result.returncode == 0, result.stdout, result.stderr
+
+    def write(self, remote_path, local_path):
+        data = self.files[os.path.basename(remote_path)]
+        with open(local_path, "wb") as f:
+            f.write(data)
+        return hashlib.sha256(data).hexdigest()
+
+    def fetch(self, remote_path, local_path, limiter=None, progress=None):
+        self.fetches.append(remote_path)
+        digest = self.write(remote_path, local_path)
+        return self.digests.pop(0) if self.digests else digest
+
+    def download(self, remote_path, local_path, limiter=None, progress=None):
+        self.write(remote_path, local_path)
+        return None
+
+    def popen(self, command):
+        lines = []
+        for name in self.hashed:
+            digest = hashlib.sha256(self.files[name]).hexdigest()
+            if "\n" in name or "\\" in name:
+                # sha256sum escapes such names and flags the line with a leading backslash
+                escaped = name.replace("\\", "\\\\").replace("\n", "\\n")
+                lines.append(f"\\{digest}  {escaped}\n")
+            else:
+                lines.append(f"{digest}  {name}\n")
+        return FakeProcess("".join(lines).encode())
+
+
+class DownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = core.MP4Manager(local_dir=self.tmp.name, throttle_mode="off")
+        self.record = core.RemoteFile("/tmp/a.mp4", 4, 100.0, host="cam")
+        self.transport = FakeTransport({"a.mp4": b"data"})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def download(self, **options):
+        with mock.patch.object(self.manager, "get_transport", return_value=self.transport):
+            stats = self.manager.download([self.record], **options)
+        self.assertEqual((stats["downloaded"], stats["failed"]), (1, 0))
+        return core.LocalManifest(self.tmp.name)
+
+    def test_unverified_download_does_not_hash_the_local_copy(self):
+        manifest = self.download(verify=False)
+        self.assertIsNone(manifest.entries["a.mp4"]["sha256"])
+        self.assertTrue(manifest.is_current(self.record))
+        self.assertEqual(self.transport.fetches, [])
+
+    def test_verified_download_stores_the_streamed_digest(self):
+        manifest = self.download(verify=True)
+        self.assertEqual(manifest.entries["a.mp4"]["sha256"], hashlib.sha256(b"data").hexdigest())
+        self.assertEqual(self.transport.fetches, ["/tmp/a.mp4"])
+
+
+class VerifiedFetchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.messages = []
+        self.manager = core.MP4Manager(notify=self.messages.append, local_dir=self.tmp.name, throttle_mode="off")
+        self.local_path = os.path.join(self.tmp.name, "a.mp4")
+        self.digest = hashlib.sha256(b"data").hexdigest()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def fetch(self, transport):
+        hasher = core.RemoteHasher(transport, "/tmp", ["a.mp4"])
+        hasher.start()
+        try:
+            return self.manager.fetch_verified(transport, "a.mp4", "/tmp/a.mp4", self.local_path, hasher)
+        finally:
+            hasher.stop()
+
+    def warnings(self):
+        return [text for _, text, level in self.messages if level == "WARNING"]
+
+    def test_remote_hasher_reads_escaped_names(self):
+        files = {"a.mp4": b"a", "new\nline.mp4": b"b", "back\\slash.mp4": b"c"}
+        hasher = core.RemoteHasher(FakeTransport(files), "/tmp", list(files))
+        hasher.start()
+        for name, data in files.items():
+            self.assertEqual(hasher.get(name, timeout=5), hashlib.sha256(data).hexdigest())
+        self.assertIsNone(hasher.get("other.mp4", timeout=5))
+
+    def test_mismatch_is_fetched_again(self):
+        transport = FakeTransport({"a.mp4": b"data"}, digests=["0" * 64])
+        self.assertEqual(self.fetch(transport), self.digest)
+        self.assertEqual(len(transport.fetches), 2)
+        self.assertEqual(self.warnings(), [f"Checksum mismatch for a.mp4 (attempt 1/{core.VERIFY_ATTEMPTS})"])
+
+    def test_repeated_mismatch_gives_up(self):
+        transport = FakeTransport({"a.mp4": b"data"}, digests=["0" * 64] * core.VERIFY_ATTEMPTS)
+        with self.assertRaisesRegex(RuntimeError, "checksum mismatch after"):
+            self.fetch(transport)
+        self.assertEqual(len(transport.fetches), core.VERIFY_ATTEMPTS)
+        self.assertEqual(len(self.warnings()), core.VERIFY_ATTEMPTS)
+
+    def test_missing_remote_checksum_fails_without_retrying(self):
+        transport = FakeTransport({"a.mp4": b"data"}, hashed=[])
+        with self.assertRaisesRegex(RuntimeError, "remote checksum unavailable"):
+            self.fetch(transport)
+        self.assertEqual(len(transport.fetches), 1)
+
+    def test_failed_verification_is_not_recorded_in_the_manifest(self):
+        transport = FakeTransport({"a.mp4": b"data"}, hashed=[])
+        record = core.RemoteFile("/tmp/a.mp4", 4, 100.0, host="cam")
+        with mock.patch.object(self.manager, "get_transport", return_value=transport):
+            stats = self.manager.download([record], verify=True)
+        self.assertEqual((stats["downloaded"], stats["failed"]), (0, 1))
+        self.assertEqual(core.LocalManifest(self.tmp.name).entries, {})
+
+
+class DeleteRemoteFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = core.MP4Manager(remote_dir=self.tmp.name)
+        self.transport = FakeTransport()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def create(self, names):
+        for name in names:
+            with open(os.path.join(self.tmp.name, name), "wb"):
+                pass
+
+    def delete(self, names):
+        with mock.patch.object(self.manager, "get_transport", return_value=self.transport):
+            return self.manager.delete_remote_files(names)
+
+    def test_awkward_names_are_deleted_and_missing_files_fail(self):
+        names = ["a b.mp4", "it's.mp4", 'say "hi".mp4', "-v.mp4", "tab\there.mp4", "new\nline.mp4", "$(x).mp4"]
+        self.create(names)
+        deleted, failed = self.delete(names + ["missing.mp4"])
+        self.assertEqual(deleted, names)
+        self.assertEqual(failed, ["missing.mp4"])
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_large_deletes_are_split_into_batches(self):
+        names = [f"clip_{index}.mp4" for index in range(7)]
+        self.create(names)
+        with mock.patch.object(core, "DELETE_BATCH_SIZE", 3):
+            deleted, failed = self.delete(names)
+        self.assertEqual((deleted, failed), (names, []))
+        self.assertEqual(len(self.transport.commands), 3)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -55,8 +55,8 @@ BUILD_DIR="systemd_analyzer_build"
 mkdir -p "$BUILD_DIR"
 cd "$BUILD_DIR"
 
-# Copy the Python script
-cp ../systemd_analyzer_gui.py .
+# Copy the Python scripts (the GUI imports the UI-free core module)
+cp ../systemd_analyzer_gui.py ../systemd_analyzer_core.py .
 
 # Create spec file for PyInstaller
 cat > systemd_analyzer.spec << 'EOF'
@@ -69,7 +69,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['tkinter', 'tkinter.ttk', 'tkinter.scrolledtext', 'tkinter.messagebox', 'tkinter.filedialog'],
+    hiddenimports=['tkinter', 'tkinter.ttk', 'tkinter.scrolledtext', 'tkinter.messagebox', 'tkinter.filedialog', 'systemd_analyzer_core'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
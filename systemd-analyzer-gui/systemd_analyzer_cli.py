@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SystemD Analysis Tool CLI
+Indexes, queries and compares collected systemd-analyze results, analyzes
+boot timing and its regressions over time, and manages the deduplicated
+result store, with JSON output.
+Does not import tkinter.
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional, Tuple
+
+from systemd_analyzer_core import (BOOT_TARGET, BOOT_TOP_UNITS, BootAnalysis, BootHistory, DumpIndex,
+                                   HISTORY_FILENAME, HISTORY_WINDOW, INDEX_FILENAME, ResultStore, STORE_FILENAME,
+                                   collect_results, read_unit_timing)
+
+STORE_COMMANDS = ("store", "stored", "materialize", "compact")
+HISTORY_COMMANDS = ("record", "regressions", "series")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Query systemd-analyze results collected by the SystemD Analysis Tool")
+    parser.add_argument("--db", default=INDEX_FILENAME,
+                        help=f"index database (default ./{INDEX_FILENAME}; the GUI keeps one in its output directory)")
+    parser.add_argument("--store", default=STORE_FILENAME,
+                        help=f"result store (default ./{STORE_FILENAME}; the GUI keeps one in its output directory)")
+    parser.add_argument("--history", default=HISTORY_FILENAME,
+                        help=f"boot time history (default ./{HISTORY_FILENAME}; the GUI keeps one in its output directory)")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+    index = commands.add_parser("index", help="parse and index *_dump.log files")
+    index.add_argument("paths", nargs="+", help="dump files, run directories or the output directory")
+    index.add_argument("--prune", action="store_true",
+                       help="drop indexed dumps whose files were deleted (runs kept in --store are not dropped)")
+
+    commands.add_parser("runs", help="list indexed dumps")
+
+    query = commands.add_parser("query", help="find units and properties across hosts and runs")
+    query.add_argument("--unit", help="unit name, * wildcards allowed (e.g. 'autoware*.service')")
+    query.add_argument("--property", metavar="KEY[=VALUE]",
+                       help="property to match, e.g. Restart=no or LimitNOFILE; * wildcards allowed")
+    query.add_argument("--host")
+    query.add_argument("--run", help="run timestamp, e.g. 20240101_120000")
+    query.add_argument("--latest", action="store_true", help="only search each host's most recent run")
+
+    diff = commands.add_parser("diff", help="show the units and properties that differ between hosts or runs")
+    diff.add_argument("targets", nargs="*", metavar="HOST[@RUN]",
+                      help="dumps to compare; a host without @RUN means its latest run")
+    diff.add_argument("--run", help="without targets: compare every host of this run (default: the latest run)")
+    diff.add_argument("--host", help="without targets: compare this host's latest run (or --run) with the run before")
+    diff.add_argument("--text", action="store_true", help="print a text report instead of JSON")
+
+    boot = commands.add_parser("boot", help="boot critical path, per-unit slack and slowest units")
+    boot.add_argument("paths", nargs="+", help="*_timing.log or *_dump.log files, or run directories")
+    boot.add_argument("--target", default=BOOT_TARGET, help=f"unit that ends the boot (default {BOOT_TARGET})")
+    boot.add_argument("--top", type=int, default=BOOT_TOP_UNITS, help="number of slowest units to list")
+    boot.add_argument("--text", action="store_true", help="print a text report instead of JSON")
+
+    store = commands.add_parser("store", help="add run directories to the deduplicated result store")
+    store.add_argument("run_dirs", nargs="+", metavar="RUN_DIR")
+    commands.add_parser("stored", help="list the runs in the result store")
+    materialize = commands.add_parser("materialize", help="recreate stored run directories")
+    materialize.add_argument("runs", nargs="+", metavar="RUN", help="run directory name, e.g. systemd_analysis_20240101_120000")
+    materialize.add_argument("--dest", default=".", help="directory to recreate the runs in (default: current)")
+    compact = commands.add_parser("compact", help="store and remove all but the newest run directories")
+    compact.add_argument("output_dir", help="the directory holding the systemd_analysis_* run directories")
+    compact.add_argument("--keep", type=int, default=10, help="run directories to keep (default 10)")
+
+    record = commands.add_parser("record", help="add unit activation times to the boot time history")
+    record.add_argument("paths", nargs="+", help="*_timing.log or *_dump.log files, run directories or the output directory")
+    regressions = commands.add_parser("regressions", help="units whose activation time went past their rolling baseline "
+                                      "(exit status 1 when any are found)")
+    regressions.add_argument("--host")
+    regressions.add_argument("--run", help="check this run instead of each host's latest")
+    regressions.add_argument("--all", action="store_true", help="check every run in the history")
+    regressions.add_argument("--window", type=int, default=HISTORY_WINDOW,
+                             help=f"earlier runs forming each unit's baseline (default {HISTORY_WINDOW})")
+    regressions.add_argument("--text", action="store_true", help="print a text report instead of JSON")
+    series = commands.add_parser("series", help="activation times of units on one host, oldest run first")
+    series.add_argument("--host", required=True)
+    series.add_argument("units", nargs="+", metavar="UNIT", help="unit names; (boot) is the time to reach the boot target")
+    series.add_argument("--last", type=int, help="only the last N runs")
+    return parser
+
+
+def diff_targets(index: DumpIndex, args) -> List[Tuple[str, Optional[str]]]:
+    """Resolve the diff command's arguments into (host, run) pairs."""
+    if args.targets:
+        return [(host, run or None) for host, _, run in (target.partition("@") for target in args.targets)]
+    if args.host:
+        run = args.run or index.latest_run(args.host)
+        previous = index.previous_run(args.host, run) if run else None
+        return [(args.host, previous), (args.host, run)] if previous else []
+    run = args.run or index.latest_run()
+    return [(host, run) for host in index.run_hosts(run)] if run else []
+
+
+def run_boot(args) -> Tuple[bool, dict]:
+    """Analyze the boot of every host@run found in args.paths; does not need the index."""
+    analyses = {}
+    for label, files in collect_results(args.paths).items():
+        path = files.get("timing") or files.get("dump")
+        if path:
+            units, manager = read_unit_timing(path)
+            if units:
+                analyses[label] = BootAnalysis(units, manager, target=args.target, top=args.top)
+    if not analyses:
+        return False, {"error": "no unit timing found"}
+    if args.text:
+        return True, {"text": "\n".join(analysis.to_text(label) for label, analysis in analyses.items())}
+    return True, {"hosts": {label: analysis.to_dict() for label, analysis in analyses.items()}}
+
+
+def run_store(store: ResultStore, args) -> Tuple[bool, dict]:
+    """Run one result store command."""
+    if args.command == "store":
+        return True, {"runs": {os.path.basename(os.path.normpath(run_dir)): store.add_run(run_dir)
+                               for run_dir in args.run_dirs}}
+
+    if args.command == "stored":
+        runs = []
+        for run_id in store.runs():
+            files = store.manifest(run_id)["files"]
+            runs.append({"run": run_id, "files": len(files), "bytes": sum(entry["size"] for entry in files.values())})
+        return True, {"runs": runs}
+
+    if args.command == "materialize":
+        try:
+            return True, {"restored": [store.materialize(run_id, args.dest) for run_id in args.runs]}
+        except (KeyError, ValueError) as e:
+            return False, {"error": e.args[0]}
+
+    if args.command == "compact":
+        return True, {"removed": store.compact(args.output_dir, args.keep)}
+
+    raise ValueError(f"unknown command: {args.command}")
+
+
+def run_history(history: BootHistory, args) -> Tuple[bool, dict]:
+    """Run one boot time history command."""
+    if args.command == "record":
+        recorded = {}
+        for label, files in collect_results(args.paths).items():
+            path = files.get("timing") or files.get("dump")
+            units, manager = read_unit_timing(path) if path else ({}, {})
+            if units:
+                host, _, run_id = label.rpartition("@")
+                recorded[label] = history.add_run(host, run_id, units, BootAnalysis(units, manager).boot_time)
+        return bool(recorded), {"recorded": recorded}
+
+    if args.command == "regressions":
+        # Not ok when regressions are found, so scripts can act on the exit status
+        found = history.regressions(host=args.host, run=args.run, every_run=args.all, window=args.window)
+        if args.text:
+            return not found, {"text": "".join(regression.to_text() + "\n" for regression in found)}
+        return not found, {"window": args.window, "regressions": [regression.to_dict() for regression in found]}
+
+    if args.command == "series":
+        runs, series = history.series(args.host, limit=args.last, units=args.units)
+        return bool(series), {"runs": runs, "series": {
+            unit: [round(value, 6) if value == value else None for value in values] for unit, values in series.items()}}
+
+    raise ValueError(f"unknown command: {args.command}")
+
+
+def run(index: DumpIndex, args) -> Tuple[bool, dict]:
+    """Run one command, returning (ok, result) where result is JSON serializable."""
+    if args.command == "index":
+        counts = index.add_paths(args.paths)
+        result = {"dumps": len(counts), "units": sum(counts.values())}
+        if args.prune:
+            stored = []
+            if os.path.exists(args.store):
+                with ResultStore(args.store) as store:
+                    stored = store.runs()
+            result["pruned"] = index.prune(stored)
+        return True, result
+
+    if args.command == "runs":
+        return True, {"runs": [{"host": host, "run": run_id, "units": units} for host, run_id, units in index.runs()]}
+
+    if args.command == "query":
+        key = value = None
+        if args.property:
+            key, _, value = args.property.partition("=")
+            value = value if "=" in args.property else None
+        rows = index.find(unit=args.unit, key=key, value=value, host=args.host, run=args.run, latest=args.latest)
+        matches = [{"host": host, "run": run_id, "unit": unit, "key": name, "value": text}
+                   for host, run_id, unit, name, text in rows]
+        return bool(matches), {"matches": matches, "hosts": sorted({match["host"] for match in matches})}
+
+    if args.command == "diff":
+        targets = diff_targets(index, args)
+        if len(targets) < 2:
+            return False, {"error": "need at least two indexed dumps to compare"}
+        try:
+            report = index.diff(targets)
+        except (KeyError, ValueError) as e:
+            return False, {"error": e.args[0]}
+        return True, {"text": report.to_text()} if args.text else report.to_dict()
+
+    raise ValueError(f"unknown command: {args.command}")
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "boot":
+        ok, result = run_boot(args)
+    elif args.command in STORE_COMMANDS:
+        with ResultStore(args.store) as store:
+            ok, result = run_store(store, args)
+    elif args.command in HISTORY_COMMANDS:
+        with BootHistory(args.history) as history:
+            ok, result = run_history(history, args)
+    else:
+        with DumpIndex(args.db) as index:
+            ok, result = run(index, args)
+    if "text" in result:
+        sys.stdout.write(result["text"])
+        return 0 if ok else 1
+    json.dump(dict(result, ok=ok), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
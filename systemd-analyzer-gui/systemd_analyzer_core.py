@@ -0,0 +1,1424 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SystemD Analysis Tool core
+UI-free parsing, indexing, boot timing analysis, boot time history and
+deduplicated storage of collected systemd-analyze output, shared by the GUI
+and the CLI.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import queue
+import re
+import shutil
+import sqlite3
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Each analysis writes its files to <output dir>/systemd_analysis_<YYYYmmdd_HHMMSS>
+RUN_DIR_PREFIX = "systemd_analysis_"
+
+# Collected file names: <hostname>_<YYYYmmdd_HHMMSS>_dump.log, _plot.svg and _timing.log
+DUMP_SUFFIX = "_dump.log"
+PLOT_SUFFIX = "_plot.svg"
+TIMING_SUFFIX = "_timing.log"
+RESULT_NAME = re.compile(r"^(?P<host>.+)_(?P<run>\d{8}_\d{6})_(?P<kind>dump\.log|plot\.svg|timing\.log)$")
+
+# Remote command whose output is saved as *_timing.log: the manager's boot
+# timestamps, then every loaded unit's names, After= ordering and monotonic
+# activation timestamps (microseconds), as blank-line separated `systemctl show` blocks
+TIMING_COMMAND = (
+    "systemctl show --no-pager -p UserspaceTimestampMonotonic,FinishTimestampMonotonic; echo; "
+    "systemctl show --no-pager -p Id,Names,After,InactiveExitTimestampMonotonic,ActiveEnterTimestampMonotonic '*'"
+)
+
+# Cheap remote command identifying what a collection would return: the boot id,
+# then a hash of the paths, sizes, mtimes and link targets under the unit file
+# directories. A host whose output matches the fingerprint cached from its
+# last collection has that collection's results reused
+FINGERPRINT_COMMAND = (
+    "cat /proc/sys/kernel/random/boot_id; "
+    "find /etc/systemd /run/systemd/system /run/systemd/system.control /lib/systemd/system /usr/lib/systemd/system "
+    "-printf '%p %s %T@ %l\\n' 2>/dev/null | LC_ALL=C sort | sha256sum"
+)
+
+# Fingerprint cache kept in the output directory: hostname -> fingerprint,
+# address and the run whose results it describes
+FINGERPRINT_FILENAME = "systemd_fingerprints.json"
+
+# Unit whose activation ends the boot, and units listed as top offenders
+BOOT_TARGET = "default.target"
+BOOT_TOP_UNITS = 10
+
+# Index database kept in the output directory, next to the run directories
+INDEX_FILENAME = "systemd_index.sqlite"
+
+# Property rows buffered before each executemany while indexing a dump, and
+# the most interned value ids cached in memory
+INDEX_BATCH_ROWS = 5000
+INDEX_VALUE_CACHE = 100000
+
+# Content-addressed store of run directories, kept in the output directory.
+# Dumps are split into unit sections with their volatile values (timestamps,
+# PIDs) replaced by STORE_MARK, so sections are shared between runs and hosts
+STORE_FILENAME = "systemd_store.sqlite"
+STORE_MARK = b"\x00"
+STORE_SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS objects (
+    id TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS manifests (
+    run TEXT PRIMARY KEY,
+    manifest TEXT NOT NULL
+);
+"""
+
+# Time series of unit activation times, kept in the output directory. Each
+# host's run is one row holding a packed float32 array of seconds, ordered as
+# the packed unit ids of its layout; a host's unit set rarely changes, so runs
+# share layouts and years of daily runs read back as one blob per run
+HISTORY_FILENAME = "systemd_history.sqlite"
+HISTORY_SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS names (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS layouts (
+    id INTEGER PRIMARY KEY,
+    unit_ids BLOB NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    run TEXT NOT NULL,
+    layout_id INTEGER NOT NULL,
+    durations BLOB NOT NULL,
+    UNIQUE (host, run)
+);
+"""
+
+# Series name under which each run's time to reach the boot target is kept
+BOOT_SERIES = "(boot)"
+
+# A unit has regressed when its activation time exceeds the upper quartile of
+# its previous HISTORY_WINDOW samples by REGRESSION_IQR_FACTOR interquartile
+# ranges, and their median by REGRESSION_MIN_SECONDS; units with fewer than
+# HISTORY_MIN_RUNS earlier samples have no baseline yet
+HISTORY_WINDOW = 30
+HISTORY_MIN_RUNS = 10
+REGRESSION_IQR_FACTOR = 3.0
+REGRESSION_MIN_SECONDS = 0.5
+
+# Line that opens a unit section in `systemd-analyze dump`
+UNIT_HEADER = "-> Unit "
+SECTION_HEADER = "-> "
+
+# Unit dependency properties; their values carry an "(Origin: ...)" or
+# "(Destination: ...)" suffix that is dropped when parsing
+DEPENDENCY_KEYS = frozenset((
+    "Requires", "Requisite", "Wants", "BindsTo", "PartOf", "Upholds", "Conflicts",
+    "Before", "After", "OnFailure", "OnSuccess", "Triggers", "TriggeredBy",
+    "PropagatesReloadTo", "ReloadPropagatedFrom", "PropagatesStopTo", "StopPropagatedFrom",
+    "JoinsNamespaceOf", "References", "ReferencedBy", "RequiredBy", "RequisiteOf",
+    "WantedBy", "BoundBy", "UpheldBy", "ConsistsOf", "ConflictedBy", "InSlice", "SliceOf",
+    "OnFailureOf", "OnSuccessOf",
+))
+
+CGROUP_PREFIXES = (
+    "CGroup", "Slice", "CPU", "StartupCPU", "AllowedCPUs", "Memory", "DefaultMemory",
+    "StartupMemory", "IO", "StartupIO", "BlockIO", "Tasks", "DeviceAllow", "DevicePolicy",
+    "IPAccounting", "IPAddress", "Delegate", "ManagedOOM",
+)
+
+# Runtime properties that change from boot to boot (besides every *Timestamp
+# and *PID property); they are ignored when unit configurations are compared
+VOLATILE_KEYS = frozenset((
+    "Invocation ID", "NRestarts", "Status Text", "Status Errno", "Condition Result",
+    "Assert Result", "Need Daemon Reload", "Memory Current", "Tasks Current", "CPU Usage",
+    "Job Timeout Action", "Exit Code", "Exit Status",
+))
+
+# Bumped whenever the schema or the digests change; the index only caches
+# parsed dumps, so an index with another version is rebuilt from scratch
+INDEX_VERSION = 2
+
+# Property keys and values are interned in the keys and strings tables, so a
+# property row is three integers and repeated values are stored once
+INDEX_SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS dumps (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    run TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    manager TEXT,
+    units INTEGER NOT NULL DEFAULT 0,
+    digest INTEGER
+);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    dump_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT,
+    load_state TEXT,
+    active_state TEXT,
+    fragment_path TEXT,
+    digest INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keys (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    category TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS strings (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS properties (
+    unit_id INTEGER NOT NULL,
+    key_id INTEGER NOT NULL,
+    value_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dumps_by_host ON dumps(host, run);
+CREATE INDEX IF NOT EXISTS units_by_name ON units(name, dump_id);
+CREATE INDEX IF NOT EXISTS units_by_dump ON units(dump_id);
+CREATE INDEX IF NOT EXISTS properties_by_key ON properties(key_id, value_id);
+CREATE INDEX IF NOT EXISTS properties_by_unit ON properties(unit_id, key_id);
+"""
+
+
+def property_category(key: str) -> str:
+    """Classify a dump property as state, timestamp, dependency, limit, cgroup or other."""
+    key = key.split(".", 1)[0]
+    if key in DEPENDENCY_KEYS:
+        return "dependency"
+    if "Timestamp" in key:
+        return "timestamp"
+    if key.endswith("State") or key.endswith("Result"):
+        return "state"
+    if key.startswith("Limit"):
+        return "limit"
+    if key.startswith(CGROUP_PREFIXES):
+        return "cgroup"
+    return "other"
+
+
+def is_volatile(key: str) -> bool:
+    """Tell whether a property is runtime state that is ignored by diffs."""
+    leaf = key.rsplit(".", 1)[-1]
+    return "Timestamp" in leaf or leaf.endswith("PID") or leaf in VOLATILE_KEYS
+
+
+def normalize_properties(properties: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Drop volatile properties and sort the rest, so dump order does not matter."""
+    return sorted((key, value) for key, value in properties if not is_volatile(key))
+
+
+def unit_digest(name: str, properties: Iterable[Tuple[str, str]]) -> int:
+    """Return a signed 64-bit hash of a unit's name and normalized properties."""
+    digest = hashlib.blake2b(name.encode(), digest_size=8)
+    for key, value in normalize_properties(properties):
+        digest.update(b"\0" + key.encode() + b"\x1f" + value.encode())
+    return int.from_bytes(digest.digest(), "big", signed=True)
+
+
+def combine_digests(total: int, digest: int) -> int:
+    """Add a unit digest to a dump digest; the sum does not depend on unit order."""
+    total = (total + digest) & 0xFFFFFFFFFFFFFFFF
+    return total - (1 << 64) if total >= 1 << 63 else total
+
+
+def parse_result_name(filename: str) -> Optional[Tuple[str, str, str]]:
+    """Split a collected file name into (host, run timestamp, "dump" or "plot")."""
+    match = RESULT_NAME.match(os.path.basename(filename))
+    if not match:
+        return None
+    return match.group("host"), match.group("run"), match.group("kind").split(".", 1)[0]
+
+
+class UnitRecord:
+    """Properties of one unit from a dump, in dump order.
+
+    Nested lines (such as the command line under ExecStart) are stored with
+    dotted keys, e.g. "ExecStart.Command Line". Keys may repeat.
+    """
+    __slots__ = ("name", "properties")
+
+    def __init__(self, name: str, properties: Optional[List[Tuple[str, str]]] = None):
+        self.name = name
+        self.properties = properties if properties is not None else []
+
+    @property
+    def unit_type(self) -> str:
+        return self.name.rsplit(".", 1)[-1] if "." in self.name else ""
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Return the first value of key."""
+        for name, value in self.properties:
+            if name == key:
+                return value
+        return default
+
+    def values(self, key: str) -> List[str]:
+        """Return every value of a repeated key such as After or Wants."""
+        return [value for name, value in self.properties if name == key]
+
+
+def iter_dump_units(lines: Iterable[str], header: Optional[Dict[str, str]] = None) -> Iterator[UnitRecord]:
+    """Parse `systemd-analyze dump` output one unit at a time.
+
+    Only the unit being parsed is held in memory, so multi-MB dumps are read
+    in constant memory. Manager lines before the first section are stored in
+    header when a dict is given; job and other non-unit sections are skipped.
+    """
+    unit = None
+    parents: List[str] = []
+    in_header = True
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.startswith(SECTION_HEADER):
+            in_header = False
+            if unit is not None:
+                yield unit
+            unit = None
+            if line.startswith(UNIT_HEADER):
+                unit = UnitRecord(line[len(UNIT_HEADER):].rstrip(":"))
+                parents = []
+            continue
+
+        if in_header:
+            if header is not None and ": " in line:
+                key, value = line.split(": ", 1)
+                header.setdefault(key.strip(), value.strip())
+            continue
+        if unit is None or not line.startswith("\t"):
+            continue
+
+        depth = len(line) - len(line.lstrip("\t"))
+        key, _, value = line.strip().partition(":")
+        value = value.strip()
+        del parents[depth - 1:]
+        parents.append(key)
+        if depth > 1:
+            key = ".".join(parents)
+        elif key in DEPENDENCY_KEYS:
+            value = value.split(" (", 1)[0]
+        unit.properties.append((key, value))
+
+    if unit is not None:
+        yield unit
+
+
+def find_dumps(paths: Iterable[str]) -> Iterator[str]:
+    """Yield the collected dump files in the given files and directories (recursively)."""
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for directory, subdirs, files in os.walk(path):
+            subdirs.sort()
+            for name in sorted(files):
+                if name.endswith(DUMP_SUFFIX):
+                    yield os.path.join(directory, name)
+
+
+class DumpIndex:
+    """SQLite index of parsed dumps, with one row per unit and per unit property.
+
+    Dumps are identified by path; a dump whose size and mtime are unchanged is
+    not parsed again. Safe to share between threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self.db.executescript(
+                "DROP TABLE IF EXISTS dumps; DROP TABLE IF EXISTS units; DROP TABLE IF EXISTS keys; "
+                "DROP TABLE IF EXISTS strings; DROP TABLE IF EXISTS properties;")
+            self.db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self.db.executescript(INDEX_SCHEMA)
+        self.key_ids: Dict[str, int] = dict(self.db.execute("SELECT key, id FROM keys"))
+        self.value_ids: Dict[str, int] = {}
+
+    def close(self):
+        with self.lock:
+            self.db.execute("PRAGMA optimize")
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _key_id(self, cursor: sqlite3.Cursor, key: str) -> int:
+        key_id = self.key_ids.get(key)
+        if key_id is None:
+            cursor.execute("INSERT INTO keys (key, category) VALUES (?, ?)", (key, property_category(key)))
+            key_id = self.key_ids[key] = cursor.lastrowid
+        return key_id
+
+    def _value_id(self, cursor: sqlite3.Cursor, value: str) -> int:
+        value_id = self.value_ids.get(value)
+        if value_id is None:
+            row = cursor.execute("SELECT id FROM strings WHERE value = ?", (value,)).fetchone()
+            if row:
+                value_id = row[0]
+            else:
+                cursor.execute("INSERT INTO strings (value) VALUES (?)", (value,))
+                value_id = cursor.lastrowid
+            if len(self.value_ids) >= INDEX_VALUE_CACHE:
+                self.value_ids.clear()
+            self.value_ids[value] = value_id
+        return value_id
+
+    def add_dump(self, path: str, host: Optional[str] = None, run: Optional[str] = None) -> int:
+        """Index one dump file and return its unit count.
+
+        host and run default to the values encoded in the file name.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        if host is None or run is None:
+            parsed = parse_result_name(path) or (os.path.basename(path), "", "dump")
+            host = host if host is not None else parsed[0]
+            run = run if run is not None else parsed[1]
+
+        with self.lock:
+            row = self.db.execute("SELECT id, size, mtime, units FROM dumps WHERE path = ?", (path,)).fetchone()
+            if row and row[1] == stat.st_size and row[2] == stat.st_mtime:
+                return row[3]
+            try:
+                with self.db:
+                    return self._insert_dump(path, host, run, stat, row[0] if row else None)
+            except sqlite3.Error:
+                # Ids cached during the rolled back transaction may not exist
+                self.key_ids = dict(self.db.execute("SELECT key, id FROM keys"))
+                self.value_ids.clear()
+                raise
+
+    def _insert_dump(self, path: str, host: str, run: str, stat: os.stat_result, old_id: Optional[int]) -> int:
+        if old_id is not None:
+            self._delete_dump(old_id)
+        cursor = self.db.cursor()
+        cursor.execute("INSERT INTO dumps (host, run, path, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                       (host, run, path, stat.st_size, stat.st_mtime))
+        dump_id = cursor.lastrowid
+        header: Dict[str, str] = {}
+        rows = []
+        count = 0
+        dump_digest = 0
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for unit in iter_dump_units(f, header):
+                digest = unit_digest(unit.name, unit.properties)
+                dump_digest = combine_digests(dump_digest, digest)
+                cursor.execute(
+                    "INSERT INTO units (dump_id, name, type, load_state, active_state, fragment_path, digest) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (dump_id, unit.name, unit.unit_type, unit.get("Unit Load State"),
+                     unit.get("Unit Active State"), unit.get("Fragment Path"), digest))
+                unit_id = cursor.lastrowid
+                rows.extend((unit_id, self._key_id(cursor, key), self._value_id(cursor, value))
+                            for key, value in unit.properties)
+                if len(rows) >= INDEX_BATCH_ROWS:
+                    cursor.executemany("INSERT INTO properties VALUES (?, ?, ?)", rows)
+                    rows = []
+                count += 1
+        if rows:
+            cursor.executemany("INSERT INTO properties VALUES (?, ?, ?)", rows)
+        cursor.execute("UPDATE dumps SET manager = ?, units = ?, digest = ? WHERE id = ?",
+                       (header.get("Manager"), count, dump_digest, dump_id))
+        return count
+
+    def _delete_dump(self, dump_id: int):
+        self.db.execute("DELETE FROM properties WHERE unit_id IN (SELECT id FROM units WHERE dump_id = ?)", (dump_id,))
+        self.db.execute("DELETE FROM units WHERE dump_id = ?", (dump_id,))
+        self.db.execute("DELETE FROM dumps WHERE id = ?", (dump_id,))
+
+    def add_paths(self, paths: Iterable[str]) -> Dict[str, int]:
+        """Index every dump found under paths; returns unit counts by dump path."""
+        return {path: self.add_dump(path) for path in find_dumps(paths)}
+
+    def prune(self, stored_runs: Iterable[str] = ()) -> int:
+        """Drop dumps whose files no longer exist; returns the number removed.
+
+        Dumps of the run directories named in stored_runs are kept, since
+        they can be materialized from the result store.
+        """
+        stored_runs = set(stored_runs)
+        with self.lock, self.db:
+            missing = [dump_id for dump_id, path in self.db.execute("SELECT id, path FROM dumps").fetchall()
+                       if not os.path.exists(path) and os.path.basename(os.path.dirname(path)) not in stored_runs]
+            for dump_id in missing:
+                self._delete_dump(dump_id)
+            return len(missing)
+
+    def runs(self, host: Optional[str] = None) -> List[Tuple[str, str, int]]:
+        """Return (host, run, unit count) for each indexed dump, oldest run first."""
+        sql = "SELECT host, run, units FROM dumps"
+        params: Tuple = ()
+        if host is not None:
+            sql += " WHERE host = ?"
+            params = (host,)
+        with self.lock:
+            return self.db.execute(sql + " ORDER BY run, host", params).fetchall()
+
+    def find(self, unit: Optional[str] = None, key: Optional[str] = None, value: Optional[str] = None,
+             host: Optional[str] = None, run: Optional[str] = None, latest: bool = False,
+             ) -> List[Tuple[str, str, str, str, str]]:
+        """Return (host, run, unit, key, value) rows matching the filters.
+
+        unit, key and value are exact matches and may contain * wildcards.
+        Without key or value, rows carry the unit's active state. latest
+        restricts the search to each host's most recent run.
+        """
+        params: List[str] = []
+        dump_where = []
+        for column, pattern in (("host", host), ("run", run)):
+            if pattern is not None:
+                dump_where.append(self._match(column, pattern, params))
+        if latest:
+            dump_where.append("run = (SELECT MAX(run) FROM dumps latest WHERE latest.host = dumps.host)")
+        where = []
+        if dump_where:
+            where.append("u.dump_id IN (SELECT id FROM dumps WHERE " + " AND ".join(dump_where) + ")")
+        if unit is not None:
+            where.append(self._match("u.name", unit, params))
+
+        if key is None and value is None:
+            sql = ("SELECT d.host, d.run, u.name, 'Unit Active State', COALESCE(u.active_state, '') "
+                   "FROM units u JOIN dumps d ON d.id = u.dump_id")
+        else:
+            sql = ("SELECT d.host, d.run, u.name, k.key, s.value FROM units u "
+                   "JOIN dumps d ON d.id = u.dump_id JOIN properties p ON p.unit_id = u.id "
+                   "JOIN keys k ON k.id = p.key_id JOIN strings s ON s.id = p.value_id")
+            if key is not None:
+                where.append(self._match("k.key", key, params))
+            if value is not None:
+                where.append(self._match("s.value", value, params))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self.lock:
+            return self.db.execute(sql + " ORDER BY d.host, d.run, u.name, p.rowid"
+                                   if key is not None or value is not None else
+                                   sql + " ORDER BY d.host, d.run, u.name", params).fetchall()
+
+    @staticmethod
+    def _match(column: str, pattern: str, params: List[str]) -> str:
+        params.append(pattern)
+        return f"{column} GLOB ?" if "*" in pattern else f"{column} = ?"
+
+    def unit_properties(self, host: str, run: str, unit: str) -> List[Tuple[str, str]]:
+        """Return the (key, value) properties of one unit in one run, in dump order."""
+        with self.lock:
+            return self.db.execute(
+                "SELECT k.key, s.value FROM dumps d JOIN units u ON u.dump_id = d.id "
+                "JOIN properties p ON p.unit_id = u.id JOIN keys k ON k.id = p.key_id "
+                "JOIN strings s ON s.id = p.value_id WHERE d.host = ? AND d.run = ? AND u.name = ? "
+                "ORDER BY p.rowid", (host, run, unit)).fetchall()
+
+    def latest_run(self, host: Optional[str] = None) -> Optional[str]:
+        """Return the most recent indexed run, optionally of one host."""
+        sql, params = "SELECT MAX(run) FROM dumps", ()
+        if host is not None:
+            sql, params = sql + " WHERE host = ?", (host,)
+        with self.lock:
+            return self.db.execute(sql, params).fetchone()[0]
+
+    def previous_run(self, host: str, run: str) -> Optional[str]:
+        """Return the host's last indexed run before run."""
+        with self.lock:
+            return self.db.execute("SELECT MAX(run) FROM dumps WHERE host = ? AND run < ?", (host, run)).fetchone()[0]
+
+    def run_hosts(self, run: str) -> List[str]:
+        """Return the hosts indexed for one run."""
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT host FROM dumps WHERE run = ? ORDER BY host", (run,))]
+
+    def diff(self, targets: List[Tuple[str, Optional[str]]]) -> "UnitDiff":
+        """Compare the units of two or more (host, run) dumps; run None means the host's latest.
+
+        Dumps with equal digests are identical without looking at their units.
+        Otherwise unit digests are compared, and properties are read only for
+        the units whose digests differ or that are missing from some dumps.
+        Targets naming the same dump (e.g. web and web@<latest>) are compared
+        once; ValueError is raised when fewer than two distinct dumps remain.
+        """
+        dumps = []
+        with self.lock:
+            for host, run in targets:
+                if run is None:
+                    run = self.db.execute("SELECT MAX(run) FROM dumps WHERE host = ?", (host,)).fetchone()[0]
+                row = self.db.execute("SELECT id, digest, units FROM dumps WHERE host = ? AND run = ?",
+                                      (host, run)).fetchone()
+                if row is None:
+                    raise KeyError(f"no indexed dump for {host}" + (f"@{run}" if run else ""))
+                if all(dump[1] != row[0] for dump in dumps):
+                    dumps.append((f"{host}@{run}",) + row)
+            if len(dumps) < 2:
+                raise ValueError("need at least two distinct dumps to compare")
+
+            labels = [dump[0] for dump in dumps]
+            result = UnitDiff(labels)
+            if len({dump[2] for dump in dumps}) == 1 and len({dump[3] for dump in dumps}) == 1:
+                result.compared = result.identical = dumps[0][3]
+                return result
+
+            units: Dict[str, Dict[str, Tuple[int, int]]] = {}
+            label_of = {dump[1]: dump[0] for dump in dumps}
+            placeholders = ", ".join("?" * len(dumps))
+            for name, dump_id, unit_id, digest in self.db.execute(
+                    f"SELECT name, dump_id, id, digest FROM units WHERE dump_id IN ({placeholders})",
+                    [dump[1] for dump in dumps]):
+                units.setdefault(name, {})[label_of[dump_id]] = (unit_id, digest)
+
+            result.compared = len(units)
+            for name in sorted(units):
+                present = units[name]
+                if len(present) == len(labels) and len({digest for _, digest in present.values()}) == 1:
+                    result.identical += 1
+                    continue
+                values = {label: self._unit_values(unit_id) for label, (unit_id, _) in present.items()}
+                changes = []
+                for key in sorted(set().union(*values.values())):
+                    per_label = {label: values[label].get(key, []) for label in labels if label in present}
+                    if len({tuple(items) for items in per_label.values()}) > 1:
+                        changes.append((key, per_label))
+                result.units.append((name, [label for label in labels if label not in present], changes))
+            return result
+
+    def _unit_values(self, unit_id: int) -> Dict[str, List[str]]:
+        values: Dict[str, List[str]] = {}
+        rows = self.db.execute(
+            "SELECT k.key, s.value FROM properties p JOIN keys k ON k.id = p.key_id "
+            "JOIN strings s ON s.id = p.value_id WHERE p.unit_id = ?", (unit_id,))
+        for key, value in normalize_properties(rows):
+            values.setdefault(key, []).append(value)
+        return values
+
+
+class UnitDiff:
+    """Units that differ between dumps labelled host@run.
+
+    units holds (unit name, labels of the dumps missing the unit, changes)
+    where changes lists (key, {label: values}) for each differing property.
+    """
+
+    def __init__(self, labels: List[str]):
+        self.labels = labels
+        self.compared = 0
+        self.identical = 0
+        self.units: List[Tuple[str, List[str], List[Tuple[str, Dict[str, List[str]]]]]] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "targets": self.labels,
+            "compared": self.compared,
+            "identical": self.identical,
+            "units": [{"unit": name, "missing": missing,
+                       "properties": [{"key": key, "values": values} for key, values in changes]}
+                      for name, missing, changes in self.units],
+        }
+
+    def to_text(self) -> str:
+        lines = [f"Unit differences: {', '.join(self.labels)}",
+                 f"{self.compared} units compared, {self.identical} identical, {len(self.units)} differ"]
+        width = max(len(label) for label in self.labels)
+        for name, missing, changes in self.units:
+            lines.append("")
+            lines.append(name)
+            if missing:
+                lines.append(f"    missing on {', '.join(missing)}")
+            for key, values in changes:
+                lines.append(f"    {key}:")
+                for label, items in values.items():
+                    lines.append(f"        {label.ljust(width)}  {', '.join(items) if items else '(unset)'}")
+        return "\n".join(lines) + "\n"
+
+
+class UnitTiming:
+    """Activation window of one unit in seconds, and the units it is ordered After."""
+    __slots__ = ("name", "names", "after", "activating", "active")
+
+    def __init__(self, name: str, names: List[str], after: List[str], activating: float, active: float):
+        self.name = name
+        self.names = names
+        self.after = after
+        self.activating = activating
+        self.active = active
+
+    @property
+    def duration(self) -> float:
+        return self.active - self.activating
+
+
+def _timing_entry(name: str, names: List[str], after: List[str],
+                  activating: Optional[float], active: Optional[float]) -> Optional[UnitTiming]:
+    # Only units that became active during this boot are placed on the timeline
+    if not active:
+        return None
+    return UnitTiming(name, names or [name], after, activating or active, active)
+
+
+def parse_fingerprint(output: str) -> Optional[str]:
+    """Return "<boot id>:<unit file hash>" from FINGERPRINT_COMMAND output, or None if incomplete."""
+    lines = output.split("\n")
+    if len(lines) < 2 or not lines[0].strip() or not lines[1].strip():
+        return None
+    return f"{lines[0].strip()}:{lines[1].split()[0]}"
+
+
+def load_fingerprints(path: str) -> Dict[str, dict]:
+    """Read the fingerprint cache; a missing or unreadable cache is empty."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            fingerprints = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return fingerprints if isinstance(fingerprints, dict) else {}
+
+
+def save_fingerprints(path: str, fingerprints: Dict[str, dict]):
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+    os.replace(path + ".part", path)
+
+
+def reusable_run(cached: Optional[dict], fingerprint: Optional[str], host_addr: str) -> Optional[str]:
+    """Return the run a host's fingerprint cache entry names if the host is unchanged since, else None.
+
+    The host is unchanged when its current fingerprint equals the cached one
+    and it is still reached at the same address.
+    """
+    if (cached and fingerprint and cached.get("fingerprint") == fingerprint
+            and cached.get("address") == host_addr and cached.get("run")):
+        return cached["run"]
+    return None
+
+
+def update_fingerprints(cached: Dict[str, dict], hosts: Dict[str, str], fingerprints: Dict[str, Optional[str]],
+                        finished: Iterable[str], run: str) -> Dict[str, dict]:
+    """Return the fingerprint cache with an entry naming run for every finished host with a fingerprint."""
+    updated = dict(cached)
+    for hostname in finished:
+        fingerprint = fingerprints.get(hostname)
+        if fingerprint and hostname in hosts:
+            updated[hostname] = {"fingerprint": fingerprint, "address": hosts[hostname], "run": run}
+    return updated
+
+
+def reuse_host_results(output_dir: str, hostname: str, run: str, local_dir: str, timestamp: str) -> List[str]:
+    """Copy a host's files of an earlier run into local_dir under this run's timestamp.
+
+    Files come from the run's folder in output_dir, or from the result store
+    once the folder was compacted. Unit timing is optional, as when
+    collecting. Returns the copied paths; on error (OSError, KeyError,
+    ValueError or sqlite3.Error) the files copied so far are removed.
+    """
+    run_dir = RUN_DIR_PREFIX + run
+    store_path = os.path.join(output_dir, STORE_FILENAME)
+    store = None
+    copied: List[str] = []
+    try:
+        for suffix in (DUMP_SUFFIX, PLOT_SUFFIX, TIMING_SUFFIX):
+            name = f"{hostname}_{run}{suffix}"
+            source = os.path.join(output_dir, run_dir, name)
+            target = os.path.join(local_dir, f"{hostname}_{timestamp}{suffix}")
+            if os.path.isfile(source):
+                # Hard links cost no space; the earlier file is never modified
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copyfile(source, target)
+            else:
+                if store is None and os.path.exists(store_path):
+                    store = ResultStore(store_path)
+                try:
+                    if store is None:
+                        raise KeyError(f"{run_dir}/{name} not found")
+                    data = store.read_file(run_dir, name)
+                except KeyError:
+                    if suffix == TIMING_SUFFIX:
+                        continue
+                    raise
+                with open(target + ".part", "wb") as f:
+                    f.write(data)
+                os.replace(target + ".part", target)
+            copied.append(target)
+        return copied
+    except (OSError, KeyError, ValueError, sqlite3.Error):
+        for path in copied:
+            os.remove(path)
+        raise
+    finally:
+        if store is not None:
+            store.close()
+
+
+def parse_unit_timing(lines: Iterable[str]) -> Tuple[Dict[str, UnitTiming], Dict[str, float]]:
+    """Parse TIMING_COMMAND output into units by name and the manager's timestamps in seconds."""
+    units: Dict[str, UnitTiming] = {}
+    manager: Dict[str, float] = {}
+    block: Dict[str, str] = {}
+
+    def finish_block():
+        if "Id" in block:
+            unit = _timing_entry(block["Id"], block.get("Names", "").split(), block.get("After", "").split(),
+                                 int(block.get("InactiveExitTimestampMonotonic") or 0) / 1e6,
+                                 int(block.get("ActiveEnterTimestampMonotonic") or 0) / 1e6)
+            if unit:
+                units[unit.name] = unit
+        else:
+            for key, value in block.items():
+                if key.endswith("TimestampMonotonic") and value.isdigit():
+                    manager[key[:-len("TimestampMonotonic")].lower()] = int(value) / 1e6
+        block.clear()
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            finish_block()
+            continue
+        key, _, value = line.partition("=")
+        block[key] = value
+    finish_block()
+    return units, manager
+
+
+def parse_dump_timestamp(value: str) -> Optional[float]:
+    """Convert a dump timestamp such as "Mon 2024-01-01 10:00:05 UTC" to epoch seconds."""
+    parts = value.split()
+    if len(parts) < 3:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f"):
+        try:
+            return datetime.strptime(f"{parts[1]} {parts[2]}", fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def read_unit_timing(path: str) -> Tuple[Dict[str, UnitTiming], Dict[str, float]]:
+    """Read unit timing from a *_timing.log file, or fall back to a dump's timestamps.
+
+    Dump timestamps have one second resolution, so timing taken from dumps of
+    runs collected before *_timing.log existed is coarse.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        if not path.endswith(DUMP_SUFFIX):
+            return parse_unit_timing(f)
+        units: Dict[str, UnitTiming] = {}
+        for record in iter_dump_units(f):
+            unit = _timing_entry(record.name, record.values("Name"), record.values("After"),
+                                 parse_dump_timestamp(record.get("Inactive Exit Timestamp", "")),
+                                 parse_dump_timestamp(record.get("Active Enter Timestamp", "")))
+            if unit:
+                units[unit.name] = unit
+        return units, {}
+
+
+def collect_results(paths: Iterable[str]) -> Dict[str, Dict[str, str]]:
+    """Group collected files under paths by host@run, e.g. {"main@2024...": {"dump": path, "timing": path}}."""
+    results: Dict[str, Dict[str, str]] = {}
+    for path in paths:
+        files = [path] if os.path.isfile(path) else [
+            os.path.join(directory, name) for directory, _, names in os.walk(path) for name in names]
+        for file_path in sorted(files):
+            parsed = parse_result_name(file_path)
+            if parsed:
+                results.setdefault(f"{parsed[0]}@{parsed[1]}", {})[parsed[2]] = file_path
+    return results
+
+
+def receive_members(chunks: Iterable[bytes], outputs: Dict[str, str]) -> Tuple[Dict[str, int], int]:
+    """Decompress a stream of concatenated gzip members into the files of outputs ({name: path}).
+
+    The stream holds one member per output, in order, then a status member
+    reading "name=<exit code> ..." for each of them. Members are written to
+    "<path>.part" and renamed once complete, so a truncated stream leaves no
+    partial file. Returns the decompressed size of each output whose member is
+    complete and whose command exited 0, and the compressed bytes received;
+    the files of the other outputs are removed.
+    """
+    paths = list(outputs.values())
+    member = 0
+    received = 0
+    sizes: List[int] = []
+    status_text = b""
+    decompressor = zlib.decompressobj(wbits=31)
+    out = None
+    try:
+        for chunk in chunks:
+            received += len(chunk)
+            while chunk:
+                data = decompressor.decompress(chunk)
+                if member < len(paths):
+                    if out is None:
+                        out = open(paths[member] + ".part", "wb")
+                    out.write(data)
+                else:
+                    status_text += data
+                if not decompressor.eof:
+                    break
+                chunk = decompressor.unused_data
+                if out is not None:
+                    sizes.append(out.tell())
+                    out.close()
+                    os.replace(paths[member] + ".part", paths[member])
+                    out = None
+                member += 1
+                decompressor = zlib.decompressobj(wbits=31)
+    finally:
+        if out is not None:
+            out.close()
+            os.remove(out.name)
+
+    status = dict(item.split("=", 1) for item in status_text.decode(errors="replace").split() if "=" in item)
+    collected: Dict[str, int] = {}
+    for index, (name, path) in enumerate(outputs.items()):
+        if index < len(sizes) and status.get(name) == "0":
+            collected[name] = sizes[index]
+        elif os.path.exists(path):
+            os.remove(path)
+    return collected, received
+
+
+class BootAnalysis:
+    """Critical path, per-unit slack and slowest units of one boot.
+
+    Built from the After= DAG of the units that became active during boot, in
+    time linear in units plus dependencies. Times are seconds relative to the
+    start of userspace (or to the first unit activation when that is unknown).
+    The slack of a unit is how much later it could have become active without
+    delaying the boot target, if every other unit took as long after its
+    dependencies as it did in this boot; units the target does not wait for
+    have none.
+    """
+
+    def __init__(self, units: Dict[str, UnitTiming], manager: Optional[Dict[str, float]] = None,
+                 target: str = BOOT_TARGET, top: int = BOOT_TOP_UNITS):
+        manager = manager or {}
+        by_name: Dict[str, UnitTiming] = {}
+        for unit in units.values():
+            for name in unit.names:
+                by_name.setdefault(name, unit)
+            by_name[unit.name] = unit
+
+        self.units = len(units)
+        self.critical_path: List[UnitTiming] = []
+        self.slack: Dict[str, float] = {}
+        self.top: List[UnitTiming] = heapq.nlargest(top, units.values(), key=lambda unit: unit.duration)
+        goal = by_name.get(target) or max(units.values(), key=lambda unit: unit.active, default=None)
+        self.target = goal.name if goal else target
+        self.origin = manager.get("userspace") or min((unit.activating for unit in units.values()), default=0.0)
+        self.boot_time = (goal.active if goal else 0.0) - self.origin
+        if goal is None:
+            return
+
+        # Timed predecessors of each unit, by canonical name
+        preds: Dict[str, List[str]] = {}
+        for unit in units.values():
+            deps = preds[unit.name] = []
+            for name in unit.after:
+                dep = by_name.get(name)
+                if dep is not None and dep is not unit and dep.name not in deps:
+                    deps.append(dep.name)
+
+        # Units the goal waits for, directly or transitively
+        ancestors = {goal.name}
+        stack = [goal.name]
+        while stack:
+            for dep in preds[stack.pop()]:
+                if dep not in ancestors:
+                    ancestors.add(dep)
+                    stack.append(dep)
+
+        # Topological order of that subgraph (Kahn); units on cycles are left out
+        waiting = {name: 0 for name in ancestors}
+        for name in ancestors:
+            for dep in preds[name]:
+                waiting[dep] += 1
+        order = [name for name, count in waiting.items() if count == 0]
+        for name in order:
+            for dep in preds[name]:
+                waiting[dep] -= 1
+                if waiting[dep] == 0:
+                    order.append(dep)
+
+        # Latest finish, in reverse topological order: a unit's dependencies must
+        # be active by the time it has to become ready, which is its latest finish
+        # minus the time it took after its last dependency was active
+        latest = {goal.name: goal.active}
+        for name in order:
+            unit = units[name]
+            finish = latest.get(name, goal.active)
+            self.slack[name] = max(0.0, finish - unit.active)
+            ready = max((units[dep].active for dep in preds[name] if units[dep].active <= unit.activating),
+                        default=unit.activating)
+            start = finish - (unit.active - ready)
+            for dep in preds[name]:
+                if start < latest.get(dep, goal.active):
+                    latest[dep] = start
+
+        # Critical chain: from the goal, follow the dependency that became active last
+        chain = [goal]
+        visited = {goal.name}
+        while True:
+            current = chain[-1]
+            candidates = [units[dep] for dep in preds[current.name]
+                          if dep not in visited and units[dep].active <= current.activating]
+            if not candidates:
+                break
+            previous = max(candidates, key=lambda unit: unit.active)
+            visited.add(previous.name)
+            chain.append(previous)
+        self.critical_path = chain[::-1]
+
+    def to_dict(self) -> dict:
+        def entry(unit: UnitTiming) -> dict:
+            return {"unit": unit.name, "activating": round(unit.activating - self.origin, 6),
+                    "active": round(unit.active - self.origin, 6), "duration": round(unit.duration, 6),
+                    "slack": round(self.slack[unit.name], 6) if unit.name in self.slack else None}
+
+        return {
+            "target": self.target,
+            "boot_time": round(self.boot_time, 6),
+            "units": self.units,
+            "critical_path": [entry(unit) for unit in self.critical_path],
+            "top": [entry(unit) for unit in self.top],
+            "slack": {name: round(value, 6) for name, value in sorted(self.slack.items())},
+        }
+
+    def to_text(self, label: str = "") -> str:
+        lines = [f"Boot timing{' for ' + label if label else ''}: {self.target} reached after "
+                 f"{self.boot_time:.3f}s ({self.units} units)", "", "Critical path:"]
+        for unit in self.critical_path:
+            lines.append(f"    @{unit.activating - self.origin:9.3f}s  +{unit.duration:7.3f}s  {unit.name}")
+        lines += ["", f"Top {len(self.top)} units by activation time:"]
+        critical = {unit.name for unit in self.critical_path}
+        for unit in self.top:
+            if unit.name in critical:
+                note = "on critical path"
+            elif unit.name in self.slack:
+                note = f"slack {self.slack[unit.name]:.3f}s"
+            else:
+                note = f"not waited for by {self.target}"
+            lines.append(f"    {unit.duration:9.3f}s  {unit.name}  ({note})")
+        return "\n".join(lines) + "\n"
+
+
+def split_dump(data: bytes) -> Tuple[List[bytes], bytes]:
+    """Split a dump into sections with volatile values masked, plus those values.
+
+    join_dump() reverses the split byte for byte. Sections start at each
+    "-> " line; values are newline-separated in dump order.
+    """
+    sections: List[bytes] = []
+    current: List[bytes] = []
+    values: List[bytes] = []
+    for line in data.splitlines(keepends=True):
+        if line.startswith(b"-> ") and current:
+            sections.append(b"".join(current))
+            current = []
+        body = line.rstrip(b"\r\n")
+        key, sep, value = body.partition(b": ")
+        if sep and is_volatile(key.strip().decode("latin-1")):
+            values.append(value)
+            line = key + sep + STORE_MARK + line[len(body):]
+        current.append(line)
+    if current:
+        sections.append(b"".join(current))
+    return sections, b"\n".join(values)
+
+
+def join_dump(sections: Iterable[bytes], values: bytes) -> bytes:
+    """Rebuild a dump from split_dump() output."""
+    remaining = iter(values.split(b"\n"))
+    return b"".join(line.replace(STORE_MARK, next(remaining), 1) if STORE_MARK in line else line
+                    for section in sections for line in section.splitlines(keepends=True))
+
+
+class ResultStore:
+    """Content-addressed, deduplicated store of analysis run directories.
+
+    Objects are zlib-compressed blobs keyed by the BLAKE2b hash of their
+    content. Each run has a manifest mapping its file names to objects: dumps
+    are stored as a recipe (the list of their section objects) plus one
+    object with their volatile values, other files as a single object. A run
+    only costs the space of sections and files no earlier run had.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(STORE_SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _put(self, data: bytes) -> Tuple[str, int]:
+        """Store data once; returns its id and the compressed bytes added (0 if already stored)."""
+        object_id = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if self.db.execute("SELECT 1 FROM objects WHERE id = ?", (object_id,)).fetchone():
+            return object_id, 0
+        blob = zlib.compress(data, 6)
+        self.db.execute("INSERT INTO objects (id, size, data) VALUES (?, ?, ?)", (object_id, len(data), blob))
+        return object_id, len(blob)
+
+    def _get(self, object_id: str) -> bytes:
+        row = self.db.execute("SELECT data FROM objects WHERE id = ?", (object_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"object {object_id} missing from store")
+        return zlib.decompress(row[0])
+
+    def add_run(self, run_dir: str) -> Dict[str, int]:
+        """Store every file of a run directory; returns file, byte and new stored byte counts.
+
+        Files of an already stored run that are no longer on disk stay in its manifest.
+        """
+        run = os.path.basename(os.path.normpath(run_dir))
+        manifest = {"run": run, "files": {}}
+        stats = {"files": 0, "bytes": 0, "stored_bytes": 0}
+        with self.lock, self.db:
+            row = self.db.execute("SELECT manifest FROM manifests WHERE run = ?", (run,)).fetchone()
+            if row:
+                manifest = json.loads(row[0])
+            for name in sorted(os.listdir(run_dir)):
+                path = os.path.join(run_dir, name)
+                if not os.path.isfile(path):
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                entry = {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+                if name.endswith(DUMP_SUFFIX) and STORE_MARK not in data:
+                    sections, values = split_dump(data)
+                    ids = []
+                    for section in sections:
+                        object_id, added = self._put(section)
+                        ids.append(object_id)
+                        stats["stored_bytes"] += added
+                    entry["recipe"], added = self._put("\n".join(ids).encode())
+                    stats["stored_bytes"] += added
+                    entry["values"], added = self._put(values)
+                else:
+                    entry["object"], added = self._put(data)
+                stats["stored_bytes"] += added
+                stats["files"] += 1
+                stats["bytes"] += len(data)
+                manifest["files"][name] = entry
+            self.db.execute("INSERT OR REPLACE INTO manifests (run, manifest) VALUES (?, ?)",
+                            (run, json.dumps(manifest, sort_keys=True)))
+        return stats
+
+    def runs(self) -> List[str]:
+        """Return the stored run directory names, oldest first."""
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT run FROM manifests ORDER BY run")]
+
+    def manifest(self, run: str) -> dict:
+        with self.lock:
+            row = self.db.execute("SELECT manifest FROM manifests WHERE run = ?", (run,)).fetchone()
+        if row is None:
+            raise KeyError(f"run {run} is not in the store")
+        return json.loads(row[0])
+
+    def read_file(self, run: str, name: str) -> bytes:
+        """Return the content of one stored file, checked against its SHA-256."""
+        entry = self.manifest(run)["files"][name]
+        with self.lock:
+            if "object" in entry:
+                data = self._get(entry["object"])
+            else:
+                ids = self._get(entry["recipe"]).decode().split("\n")
+                data = join_dump((self._get(object_id) for object_id in ids), self._get(entry["values"]))
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            raise ValueError(f"{run}/{name} does not match its stored checksum")
+        return data
+
+    def materialize(self, run: str, dest: str) -> str:
+        """Recreate a stored run directory under dest; returns its path.
+
+        Files already present with the right content are left alone.
+        """
+        run_dir = os.path.join(dest, run)
+        os.makedirs(run_dir, exist_ok=True)
+        for name, entry in self.manifest(run)["files"].items():
+            path = os.path.join(run_dir, name)
+            if os.path.isfile(path) and os.path.getsize(path) == entry["size"]:
+                with open(path, "rb") as f:
+                    if hashlib.sha256(f.read()).hexdigest() == entry["sha256"]:
+                        continue
+            with open(path + ".part", "wb") as f:
+                f.write(self.read_file(run, name))
+            os.replace(path + ".part", path)
+        return run_dir
+
+    def compact(self, output_dir: str, keep: int) -> List[str]:
+        """Remove all but the newest keep run directories once they are stored and verified.
+
+        Runs are stored first if needed, and each file is only deleted after its
+        stored copy has been read back and matched. Returns the removed directories.
+        """
+        run_dirs = sorted(name for name in os.listdir(output_dir)
+                          if name.startswith(RUN_DIR_PREFIX) and os.path.isdir(os.path.join(output_dir, name)))
+        removed = []
+        for name in run_dirs[:max(0, len(run_dirs) - keep)]:
+            run_dir = os.path.join(output_dir, name)
+            self.add_run(run_dir)
+            for file_name, entry in self.manifest(name)["files"].items():
+                path = os.path.join(run_dir, file_name)
+                if not os.path.isfile(path):
+                    continue
+                with open(path, "rb") as f:
+                    if hashlib.sha256(f.read()).hexdigest() != entry["sha256"]:
+                        continue
+                # Raises unless the stored copy reads back with the same checksum
+                self.read_file(name, file_name)
+                os.remove(path)
+            if not os.listdir(run_dir):
+                os.rmdir(run_dir)
+                removed.append(run_dir)
+        return removed
+
+
+def rolling_regressions(values: Sequence[float], window: int = HISTORY_WINDOW, start: int = 0,
+                        min_runs: int = HISTORY_MIN_RUNS) -> Iterator[Tuple[int, float, float]]:
+    """Yield (position, baseline median, threshold) of every value from start on above its rolling baseline.
+
+    The baseline of a value is the previous window values, kept sorted while
+    sliding along the series, so each position costs one insertion and one
+    removal. NaN marks a run without a sample: it is never flagged and is
+    not part of any baseline.
+    """
+    ordered: List[float] = []
+    recent: deque = deque()
+    for position, value in enumerate(values):
+        count = len(ordered)
+        if position >= start and count >= min_runs:
+            median = (ordered[(count - 1) // 2] + ordered[count // 2]) / 2
+            lower, upper = ordered[count // 4], ordered[(3 * count) // 4]
+            threshold = max(upper + REGRESSION_IQR_FACTOR * (upper - lower), median + REGRESSION_MIN_SECONDS)
+            if value > threshold:
+                yield position, median, threshold
+        if value == value:
+            insort(ordered, value)
+            recent.append(value)
+            if len(recent) > window:
+                del ordered[bisect_left(ordered, recent.popleft())]
+
+
+class Regression:
+    """A unit whose activation time in one run went past its rolling baseline."""
+    __slots__ = ("host", "run", "unit", "duration", "baseline", "threshold")
+
+    def __init__(self, host: str, run: str, unit: str, duration: float, baseline: float, threshold: float):
+        self.host = host
+        self.run = run
+        self.unit = unit
+        self.duration = duration
+        self.baseline = baseline
+        self.threshold = threshold
+
+    @property
+    def excess(self) -> float:
+        return self.duration - self.baseline
+
+    def to_dict(self) -> dict:
+        return {"host": self.host, "run": self.run, "unit": self.unit, "duration": round(self.duration, 6),
+                "baseline": round(self.baseline, 6), "threshold": round(self.threshold, 6)}
+
+    def to_text(self) -> str:
+        return (f"{self.host}@{self.run}  {self.unit}: {self.duration:.3f}s, baseline {self.baseline:.3f}s "
+                f"(+{self.excess:.3f}s, threshold {self.threshold:.3f}s)")
+
+
+class BootHistory:
+    """SQLite time series of per-host, per-unit activation times, one row per host and run.
+
+    Unit names are interned; each row stores the run's activation times as a
+    packed array ordered by its layout's unit ids, with the boot time as BOOT_SERIES.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(HISTORY_SCHEMA)
+        self.name_ids: Dict[str, int] = {}
+        self._load_names()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _load_names(self):
+        self.name_ids = dict(self.db.execute("SELECT name, id FROM names"))
+
+    def _name_id(self, name: str) -> int:
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            # Another connection may have added the name since the cache was loaded
+            row = self.db.execute("SELECT id FROM names WHERE name = ?", (name,)).fetchone()
+            name_id = self.name_ids[name] = row[0] if row else self.db.execute(
+                "INSERT INTO names (name) VALUES (?)", (name,)).lastrowid
+        return name_id
+
+    def add_run(self, host: str, run: str, units: Dict[str, UnitTiming], boot_time: float) -> int:
+        """Record (or replace) the activation times of one host's run; returns the number of samples."""
+        with self.lock:
+            try:
+                with self.db:
+                    return self._insert_run(host, run, units, boot_time)
+            except sqlite3.Error:
+                # Ids cached during the rolled back transaction may not exist
+                self._load_names()
+                raise
+
+    def _insert_run(self, host: str, run: str, units: Dict[str, UnitTiming], boot_time: float) -> int:
+        ids = array("I", [self._name_id(BOOT_SERIES)])
+        durations = array("f", [boot_time])
+        for name, unit in units.items():
+            ids.append(self._name_id(name))
+            durations.append(unit.duration)
+        layout = ids.tobytes()
+        row = self.db.execute("SELECT id FROM layouts WHERE unit_ids = ?", (layout,)).fetchone()
+        layout_id = row[0] if row else self.db.execute(
+            "INSERT INTO layouts (unit_ids) VALUES (?)", (layout,)).lastrowid
+        self.db.execute("INSERT OR REPLACE INTO samples (host, run, layout_id, durations) VALUES (?, ?, ?, ?)",
+                        (host, run, layout_id, durations.tobytes()))
+        return len(ids)
+
+    def hosts(self) -> List[str]:
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT DISTINCT host FROM samples ORDER BY host")]
+
+    def series(self, host: str, until: Optional[str] = None, limit: Optional[int] = None,
+               units: Optional[Iterable[str]] = None) -> Tuple[List[str], Dict[str, array]]:
+        """Return a host's runs, oldest first, and one array of activation times per series.
+
+        Only the last limit runs up to and including run until are read. Runs in
+        which a unit has no sample hold NaN. units restricts the series returned.
+        """
+        query = "SELECT run, layout_id, durations FROM samples WHERE host = ?"
+        params: list = [host]
+        if until:
+            query += " AND run <= ?"
+            params.append(until)
+        query += " ORDER BY run DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self.lock:
+            rows = self.db.execute(query, params).fetchall()[::-1]
+            layouts = {}
+            for layout_id in {row[1] for row in rows}:
+                ids = layouts[layout_id] = array("I")
+                ids.frombytes(self.db.execute("SELECT unit_ids FROM layouts WHERE id = ?", (layout_id,)).fetchone()[0])
+            names = {name_id: name for name, name_id in self.name_ids.items()}
+            if any(name_id not in names for ids in layouts.values() for name_id in ids):
+                # Units added by another connection since the cache was loaded
+                self._load_names()
+                names = {name_id: name for name, name_id in self.name_ids.items()}
+        wanted = set(units) if units is not None else None
+
+        columns: Dict[int, array] = {}
+        empty = array("d", [float("nan")]) * len(rows)
+        for position, (_, layout_id, duration_blob) in enumerate(rows):
+            ids = layouts[layout_id]
+            durations = array("f")
+            durations.frombytes(duration_blob)
+            for name_id, duration in zip(ids, durations):
+                column = columns.get(name_id)
+                if column is None:
+                    if wanted is not None and names[name_id] not in wanted:
+                        continue
+                    column = columns[name_id] = array("d", empty)
+                column[position] = duration
+        return [row[0] for row in rows], {names[name_id]: column for name_id, column in columns.items()}
+
+    def regressions(self, host: Optional[str] = None, run: Optional[str] = None, every_run: bool = False,
+                    window: int = HISTORY_WINDOW) -> List[Regression]:
+        """Find units that regressed against their rolling baseline, by run and host, worst first.
+
+        By default only each host's latest run (or run) is checked, which reads
+        window + 1 rows per host; every_run scans the whole history.
+        """
+        found = []
+        for name in [host] if host else self.hosts():
+            runs, series = self.series(name, until=run, limit=None if every_run else window + 1)
+            if not runs or (run and not every_run and runs[-1] != run):
+                continue
+            start = 0 if every_run else len(runs) - 1
+            for unit, values in series.items():
+                for position, baseline, threshold in rolling_regressions(values, window, start):
+                    found.append(Regression(name, runs[position], unit, values[position], baseline, threshold))
+        found.sort(key=lambda regression: (regression.run, regression.host, -regression.excess))
+        return found
+
+
+def run_on_daemon_threads(func: Callable, items: Iterable, max_workers: int,
+                          ) -> Iterator[Tuple[object, object, Optional[BaseException]]]:
+    """Run func(item) on at most max_workers daemon threads, yielding (item, result, error) as each call finishes.
+
+    ThreadPoolExecutor threads are joined at interpreter exit, so a remote
+    command still running in one would hold up quitting; daemon threads are
+    not. Every item is yielded exactly once: a call that raised has result
+    None and the exception as error, and the calls still running are waited
+    for as usual.
+    """
+    items = list(items)
+    finished: "queue.Queue[tuple]" = queue.Queue()
+    slots = threading.Semaphore(max(1, max_workers))
+
+    def run(item):
+        try:
+            outcome = (item, func(item), None)
+        except BaseException as e:
+            outcome = (item, None, e)
+        slots.release()
+        finished.put(outcome)
+
+    def start_all():
+        for item in items:
+            slots.acquire()
+            threading.Thread(target=run, args=(item,), daemon=True).start()
+
+    threading.Thread(target=start_all, daemon=True).start()
+    for _ in items:
+        yield finished.get()
@@ -14,13 +14,67 @@ import os
 import datetime
 import json
 import logging
+import queue
+import shlex
+import signal
+import socket
+import sqlite3
+import time
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from systemd_analyzer_core import (BOOT_SERIES, FINGERPRINT_COMMAND, FINGERPRINT_FILENAME,
+                                   BootAnalysis, BootHistory, DumpIndex, HISTORY_FILENAME, HISTORY_WINDOW,
+                                   INDEX_FILENAME, Regression, ResultStore, STORE_FILENAME, TIMING_COMMAND,
+                                   collect_results, load_fingerprints, parse_fingerprint, read_unit_timing,
+                                   receive_members, reusable_run, reuse_host_results, run_on_daemon_threads,
+                                   save_fingerprints, update_fingerprints)
+
+# Remote side of the streaming collection, run as root in one SSH session: the
+# dump, the plot, the unit timing and a status line are written to stdout as
+# four concatenated gzip members, so nothing is staged on the remote host
+STREAM_COLLECT_SCRIPT = r"""
+exec 4>&1
+dump=$( { { systemd-analyze dump; echo $? >&3; } | gzip -c >&4; } 3>&1 )
+plot=$( { { systemd-analyze plot; echo $? >&3; } | gzip -c >&4; } 3>&1 )
+timing=$( { { %s; echo $? >&3; } | gzip -c >&4; } 3>&1 )
+printf 'dump=%%s plot=%%s timing=%%s\n' "$dump" "$plot" "$timing" | gzip -c
+""" % TIMING_COMMAND
+
+# Worker threads never touch widgets: they post events to a queue that the Tk
+# thread drains every UI_POLL_MS, at most UI_BATCH_LIMIT events per tick. The
+# log view keeps the last LOG_VIEW_LINES lines.
+UI_POLL_MS = 100
+UI_BATCH_LIMIT = 500
+LOG_VIEW_LINES = 5000
+
+# Pre-flight check of every host at once before any analysis is scheduled: a
+# TCP connect to the SSH port within PRECHECK_TCP_TIMEOUT seconds, then an SSH
+# login on the hosts that answered. At most PRECHECK_MAX_PARALLEL checks run
+# at the same time.
+SSH_PORT = 22
+PRECHECK_TCP_TIMEOUT = 0.8
+PRECHECK_MAX_PARALLEL = 64
+
+LOG_COLORS = {"INFO": "black", "SUCCESS": "green", "ERROR": "red", "WARNING": "orange"}
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class AnalysisSettings:
+    """Form settings copied on the Tk thread when an analysis starts.
+    
+    Worker threads read these plain values; Tk variables may only be read on
+    the Tk thread.
+    """
+    __slots__ = ("ssh_password", "sudo_password", "output_dir", "max_workers", "host_timeout",
+                 "collection_mode", "keep_run_dirs", "reuse_unchanged")
+    
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
 class ConfigManager:
     """Manages application configuration including hosts and settings."""
     
@@ -35,7 +89,12 @@ class ConfigManager:
         "default_ssh_password": "autoware",
         "default_sudo_password": "autoware",
         "last_output_dir": "",
-        "window_geometry": "950x750"
+        "window_geometry": "950x750",
+        "max_workers": 8,
+        "host_timeout": 180,
+        "collection_mode": "stream",
+        "keep_run_dirs": 10,
+        "reuse_unchanged": True
     }
     
     def __init__(self, config_file: str = "systemd_analyzer_config.json"):
@@ -372,6 +431,17 @@ class HostConfigDialog:
 class SystemDAnalyzerGUI:
     """Main GUI application for SystemD analysis."""
     
+    # Host status values shown in the Target Hosts table
+    STATUS_QUEUED = "Queued"
+    STATUS_RUNNING = "Running"
+    STATUS_DONE = "Done"
+    STATUS_FAILED = "Failed"
+    STATUS_UNREACHABLE = "Unreachable"
+    STATUS_LOGIN_FAILED = "Login failed"
+    STATUS_UNCHANGED = "Unchanged"
+    STATUS_TIMEOUT = "Timed out"
+    STATUS_SKIPPED = "Skipped"
+    
     def __init__(self, root):
         self.root = root
         self.root.title("SystemD Analysis Tool")
@@ -384,15 +454,30 @@ class SystemDAnalyzerGUI:
         self.ssh_password = tk.StringVar(value=self.config_manager.config["default_ssh_password"])
         self.sudo_password = tk.StringVar(value=self.config_manager.config["default_sudo_password"])
         self.output_dir = tk.StringVar(value=self.config_manager.config["last_output_dir"])
+        self.max_workers = tk.IntVar(value=self.config_manager.config["max_workers"])
+        self.host_timeout = tk.IntVar(value=self.config_manager.config["host_timeout"])
+        self.collection_mode = tk.StringVar(value=self.config_manager.config["collection_mode"])
+        self.keep_run_dirs = tk.IntVar(value=self.config_manager.config["keep_run_dirs"])
+        self.reuse_unchanged = tk.BooleanVar(value=self.config_manager.config["reuse_unchanged"])
         
         # Application state
         self.is_running = False
         self.current_progress = 0
         self.total_hosts = 0
+        self.host_status: Dict[str, str] = {}
+        self.settings: Optional[AnalysisSettings] = None
+        
+        # Fingerprints fetched by the pre-flight check, and hosts whose earlier results were reused (host -> run)
+        self.host_fingerprints: Dict[str, Optional[str]] = {}
+        self.reused_hosts: Dict[str, str] = {}
+        
+        # Events posted by worker threads, applied on the Tk thread
+        self.ui_queue: "queue.Queue[tuple]" = queue.Queue()
         
         # Set up UI
         self.setup_ui()
         self.update_host_display()
+        self.root.after(UI_POLL_MS, self.process_ui_queue)
         
         # Set window geometry
         self.root.geometry(self.config_manager.config["window_geometry"])
@@ -430,6 +515,31 @@ class SystemDAnalyzerGUI:
         sudo_entry = ttk.Entry(config_frame, textvariable=self.sudo_password, show="*", width=20)
         sudo_entry.grid(row=0, column=3, sticky=(tk.W, tk.E))
         
+        ttk.Label(config_frame, text="Parallel Hosts:").grid(row=1, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Spinbox(config_frame, textvariable=self.max_workers, from_=1, to=64, width=8).grid(
+            row=1, column=1, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Label(config_frame, text="Host Timeout (s):").grid(row=1, column=2, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Spinbox(config_frame, textvariable=self.host_timeout, from_=30, to=3600, increment=30, width=8).grid(
+            row=1, column=3, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Label(config_frame, text="Collection:").grid(row=2, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Combobox(config_frame, textvariable=self.collection_mode, values=("stream", "legacy"),
+                     state="readonly", width=8).grid(row=2, column=1, sticky=tk.W, pady=(10, 0))
+        ttk.Label(config_frame, text="(stream: one SSH session, compressed, no remote temp files)",
+                  foreground="gray").grid(row=2, column=2, columnspan=2, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Label(config_frame, text="Keep Run Folders:").grid(row=3, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        ttk.Spinbox(config_frame, textvariable=self.keep_run_dirs, from_=0, to=365, width=8).grid(
+            row=3, column=1, sticky=tk.W, pady=(10, 0))
+        ttk.Label(config_frame, text=f"(older runs stay restorable from {STORE_FILENAME}; 0 = keep all)",
+                  foreground="gray").grid(row=3, column=2, columnspan=2, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Checkbutton(config_frame, text="Reuse results of unchanged hosts", variable=self.reuse_unchanged).grid(
+            row=4, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        ttk.Label(config_frame, text="(same boot and unit files as their last collected run)",
+                  foreground="gray").grid(row=4, column=2, columnspan=2, sticky=tk.W, pady=(10, 0))
+        
         # Host list area
         hosts_frame = ttk.LabelFrame(main_frame, text="Target Hosts", padding="10")
         hosts_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -440,14 +550,25 @@ class SystemDAnalyzerGUI:
         host_display_frame.grid(row=0, column=0, sticky=(tk.W, tk.E))
         host_display_frame.columnconfigure(0, weight=1)
         
-        self.hosts_text_var = tk.StringVar()
-        hosts_label = ttk.Label(host_display_frame, textvariable=self.hosts_text_var, 
-                               font=("Courier", 10), justify=tk.LEFT)
-        hosts_label.grid(row=0, column=0, sticky=tk.W)
+        columns = ("hostname", "address", "status", "elapsed")
+        self.hosts_tree = ttk.Treeview(host_display_frame, columns=columns, show="headings", height=5)
+        self.hosts_tree.heading("hostname", text="Hostname")
+        self.hosts_tree.heading("address", text="Address")
+        self.hosts_tree.heading("status", text="Status")
+        self.hosts_tree.heading("elapsed", text="Time")
+        self.hosts_tree.column("hostname", width=150, minwidth=100)
+        self.hosts_tree.column("address", width=250, minwidth=150)
+        self.hosts_tree.column("status", width=120, minwidth=80)
+        self.hosts_tree.column("elapsed", width=80, minwidth=60)
+        self.hosts_tree.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        
+        hosts_scrollbar = ttk.Scrollbar(host_display_frame, orient=tk.VERTICAL, command=self.hosts_tree.yview)
+        self.hosts_tree.configure(yscrollcommand=hosts_scrollbar.set)
+        hosts_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
         config_hosts_button = ttk.Button(host_display_frame, text="Configure Hosts", 
                                        command=self.configure_hosts)
-        config_hosts_button.grid(row=0, column=1, sticky=tk.E, padx=(10, 0))
+        config_hosts_button.grid(row=0, column=2, sticky=(tk.E, tk.N), padx=(10, 0))
         
         # Output directory selection
         dir_frame = ttk.Frame(main_frame)
@@ -499,6 +620,8 @@ class SystemDAnalyzerGUI:
         
         self.log_text = scrolledtext.ScrolledText(log_frame, height=20, wrap=tk.WORD)
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        for level, color in LOG_COLORS.items():
+            self.log_text.tag_config(level, foreground=color)
         
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
@@ -506,9 +629,67 @@ class SystemDAnalyzerGUI:
         status_bar.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E))
         
     def update_host_display(self):
-        """Update the host display text."""
-        hosts_text = "\n".join([f"• {name}: {addr}" for name, addr in self.hosts.items()])
-        self.hosts_text_var.set(hosts_text)
+        """Fill the host table with the configured hosts and their last status."""
+        for item in self.hosts_tree.get_children():
+            self.hosts_tree.delete(item)
+        for name, addr in self.hosts.items():
+            self.hosts_tree.insert("", tk.END, iid=name, values=(name, addr, self.host_status.get(name, ""), ""))
+            
+    def set_host_status(self, hostname: str, status: str, elapsed: Optional[float] = None):
+        """Show a host's analysis status (and time taken) in the host table."""
+        self.host_status[hostname] = status
+        self.ui_queue.put(("host_status", hostname, status, elapsed))
+        
+    def set_status(self, text: str):
+        """Show text in the status bar; safe to call from any thread."""
+        self.ui_queue.put(("status", text))
+        
+    def process_ui_queue(self):
+        """Apply queued worker events on the Tk thread and reschedule itself."""
+        log_lines = []
+        try:
+            for _ in range(UI_BATCH_LIMIT):
+                event = self.ui_queue.get_nowait()
+                kind = event[0]
+                if kind == "log":
+                    log_lines.append(event[1:])
+                elif kind == "progress":
+                    self._update_progress(*event[1:])
+                elif kind == "progress_text":
+                    self.progress_label.config(text=event[1])
+                elif kind == "host_status":
+                    _, hostname, status, elapsed = event
+                    if self.hosts_tree.exists(hostname):
+                        elapsed_text = f"{elapsed:.1f}s" if elapsed is not None else ""
+                        self.hosts_tree.item(hostname, values=(hostname, self.hosts.get(hostname, ""),
+                                                               status, elapsed_text))
+                elif kind == "status":
+                    self.status_var.set(event[1])
+                elif kind == "analysis_done":
+                    self.start_button.config(state="normal")
+                    self.stop_button.config(state="disabled")
+                elif kind == "error":
+                    messagebox.showerror(event[1], event[2])
+        except queue.Empty:
+            pass
+        
+        if log_lines:
+            self._append_log(log_lines)
+        self.root.after(UI_POLL_MS, self.process_ui_queue)
+                
+    def host_log(self, hostname: str, message: str, level: str = "INFO"):
+        """Log a message for one host, prefixed so parallel hosts can be told apart."""
+        self.log_message(f"[{hostname}] {message}", level)
+        
+    @staticmethod
+    def time_left(deadline: Optional[float], limit: float) -> float:
+        """Return a subprocess timeout no longer than limit that ends by deadline."""
+        if deadline is None:
+            return limit
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("host timeout exceeded")
+        return min(limit, remaining)
         
     def configure_hosts(self):
         """Open host configuration dialog."""
@@ -524,7 +705,9 @@ class SystemDAnalyzerGUI:
         """Update progress bar and label."""
         self.current_progress = completed
         self.total_hosts = total
-        
+        self.ui_queue.put(("progress", completed, total, current_host))
+            
+    def _update_progress(self, completed: int, total: int, current_host: str = ""):
         if total > 0:
             percentage = (completed / total) * 100
             self.progress['value'] = percentage
@@ -536,8 +719,6 @@ class SystemDAnalyzerGUI:
         else:
             self.progress['value'] = 0
             self.progress_label.config(text="Ready")
-            
-        self.root.update()
         
     def browse_directory(self):
         """Browse for output directory."""
@@ -548,21 +729,21 @@ class SystemDAnalyzerGUI:
     def log_message(self, message: str, level: str = "INFO"):
         """Add a message to the log with timestamp and color coding."""
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        colors = {"INFO": "black", "SUCCESS": "green", "ERROR": "red", "WARNING": "orange"}
+        self.ui_queue.put(("log", f"[{timestamp}] {message}\n", level))
+            
+    def _append_log(self, lines):
+        """Insert a batch of (text, level) lines in one call and trim old lines."""
+        chunks = []
+        for text, level in lines[-LOG_VIEW_LINES:]:
+            chunks.extend((text, level if level in LOG_COLORS else ()))
         
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        
-        # Set color
-        if level in colors:
-            start_line = self.log_text.index(tk.END + "-2l linestart")
-            end_line = self.log_text.index(tk.END + "-1l lineend")
-            self.log_text.tag_add(level, start_line, end_line)
-            self.log_text.tag_config(level, foreground=colors[level])
-        
+        self.log_text.insert(tk.END, *chunks)
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - LOG_VIEW_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
         self.log_text.config(state=tk.DISABLED)
         self.log_text.see(tk.END)
-        self.root.update()
         
     def clear_log(self):
         """Clear the log output."""
@@ -570,6 +751,16 @@ class SystemDAnalyzerGUI:
         self.log_text.delete(1.0, tk.END)
         self.log_text.config(state=tk.DISABLED)
         
+    def read_settings(self) -> AnalysisSettings:
+        """Copy the form settings for the analysis threads; invalid numbers fall back to their defaults."""
+        values = {}
+        for name in AnalysisSettings.__slots__:
+            try:
+                values[name] = getattr(self, name).get()
+            except (tk.TclError, ValueError):
+                values[name] = ConfigManager.DEFAULT_CONFIG[name]
+        return AnalysisSettings(**values)
+        
     def start_analysis(self):
         """Start the SystemD analysis process."""
         if not self.ssh_password.get() or not self.sudo_password.get():
@@ -584,13 +775,16 @@ class SystemDAnalyzerGUI:
             # Use current directory if none selected
             self.output_dir.set(os.getcwd())
             
+        self.settings = self.read_settings()
         self.is_running = True
         self.start_button.config(state="disabled")
         self.stop_button.config(state="normal")
         self.current_progress = 0
         self.total_hosts = len(self.hosts)
+        self.host_status = {hostname: self.STATUS_QUEUED for hostname in self.hosts}
+        self.update_host_display()
         self.update_progress(0, self.total_hosts)
-        self.status_var.set("Running analysis...")
+        self.set_status("Running analysis...")
         
         # Run analysis in new thread
         self.analysis_thread = threading.Thread(target=self.run_analysis)
@@ -598,13 +792,12 @@ class SystemDAnalyzerGUI:
         self.analysis_thread.start()
         
     def stop_analysis(self):
-        """Stop the analysis process."""
+        """Stop the analysis process; Start is re-enabled once hosts in progress have finished."""
         self.is_running = False
-        self.start_button.config(state="normal")
         self.stop_button.config(state="disabled")
         self.update_progress(self.current_progress, self.total_hosts)
-        self.status_var.set("Analysis stopped")
-        self.log_message("Analysis stopped by user", "WARNING")
+        self.set_status("Stopping - waiting for hosts in progress...")
+        self.log_message("Analysis stopped by user, waiting for hosts in progress", "WARNING")
         
     def run_analysis(self):
         """Main analysis execution method."""
@@ -614,7 +807,7 @@ class SystemDAnalyzerGUI:
                 return
                 
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            local_dir = os.path.join(self.output_dir.get(), f"systemd_analysis_{timestamp}")
+            local_dir = os.path.join(self.settings.output_dir, f"systemd_analysis_{timestamp}")
             os.makedirs(local_dir, exist_ok=True)
             
             self.log_message(f"Starting SystemD analysis task...", "INFO")
@@ -623,56 +816,198 @@ class SystemDAnalyzerGUI:
             self.log_message(f"Total hosts to process: {self.total_hosts}", "INFO")
             self.log_message("-" * 50, "INFO")
             
+            # Only hosts that pass the pre-flight check are analyzed
+            fingerprint_path = os.path.join(self.settings.output_dir, FINGERPRINT_FILENAME)
+            cached = load_fingerprints(fingerprint_path)
+            self.reused_hosts = {}
+            live_hosts = self.precheck_hosts()
             success_count = 0
-            completed_count = 0
+            completed_count = self.total_hosts - len(live_hosts)
+            self.update_progress(completed_count, self.total_hosts)
+            workers = max(1, min(self.settings.max_workers, len(live_hosts)))
+            if live_hosts:
+                self.log_message(f"Analyzing {len(live_hosts)} hosts, up to {workers} in parallel", "INFO")
             
-            for hostname, host_addr in self.hosts.items():
-                if not self.is_running:
-                    break
-                    
-                self.update_progress(completed_count, self.total_hosts, hostname)
-                self.log_message(f"Processing host: {hostname} ({host_addr})", "INFO")
+            def analyze(hostname):
+                return self.analyze_host(hostname, live_hosts[hostname], local_dir, timestamp, cached.get(hostname))
                 
-                # Test SSH connection
-                if not self.test_ssh_connection(host_addr):
-                    self.log_message(f"  ✗ Cannot connect to {hostname} ({host_addr})", "ERROR")
-                    completed_count += 1
-                    self.update_progress(completed_count, self.total_hosts)
-                    continue
-                    
-                self.log_message(f"  ✓ SSH connection successful", "SUCCESS")
-                
-                # Execute remote commands
-                if self.execute_remote_commands(hostname, host_addr, local_dir, timestamp):
+            for hostname, success, error in run_on_daemon_threads(analyze, list(live_hosts), workers):
+                if error is not None:
+                    # Other hosts keep running and this run's results are still processed
+                    self.host_log(hostname, f"✗ Analysis failed: {str(error)}", "ERROR")
+                    self.set_host_status(hostname, self.STATUS_FAILED)
+                elif success:
                     success_count += 1
-                    self.log_message(f"  ✓ {hostname} completed successfully", "SUCCESS")
-                else:
-                    self.log_message(f"  ✗ {hostname} failed", "ERROR")
-                    
                 completed_count += 1
-                self.update_progress(completed_count, self.total_hosts)
-                self.log_message("-" * 50, "INFO")
-                
+                running = sum(1 for status in self.host_status.values() if status == self.STATUS_RUNNING)
+                self.update_progress(completed_count, self.total_hosts,
+                                     f"{running} hosts" if running else "")
+                    
             if self.is_running:
                 self.log_message(f"Task completed! {success_count}/{self.total_hosts} hosts processed successfully", "SUCCESS")
+                if self.reused_hosts:
+                    self.log_message(f"{len(self.reused_hosts)} unchanged hosts reused earlier results", "INFO")
+                self.update_fingerprints(fingerprint_path, cached, timestamp)
                 self.log_message(f"Result files saved in: {local_dir}", "INFO")
                 
                 # Set permissions
                 self.set_permissions(local_dir)
                 
+                # Parse the dumps into the output directory's unit index
+                self.index_results(local_dir, timestamp)
+                
+                # Critical path and slowest units of each host's boot, checked against their history
+                regressions = self.analyze_boot_timing(local_dir, timestamp)
+                
                 # Generate report
-                self.generate_report(local_dir, timestamp)
+                self.generate_report(local_dir, timestamp, regressions)
+                
+                # Deduplicated copy of the run; old run folders are compacted into it
+                self.store_results(local_dir)
                 
-                self.status_var.set(f"Completed - {success_count}/{self.total_hosts} hosts successful")
-                self.progress_label.config(text=f"Completed ({success_count}/{self.total_hosts} successful)")
+                self.set_status(f"Completed - {success_count}/{self.total_hosts} hosts successful")
+                self.ui_queue.put(("progress_text", f"Completed ({success_count}/{self.total_hosts} successful)"))
             
         except Exception as e:
             self.log_message(f"Error: {str(e)}", "ERROR")
-            self.status_var.set("Error occurred")
+            self.set_status("Error occurred")
         finally:
-            self.start_button.config(state="normal")
-            self.stop_button.config(state="disabled")
+            if not self.is_running:
+                self.set_status("Analysis stopped")
+            self.ui_queue.put(("analysis_done",))
+            
+    def analyze_host(self, hostname: str, host_addr: str, local_dir: str, timestamp: str,
+                     cached: Optional[dict] = None) -> bool:
+        """Analyze one host within the host timeout; runs on a worker thread.
+
+        cached is the host's fingerprint cache entry; when it matches the
+        fingerprint fetched by the pre-flight check, the results of the run it
+        names are reused instead of collected again.
+        """
+        if not self.is_running:
+            self.set_host_status(hostname, self.STATUS_SKIPPED)
+            return False
+            
+        started = time.monotonic()
+        deadline = started + max(1, self.settings.host_timeout)
+        self.set_host_status(hostname, self.STATUS_RUNNING)
+        self.host_log(hostname, f"Processing host ({host_addr})", "INFO")
+        
+        run = reusable_run(cached, self.host_fingerprints.get(hostname), host_addr)
+        if self.settings.reuse_unchanged and run and self.reuse_results(hostname, run, local_dir, timestamp):
+            self.reused_hosts[hostname] = run
+            self.host_log(hostname, f"✓ Not rebooted and unit files unchanged, reused results of run {run}",
+                          "SUCCESS")
+            self.set_host_status(hostname, self.STATUS_UNCHANGED, time.monotonic() - started)
+            return True
+            
+        # The pre-flight check already logged in; the host may still drop off before collection
+        if self.settings.collection_mode == "stream":
+            success = self.stream_collect(hostname, host_addr, local_dir, timestamp, deadline)
+            reachable = success is not None
+        else:
+            reachable = True
+            success = self.execute_remote_commands(hostname, host_addr, local_dir, timestamp, deadline)
+                
+        if not reachable:
+            self.host_log(hostname, f"✗ Cannot connect to {host_addr}", "ERROR")
+            status, success = self.STATUS_UNREACHABLE, False
+        else:
+            if success:
+                status = self.STATUS_DONE
+                self.host_log(hostname, "✓ Completed successfully", "SUCCESS")
+            else:
+                status = self.STATUS_TIMEOUT if time.monotonic() >= deadline else self.STATUS_FAILED
+                self.host_log(hostname, f"✗ {status}", "ERROR")
+                
+        self.set_host_status(hostname, status, time.monotonic() - started)
+        return success
+        
+    def stream_collect(self, hostname: str, host_addr: str, local_dir: str, timestamp: str,
+                       deadline: Optional[float] = None) -> Optional[bool]:
+        """Collect dump, plot and unit timing in one SSH session, decompressing straight into local_dir.
+        
+        Returns None if the host could not be reached.
+        """
+        files = (("dump", "dump.log"), ("plot", "plot.svg"), ("timing", "timing.log"))
+        outputs = {name: os.path.join(local_dir, f"{hostname}_{timestamp}_{filename}") for name, filename in files}
+        remote_command = f"sudo -S -p '' sh -c {shlex.quote(STREAM_COLLECT_SCRIPT)}"
+        cmd = [
+            "sshpass", "-p", self.settings.ssh_password,
+            "ssh", "-o", "ConnectTimeout=5", "-o", "StrictHostKeyChecking=no",
+            host_addr, remote_command
+        ]
+        
+        self.host_log(hostname, "> Streaming systemd-analyze dump and plot...", "INFO")
+        try:
+            # Own process group, so a timeout also kills the ssh that sshpass spawned
+            process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       start_new_session=True)
+        except OSError as e:
+            self.host_log(hostname, f"✗ Cannot start ssh: {str(e)}", "ERROR")
+            return False
             
+        timed_out = threading.Event()
+        
+        def kill():
+            timed_out.set()
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+            
+        stderr_chunks = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+        timer = None
+        
+        collected: Dict[str, int] = {}
+        received = 0
+        try:
+            timer = threading.Timer(self.time_left(deadline, 300), kill)
+            timer.start()
+            try:
+                process.stdin.write((self.settings.sudo_password + "\n").encode())
+                process.stdin.close()
+            except OSError:
+                pass
+                
+            # Each gzip member is decompressed into its own file as it arrives
+            collected, received = receive_members(iter(lambda: process.stdout.read(65536), b""), outputs)
+            process.wait()
+        except Exception as e:
+            kill()
+            process.wait()
+            self.host_log(hostname, f"✗ Streaming collection failed: {str(e)}", "ERROR")
+            return False
+        finally:
+            if timer:
+                timer.cancel()
+            stderr_reader.join(timeout=1)
+            
+        stderr = b"".join(stderr_chunks).decode(errors="replace").strip()
+        if timed_out.is_set():
+            self.host_log(hostname, "✗ Streaming collection timed out", "ERROR")
+            return False
+        if process.returncode == 255 and not received:
+            return None
+            
+        success = True
+        for name, filename in files:
+            if name in collected:
+                self.host_log(hostname, f"  ✓ {filename} received ({collected[name] / 1024:.1f} KB)", "SUCCESS")
+            elif name == "timing":
+                # Optional: boot timing analysis falls back to the dump's timestamps
+                self.host_log(hostname, "  ! Unit timing not collected, using dump timestamps", "WARNING")
+            else:
+                self.host_log(hostname, f"  ✗ {filename} collection failed", "ERROR")
+                success = False
+        if not success and stderr:
+            self.host_log(hostname, f"  {stderr.splitlines()[-1]}", "ERROR")
+        if success:
+            self.host_log(hostname, f"  ~ {received / 1024:.0f} KB transferred compressed", "INFO")
+        return success
+        
     def check_sshpass(self) -> bool:
         """Check if sshpass is available on the system."""
         try:
@@ -681,26 +1016,100 @@ class SystemDAnalyzerGUI:
         except (subprocess.CalledProcessError, FileNotFoundError):
             self.log_message("Error: sshpass is not installed", "ERROR")
             self.log_message("Please install it: sudo apt-get install sshpass", "ERROR")
-            messagebox.showerror("Error", "sshpass is not installed.\nPlease install it with: sudo apt-get install sshpass")
+            self.ui_queue.put(("error", "Error", "sshpass is not installed.\nPlease install it with: sudo apt-get install sshpass"))
             return False
             
-    def test_ssh_connection(self, host_addr: str) -> bool:
-        """Test SSH connection to a remote host."""
+    @staticmethod
+    def tcp_reachable(host_addr: str, timeout: float = PRECHECK_TCP_TIMEOUT) -> bool:
+        """Return whether the SSH port of user@host accepts a TCP connection within timeout."""
+        host = host_addr.rsplit("@", 1)[-1].strip("[]")
+        try:
+            with socket.create_connection((host, SSH_PORT), timeout=timeout):
+                return True
+        except OSError:
+            return False
+            
+    def precheck_hosts(self) -> Dict[str, str]:
+        """Check every host at once (TCP connect, then SSH login) and return the live ones.
+
+        Hosts failing either step are marked in the host table right away. The
+        login fetches each live host's fingerprint into host_fingerprints.
+        """
+        self.log_message(f"> Checking {len(self.hosts)} hosts (port {SSH_PORT}, then SSH login)...", "INFO")
+        started = time.monotonic()
+        live_hosts = {}
+        self.host_fingerprints = {}
+        
+        def check(hostname):
+            # Returns the status of a failed check, else the login's fingerprint output
+            host_addr = self.hosts[hostname]
+            if not self.tcp_reachable(host_addr):
+                return self.STATUS_UNREACHABLE, None
+            if not self.is_running:
+                return self.STATUS_SKIPPED, None
+            output = self.login_check(host_addr)
+            return (None, output) if output is not None else (self.STATUS_LOGIN_FAILED, None)
+            
+        for hostname, outcome, error in run_on_daemon_threads(check, list(self.hosts), PRECHECK_MAX_PARALLEL):
+            host_addr = self.hosts[hostname]
+            status, output = outcome if error is None else (self.STATUS_FAILED, None)
+            if status is None:
+                live_hosts[hostname] = host_addr
+                self.host_fingerprints[hostname] = parse_fingerprint(output)
+            elif status == self.STATUS_SKIPPED:
+                self.set_host_status(hostname, status)
+            else:
+                if status == self.STATUS_UNREACHABLE:
+                    self.host_log(hostname, f"✗ {host_addr} does not answer on port {SSH_PORT}", "ERROR")
+                elif error is not None:
+                    self.host_log(hostname, f"✗ Pre-flight check failed: {str(error)}", "ERROR")
+                else:
+                    self.host_log(hostname, f"✗ SSH login to {host_addr} failed", "ERROR")
+                self.set_host_status(hostname, status, time.monotonic() - started)
+        
+        self.log_message(f"  {len(live_hosts)}/{len(self.hosts)} hosts reachable "
+                         f"({time.monotonic() - started:.1f}s)", "SUCCESS" if live_hosts else "WARNING")
+        # Keep the configured host order for scheduling
+        return {hostname: host_addr for hostname, host_addr in self.hosts.items() if hostname in live_hosts}
+        
+    def login_check(self, host_addr: str, deadline: Optional[float] = None) -> Optional[str]:
+        """Log in to a remote host and return its FINGERPRINT_COMMAND output, or None if the login fails."""
         try:
             cmd = [
-                "sshpass", "-p", self.ssh_password.get(),
+                "sshpass", "-p", self.settings.ssh_password,
                 "ssh", "-o", "ConnectTimeout=5", "-o", "StrictHostKeyChecking=no",
-                host_addr, "echo 'SSH connection successful'"
+                host_addr, FINGERPRINT_COMMAND
             ]
-            result = subprocess.run(cmd, capture_output=True, timeout=10)
-            return result.returncode == 0
+            result = subprocess.run(cmd, capture_output=True, timeout=self.time_left(deadline, 10))
+            return result.stdout.decode(errors="replace") if result.returncode == 0 else None
         except Exception:
+            return None
+            
+    def reuse_results(self, hostname: str, run: str, local_dir: str, timestamp: str) -> bool:
+        """Copy a host's files from an earlier run (its folder, or the result store) into this run."""
+        try:
+            reuse_host_results(os.path.dirname(local_dir), hostname, run, local_dir, timestamp)
+            return True
+        except (OSError, KeyError, ValueError, sqlite3.Error) as e:
+            self.host_log(hostname, f"! Cannot reuse results of run {run} ({e.args[0] if e.args else e}), "
+                          "collecting again", "WARNING")
             return False
             
-    def execute_remote_commands(self, hostname: str, host_addr: str, local_dir: str, timestamp: str) -> bool:
+    def update_fingerprints(self, path: str, cached: Dict[str, dict], timestamp: str):
+        """Cache the fingerprint of every host whose results this run holds."""
+        finished = [hostname for hostname, status in self.host_status.items()
+                    if status in (self.STATUS_DONE, self.STATUS_UNCHANGED)]
+        try:
+            save_fingerprints(path, update_fingerprints(cached, self.hosts, self.host_fingerprints, finished,
+                                                        timestamp))
+        except OSError as e:
+            self.log_message(f"! Could not save host fingerprints: {str(e)}", "WARNING")
+            
+    def execute_remote_commands(self, hostname: str, host_addr: str, local_dir: str, timestamp: str,
+                                deadline: Optional[float] = None) -> bool:
         """Execute SystemD analysis commands on remote host."""
         try:
-            self.log_message(f"  > Executing systemd-analyze commands...", "INFO")
+            self.host_log(hostname, "> Executing systemd-analyze commands...", "INFO")
             
             # Create remote script
             remote_script = f'''
@@ -709,10 +1118,13 @@ class SystemDAnalyzerGUI:
             cd "$TEMP_DIR"
             
             echo "Executing systemd-analyze dump..."
-            echo "{self.sudo_password.get()}" | sudo -S systemd-analyze dump > dump.log 2>&1
+            echo "{self.settings.sudo_password}" | sudo -S systemd-analyze dump > dump.log 2>&1
             
             echo "Executing systemd-analyze plot..."
-            echo "{self.sudo_password.get()}" | sudo -S systemd-analyze plot > plot.svg 2>&1
+            echo "{self.settings.sudo_password}" | sudo -S systemd-analyze plot > plot.svg 2>&1
+            
+            echo "Collecting unit boot timing..."
+            {{ {TIMING_COMMAND}; }} > timing.log 2>/dev/null || rm -f timing.log
             
             if [ -f dump.log ] && [ -f plot.svg ]; then
                 echo "Files generated successfully"
@@ -725,11 +1137,12 @@ class SystemDAnalyzerGUI:
             
             # Execute remote script
             cmd = [
-                "sshpass", "-p", self.ssh_password.get(),
+                "sshpass", "-p", self.settings.ssh_password,
                 "ssh", "-o", "StrictHostKeyChecking=no", host_addr
             ]
             
-            result = subprocess.run(cmd, input=remote_script, text=True, capture_output=True, timeout=60)
+            result = subprocess.run(cmd, input=remote_script, text=True, capture_output=True,
+                                    timeout=self.time_left(deadline, 60))
             
             if result.returncode == 0:
                 # Get remote temporary directory
@@ -737,64 +1150,80 @@ class SystemDAnalyzerGUI:
                 remote_temp_dir = lines[-1] if lines else ""
                 
                 if remote_temp_dir and remote_temp_dir.startswith('/tmp/systemd_analysis_'):
-                    return self.download_files(hostname, host_addr, remote_temp_dir, local_dir, timestamp)
+                    return self.download_files(hostname, host_addr, remote_temp_dir, local_dir, timestamp, deadline)
                     
             return False
             
         except Exception as e:
-            self.log_message(f"  ✗ Remote command execution failed: {str(e)}", "ERROR")
+            self.host_log(hostname, f"✗ Remote command execution failed: {str(e)}", "ERROR")
             return False
             
-    def download_files(self, hostname: str, host_addr: str, remote_temp_dir: str, local_dir: str, timestamp: str) -> bool:
+    def download_files(self, hostname: str, host_addr: str, remote_temp_dir: str, local_dir: str, timestamp: str,
+                       deadline: Optional[float] = None) -> bool:
         """Download analysis files from remote host."""
         try:
-            self.log_message(f"  > Downloading files...", "INFO")
+            self.host_log(hostname, "> Downloading files...", "INFO")
             
             success = True
             
             # Download dump.log
             dump_file = os.path.join(local_dir, f"{hostname}_{timestamp}_dump.log")
             cmd = [
-                "sshpass", "-p", self.ssh_password.get(),
+                "sshpass", "-p", self.settings.ssh_password,
                 "scp", "-o", "StrictHostKeyChecking=no",
                 f"{host_addr}:{remote_temp_dir}/dump.log", dump_file
             ]
             
-            result = subprocess.run(cmd, capture_output=True, timeout=30)
+            result = subprocess.run(cmd, capture_output=True, timeout=self.time_left(deadline, 30))
             if result.returncode == 0:
-                self.log_message(f"    ✓ dump.log downloaded successfully", "SUCCESS")
+                self.host_log(hostname, "  ✓ dump.log downloaded successfully", "SUCCESS")
             else:
-                self.log_message(f"    ✗ dump.log download failed", "ERROR")
+                self.host_log(hostname, "  ✗ dump.log download failed", "ERROR")
                 success = False
                 
             # Download plot.svg
             plot_file = os.path.join(local_dir, f"{hostname}_{timestamp}_plot.svg")
             cmd = [
-                "sshpass", "-p", self.ssh_password.get(),
+                "sshpass", "-p", self.settings.ssh_password,
                 "scp", "-o", "StrictHostKeyChecking=no",
                 f"{host_addr}:{remote_temp_dir}/plot.svg", plot_file
             ]
             
-            result = subprocess.run(cmd, capture_output=True, timeout=30)
+            result = subprocess.run(cmd, capture_output=True, timeout=self.time_left(deadline, 30))
             if result.returncode == 0:
-                self.log_message(f"    ✓ plot.svg downloaded successfully", "SUCCESS")
+                self.host_log(hostname, "  ✓ plot.svg downloaded successfully", "SUCCESS")
             else:
-                self.log_message(f"    ✗ plot.svg download failed", "ERROR")
+                self.host_log(hostname, "  ✗ plot.svg download failed", "ERROR")
                 success = False
                 
+            # Download timing.log; optional, boot timing falls back to the dump
+            timing_file = os.path.join(local_dir, f"{hostname}_{timestamp}_timing.log")
+            cmd = [
+                "sshpass", "-p", self.settings.ssh_password,
+                "scp", "-o", "StrictHostKeyChecking=no",
+                f"{host_addr}:{remote_temp_dir}/timing.log", timing_file
+            ]
+            
+            result = subprocess.run(cmd, capture_output=True, timeout=self.time_left(deadline, 30))
+            if result.returncode == 0:
+                self.host_log(hostname, "  ✓ timing.log downloaded successfully", "SUCCESS")
+            else:
+                self.host_log(hostname, "  ! Unit timing not collected, using dump timestamps", "WARNING")
+                
             # Clean up remote temporary files
             cmd = [
-                "sshpass", "-p", self.ssh_password.get(),
+                "sshpass", "-p", self.settings.ssh_password,
                 "ssh", "-o", "StrictHostKeyChecking=no", host_addr,
                 f"rm -rf {remote_temp_dir}"
             ]
+            # Cleanup is still attempted when the host is out of time
             subprocess.run(cmd, capture_output=True, timeout=10)
-            self.log_message(f"  ~ Remote temporary files cleaned up", "INFO")
+            self.host_log(hostname, "~ Remote temporary files cleaned up", "INFO")
             
             return success
             
         except Exception as e:
-            self.log_message(f"  ✗ File download failed: {str(e)}", "ERROR")
+            self.host_log(hostname, f"✗ File download failed: {str(e)}", "ERROR")
             return False
             
     def set_permissions(self, local_dir: str):
@@ -816,8 +1245,124 @@ class SystemDAnalyzerGUI:
         except Exception as e:
             self.log_message(f"  ! Could not set permissions: {str(e)}", "WARNING")
             
-    def generate_report(self, local_dir: str, timestamp: str):
-        """Generate a summary report of the analysis."""
+    def index_results(self, local_dir: str, timestamp: str):
+        """Parse the run's dumps into the unit index kept in the output directory."""
+        try:
+            self.log_message("> Indexing unit dumps...", "INFO")
+            index_path = os.path.join(os.path.dirname(local_dir), INDEX_FILENAME)
+            with DumpIndex(index_path) as index:
+                counts = index.add_paths([local_dir])
+                self.log_message(f"  ✓ Indexed {sum(counts.values())} units from {len(counts)} dumps into {index_path}",
+                                 "SUCCESS")
+                self.write_unit_diff(index, local_dir, timestamp)
+            
+        except Exception as e:
+            self.log_message(f"  ! Could not index dumps: {str(e)}", "WARNING")
+            
+    def write_unit_diff(self, index: DumpIndex, local_dir: str, timestamp: str):
+        """Write the units that differ across this run's hosts and since each host's previous run."""
+        hosts = index.run_hosts(timestamp)
+        reports = []
+        if len(hosts) > 1:
+            report = index.diff([(host, timestamp) for host in hosts])
+            reports.append(report)
+            self.log_message(f"  Units differing across hosts: {len(report.units)} of {report.compared}",
+                             "WARNING" if report.units else "INFO")
+        for host in hosts:
+            previous = index.previous_run(host, timestamp)
+            if previous:
+                report = index.diff([(host, previous), (host, timestamp)])
+                reports.append(report)
+                if report.units:
+                    self.host_log(host, f"{len(report.units)} units changed since run {previous}", "WARNING")
+        if not reports:
+            return
+        
+        with open(os.path.join(local_dir, "unit_diff.txt"), 'w', encoding='utf-8') as f:
+            f.write("\n".join(report.to_text() for report in reports))
+        with open(os.path.join(local_dir, "unit_diff.json"), 'w', encoding='utf-8') as f:
+            json.dump({"reports": [report.to_dict() for report in reports]}, f, indent=2)
+        self.log_message("  ✓ Unit differences written to unit_diff.txt and unit_diff.json", "SUCCESS")
+            
+    def analyze_boot_timing(self, local_dir: str, timestamp: str) -> Optional[List[Regression]]:
+        """Write the critical path, slack and slowest units of each host's boot, and return its regressions."""
+        try:
+            self.log_message("> Analyzing boot timing...", "INFO")
+            analyses = {}
+            timings = {}
+            for label, files in collect_results([local_dir]).items():
+                path = files.get("timing") or files.get("dump")
+                if not path:
+                    continue
+                units, manager = read_unit_timing(path)
+                if not units:
+                    continue
+                analysis = analyses[label] = BootAnalysis(units, manager)
+                host = label.rsplit("@", 1)[0]
+                # A reused host's boot is already in the history
+                if host not in self.reused_hosts:
+                    timings[host] = (units, analysis.boot_time)
+                slowest = max(analysis.critical_path, key=lambda unit: unit.duration)
+                self.host_log(host,
+                              f"Boot: {analysis.target} after {analysis.boot_time:.2f}s, slowest on critical path: "
+                              f"{slowest.name} ({slowest.duration:.2f}s)", "INFO")
+            if not analyses:
+                self.log_message("  ! No unit timing available", "WARNING")
+                return None
+            
+            with open(os.path.join(local_dir, "boot_analysis.txt"), 'w', encoding='utf-8') as f:
+                f.write("\n".join(analysis.to_text(label) for label, analysis in analyses.items()))
+            with open(os.path.join(local_dir, "boot_analysis.json"), 'w', encoding='utf-8') as f:
+                json.dump({label: analysis.to_dict() for label, analysis in analyses.items()}, f, indent=2)
+            self.log_message("  ✓ Boot timing written to boot_analysis.txt and boot_analysis.json", "SUCCESS")
+            return self.check_boot_regressions(local_dir, timestamp, timings)
+            
+        except Exception as e:
+            self.log_message(f"  ! Could not analyze boot timing: {str(e)}", "WARNING")
+            return None
+            
+    def check_boot_regressions(self, local_dir: str, timestamp: str, timings: dict) -> List[Regression]:
+        """Add this run's activation times to the boot history and flag units past their baseline."""
+        history_path = os.path.join(os.path.dirname(local_dir), HISTORY_FILENAME)
+        regressions = []
+        with BootHistory(history_path) as history:
+            for host, (units, boot_time) in timings.items():
+                history.add_run(host, timestamp, units, boot_time)
+            for host in timings:
+                regressions += history.regressions(host=host, run=timestamp)
+        for regression in regressions:
+            unit = "Boot time" if regression.unit == BOOT_SERIES else regression.unit
+            self.host_log(regression.host, f"Regression: {unit} took {regression.duration:.2f}s, "
+                          f"baseline {regression.baseline:.2f}s", "WARNING")
+        
+        with open(os.path.join(local_dir, "boot_regressions.json"), 'w', encoding='utf-8') as f:
+            json.dump({"window": HISTORY_WINDOW, "regressions": [regression.to_dict() for regression in regressions]},
+                      f, indent=2)
+        self.log_message(f"  {'!' if regressions else '✓'} {len(regressions)} boot time regressions against "
+                         f"{history_path}", "WARNING" if regressions else "SUCCESS")
+        return regressions
+            
+    def store_results(self, local_dir: str):
+        """Add the run to the deduplicated result store and compact old run folders."""
+        try:
+            self.log_message("> Storing results...", "INFO")
+            output_dir = os.path.dirname(local_dir)
+            with ResultStore(os.path.join(output_dir, STORE_FILENAME)) as store:
+                stats = store.add_run(local_dir)
+                self.log_message(f"  ✓ Stored {stats['files']} files ({stats['bytes'] / 1024:.0f} KB), "
+                                 f"{stats['stored_bytes'] / 1024:.0f} KB new after deduplication", "SUCCESS")
+                keep = self.settings.keep_run_dirs
+                if keep > 0:
+                    removed = store.compact(output_dir, keep)
+                    if removed:
+                        self.log_message(f"  ~ {len(removed)} older run folders compacted into {STORE_FILENAME}",
+                                         "INFO")
+            
+        except Exception as e:
+            self.log_message(f"  ! Could not store results: {str(e)}", "WARNING")
+            
+    def generate_report(self, local_dir: str, timestamp: str, regressions: Optional[List[Regression]] = None):
+        """Generate a summary report of the analysis, including boot time regressions when checked."""
         try:
             self.log_message("Generating summary report...", "INFO")
             
@@ -829,10 +1374,28 @@ class SystemDAnalyzerGUI:
                 f.write(f"Timestamp: {timestamp}\n\n")
                 f.write("File descriptions:\n")
                 f.write("- *_dump.log: systemd-analyze dump output\n")
-                f.write("- *_plot.svg: systemd-analyze plot output\n\n")
+                f.write("- *_plot.svg: systemd-analyze plot output\n")
+                f.write("- *_timing.log: unit activation timestamps and ordering (systemctl show)\n")
+                if os.path.exists(os.path.join(local_dir, "boot_analysis.txt")):
+                    f.write("- boot_analysis.txt, boot_analysis.json: boot critical path, slack and slowest units\n")
+                if regressions is not None:
+                    f.write("- boot_regressions.json: units whose activation time went past their baseline\n")
+                if os.path.exists(os.path.join(local_dir, "unit_diff.txt")):
+                    f.write("- unit_diff.txt, unit_diff.json: units that differ across hosts and since the previous run\n")
+                f.write(f"- ../{INDEX_FILENAME}: parsed units of every run, query with systemd_analyzer_cli.py\n")
+                f.write(f"- ../{HISTORY_FILENAME}: activation times of every run, see systemd_analyzer_cli.py "
+                        "regressions\n")
+                f.write(f"- ../{STORE_FILENAME}: deduplicated copies of every run, restore with "
+                        "systemd_analyzer_cli.py materialize\n\n")
                 f.write("Host list:\n")
                 for hostname, host_addr in self.hosts.items():
                     f.write(f"- {hostname}: {host_addr}\n")
+                if regressions is not None:
+                    f.write(f"\nBoot time regressions (against each unit's previous {HISTORY_WINDOW} runs):\n")
+                    for regression in regressions:
+                        f.write(f"- {regression.to_text()}\n")
+                    if not regressions:
+                        f.write("- none\n")
                     
             os.chmod(report_file, 0o644)
             self.log_message("✓ Summary report generated", "SUCCESS")
@@ -860,7 +1423,12 @@ class SystemDAnalyzerGUI:
                 "default_ssh_password": self.ssh_password.get(),
                 "default_sudo_password": self.sudo_password.get(),
                 "last_output_dir": self.output_dir.get(),
-                "window_geometry": self.root.geometry()
+                "window_geometry": self.root.geometry(),
+                "max_workers": self.max_workers.get(),
+                "host_timeout": self.host_timeout.get(),
+                "collection_mode": self.collection_mode.get(),
+                "keep_run_dirs": self.keep_run_dirs.get(),
+                "reuse_unchanged": self.reuse_unchanged.get()
             }
             
             if self.config_manager.save_config(config):
@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for the UI-free parsing, indexing and history code in systemd_analyzer_core
+Run from the systemd-analyzer-gui directory with `python -m pytest tests`
+"""
+
+import gzip
+import math
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import systemd_analyzer_core as core  # noqa: E402
+
+DUMP = """\
+Manager: systemd 249 (249.11-0ubuntu3.12)
+Features: +PAM +AUDIT
+Timestamp userspace: Mon 2024-01-01 10:00:00 UTC
+-> Unit ssh.service:
+\tDescription: OpenBSD Secure Shell server
+\tUnit Load State: loaded
+\tUnit Active State: active
+\tInactive Exit Timestamp: Mon 2024-01-01 10:00:02 UTC
+\tActive Enter Timestamp: Mon 2024-01-01 10:00:05 UTC
+\tName: ssh.service
+\tName: sshd.service
+\tAfter: network.target (Origin: file)
+\tAfter: system.slice (Origin: file)
+\tExecStart:
+\t\tCommand Line: /usr/sbin/sshd -D
+\t\t\tPID: 812
+\tRestart: on-failure
+\tMain PID: 812
+-> Job 17:
+\tJob Type: start
+-> Unit network.target:
+\tDescription: Network
+\tUnit Load State: loaded
+\tInactive Exit Timestamp: Mon 2024-01-01 10:00:01 UTC
+\tActive Enter Timestamp: Mon 2024-01-01 10:00:02 UTC
+"""
+
+TIMING = """\
+UserspaceTimestampMonotonic=1000000
+FinishTimestampMonotonic=9000000
+
+Id=a.service
+Names=a.service alias-a.service
+After=
+InactiveExitTimestampMonotonic=1000000
+ActiveEnterTimestampMonotonic=2000000
+
+Id=b.service
+Names=b.service
+After=a.service
+InactiveExitTimestampMonotonic=2000000
+ActiveEnterTimestampMonotonic=4000000
+
+Id=c.service
+Names=c.service
+After=alias-a.service missing.service
+InactiveExitTimestampMonotonic=2000000
+ActiveEnterTimestampMonotonic=3000000
+
+Id=default.target
+Names=default.target
+After=b.service c.service
+InactiveExitTimestampMonotonic=4000000
+ActiveEnterTimestampMonotonic=4000000
+
+Id=late.service
+Names=late.service
+After=a.service
+InactiveExitTimestampMonotonic=1000000
+ActiveEnterTimestampMonotonic=6000000
+
+Id=inactive.service
+Names=inactive.service
+After=
+InactiveExitTimestampMonotonic=0
+ActiveEnterTimestampMonotonic=0
+"""
+
+
+def write_dump(directory, host, run, text=DUMP):
+    path = os.path.join(directory, f"{host}_{run}{core.DUMP_SUFFIX}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+class DumpParserTest(unittest.TestCase):
+    def test_iter_dump_units_reads_units_and_header(self):
+        header = {}
+        units = list(core.iter_dump_units(DUMP.splitlines(keepends=True), header))
+        self.assertEqual([unit.name for unit in units], ["ssh.service", "network.target"])
+        self.assertEqual(header["Manager"], "systemd 249 (249.11-0ubuntu3.12)")
+        self.assertEqual(header["Timestamp userspace"], "Mon 2024-01-01 10:00:00 UTC")
+
+        ssh = units[0]
+        self.assertEqual(ssh.unit_type, "service")
+        self.assertEqual(ssh.get("Unit Load State"), "loaded")
+        self.assertEqual(ssh.values("Name"), ["ssh.service", "sshd.service"])
+        self.assertEqual(ssh.values("After"), ["network.target", "system.slice"])
+        self.assertEqual(ssh.get("ExecStart.Command Line"), "/usr/sbin/sshd -D")
+        self.assertEqual(ssh.get("ExecStart.Command Line.PID"), "812")
+        self.assertIsNone(ssh.get("Job Type"))
+
+    def test_unit_digest_ignores_volatile_properties_and_order(self):
+        properties = [("Restart", "no"), ("After", "a.target"), ("Main PID", "1"),
+                      ("Active Enter Timestamp", "Mon 2024-01-01 10:00:05 UTC")]
+        reordered = [("After", "a.target"), ("Main PID", "2"), ("Restart", "no")]
+        self.assertEqual(core.unit_digest("x.service", properties), core.unit_digest("x.service", reordered))
+        self.assertNotEqual(core.unit_digest("x.service", properties),
+                            core.unit_digest("x.service", [("Restart", "always")]))
+
+    def test_parse_result_name(self):
+        self.assertEqual(core.parse_result_name("/out/web_01_20240101_100000_dump.log"),
+                         ("web_01", "20240101_100000", "dump"))
+        self.assertEqual(core.parse_result_name("web_20240101_100000_timing.log"),
+                         ("web", "20240101_100000", "timing"))
+        self.assertIsNone(core.parse_result_name("web_dump.log"))
+
+
+class DumpIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = core.DumpIndex(os.path.join(self.tmp.name, core.INDEX_FILENAME))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_add_paths_indexes_dumps_once(self):
+        write_dump(self.tmp.name, "web", "20240101_100000")
+        write_dump(self.tmp.name, "db", "20240101_100000")
+        self.assertEqual(sorted(self.index.add_paths([self.tmp.name]).values()), [2, 2])
+        self.assertEqual(self.index.runs(), [("db", "20240101_100000", 2), ("web", "20240101_100000", 2)])
+        self.assertEqual(sorted(self.index.add_paths([self.tmp.name]).values()), [2, 2])
+        self.assertEqual(len(self.index.runs()), 2)
+
+    def test_find_matches_keys_values_and_wildcards(self):
+        write_dump(self.tmp.name, "web", "20240101_100000")
+        self.index.add_paths([self.tmp.name])
+        self.assertEqual(self.index.find(key="Restart"),
+                         [("web", "20240101_100000", "ssh.service", "Restart", "on-failure")])
+        self.assertEqual([row[2] for row in self.index.find(unit="*.target")], ["network.target"])
+        self.assertEqual([row[4] for row in self.index.find(unit="ssh.service", key="After")],
+                         ["network.target", "system.slice"])
+
+    def test_prune_drops_dumps_whose_files_are_gone(self):
+        path = write_dump(self.tmp.name, "web", "20240101_100000")
+        self.index.add_paths([path])
+        os.remove(path)
+        self.assertEqual(self.index.prune(), 1)
+        self.assertEqual(self.index.runs(), [])
+
+    def test_diff_ignores_volatile_properties(self):
+        write_dump(self.tmp.name, "web", "20240101_100000")
+        write_dump(self.tmp.name, "db", "20240101_100000",
+                   DUMP.replace("PID: 812", "PID: 999").replace("10:00:05", "10:00:09"))
+        self.index.add_paths([self.tmp.name])
+        result = self.index.diff([("web", None), ("db", None)])
+        self.assertEqual((result.compared, result.identical, result.units), (2, 2, []))
+
+    def test_diff_reports_changed_and_missing_units(self):
+        write_dump(self.tmp.name, "web", "20240101_100000")
+        write_dump(self.tmp.name, "web", "20240102_100000",
+                   DUMP.replace("Restart: on-failure", "Restart: always").split("-> Unit network.target")[0])
+        self.index.add_paths([self.tmp.name])
+        result = self.index.diff([("web", "20240101_100000"), ("web", None)])
+        old, new = "web@20240101_100000", "web@20240102_100000"
+        self.assertEqual(result.labels, [old, new])
+        self.assertEqual(result.compared, 2)
+        self.assertEqual(result.identical, 0)
+        self.assertEqual(result.units, [
+            ("network.target", [new], []),
+            ("ssh.service", [], [("Restart", {old: ["on-failure"], new: ["always"]})]),
+        ])
+        self.assertIn("missing on web@20240102_100000", result.to_text())
+
+    def test_diff_compares_repeated_targets_once(self):
+        write_dump(self.tmp.name, "web", "20240101_100000")
+        write_dump(self.tmp.name, "db", "20240101_100000", DUMP.replace("Restart: on-failure", "Restart: always"))
+        self.index.add_paths([self.tmp.name])
+        result = self.index.diff([("web", None), ("web", "20240101_100000"), ("db", None)])
+        web, db = "web@20240101_100000", "db@20240101_100000"
+        self.assertEqual(result.labels, [web, db])
+        self.assertEqual(result.units, [("ssh.service", [], [("Restart", {web: ["on-failure"], db: ["always"]})])])
+        with self.assertRaises(ValueError):
+            self.index.diff([("web", None), ("web", "20240101_100000")])
+
+    def test_diff_of_unknown_dump_raises(self):
+        with self.assertRaises(KeyError):
+            self.index.diff([("web", None), ("db", None)])
+
+
+class BootAnalysisTest(unittest.TestCase):
+    def setUp(self):
+        self.units, self.manager = core.parse_unit_timing(TIMING.splitlines())
+
+    def test_parse_unit_timing_skips_units_not_started_this_boot(self):
+        self.assertEqual(sorted(self.units), ["a.service", "b.service", "c.service", "default.target", "late.service"])
+        self.assertEqual(self.manager, {"userspace": 1.0, "finish": 9.0})
+        self.assertEqual(self.units["a.service"].names, ["a.service", "alias-a.service"])
+        self.assertEqual(self.units["b.service"].duration, 2.0)
+
+    def test_critical_path_follows_the_last_dependency(self):
+        analysis = core.BootAnalysis(self.units, self.manager, top=2)
+        self.assertEqual(analysis.target, "default.target")
+        self.assertEqual(analysis.boot_time, 3.0)
+        self.assertEqual([unit.name for unit in analysis.critical_path], ["a.service", "b.service", "default.target"])
+        self.assertEqual([unit.name for unit in analysis.top], ["late.service", "b.service"])
+
+    def test_slack_only_for_units_the_target_waits_for(self):
+        analysis = core.BootAnalysis(self.units, self.manager)
+        self.assertEqual(analysis.slack, {"a.service": 0.0, "b.service": 0.0, "c.service": 1.0,
+                                          "default.target": 0.0})
+        self.assertIn("not waited for by default.target", analysis.to_text())
+
+    def test_missing_target_falls_back_to_the_last_active_unit(self):
+        del self.units["default.target"]
+        analysis = core.BootAnalysis(self.units)
+        self.assertEqual(analysis.target, "late.service")
+        self.assertEqual(analysis.boot_time, 5.0)
+        self.assertEqual([unit.name for unit in analysis.critical_path], ["late.service"])
+
+    def test_no_units(self):
+        analysis = core.BootAnalysis({})
+        self.assertEqual((analysis.boot_time, analysis.critical_path, analysis.slack), (0.0, [], {}))
+
+
+class ReceiveMembersTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.outputs = {name: os.path.join(self.tmp.name, f"web_20240101_100000_{filename}")
+                        for name, filename in (("dump", "dump.log"), ("plot", "plot.svg"), ("timing", "timing.log"))}
+        self.contents = {"dump": DUMP.encode() * 50, "plot": b"<svg/>", "timing": TIMING.encode()}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def stream(self, status=b"dump=0 plot=0 timing=0\n", contents=None):
+        contents = contents or self.contents
+        return b"".join(gzip.compress(contents[name]) for name in self.outputs) + gzip.compress(status)
+
+    def read(self, name):
+        with open(self.outputs[name], "rb") as f:
+            return f.read()
+
+    def test_members_split_at_arbitrary_offsets(self):
+        stream = self.stream()
+        rng = random.Random(3)
+        for _ in range(20):
+            cuts = sorted(rng.sample(range(1, len(stream)), rng.randint(1, 40)))
+            chunks = [stream[start:end] for start, end in zip([0] + cuts, cuts + [len(stream)])]
+            collected, received = core.receive_members(chunks, self.outputs)
+            self.assertEqual(received, len(stream))
+            self.assertEqual(collected, {name: len(data) for name, data in self.contents.items()})
+            for name, data in self.contents.items():
+                self.assertEqual(self.read(name), data)
+
+    def test_every_member_in_one_chunk_or_one_byte_each(self):
+        stream = self.stream()
+        for chunks in ([stream], [stream[i:i + 1] for i in range(len(stream))]):
+            collected, _ = core.receive_members(chunks, self.outputs)
+            self.assertEqual(sorted(collected), ["dump", "plot", "timing"])
+            self.assertEqual(self.read("dump"), self.contents["dump"])
+
+    def test_truncated_stream_leaves_no_partial_files(self):
+        stream = self.stream()
+        cut = len(gzip.compress(self.contents["dump"])) + 10
+        collected, received = core.receive_members([stream[:cut]], self.outputs)
+        self.assertEqual((collected, received), ({}, cut))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_failed_commands_in_the_status_member_are_dropped(self):
+        collected, _ = core.receive_members([self.stream(b"dump=0 plot=1 timing=0\n")], self.outputs)
+        self.assertEqual(sorted(collected), ["dump", "timing"])
+        self.assertFalse(os.path.exists(self.outputs["plot"]))
+
+    def test_missing_timing_keeps_dump_and_plot(self):
+        contents = dict(self.contents, timing=b"")
+        collected, _ = core.receive_members([self.stream(b"dump=0 plot=0 timing=127\n", contents)], self.outputs)
+        self.assertEqual(sorted(collected), ["dump", "plot"])
+        files = core.collect_results([self.tmp.name])["web@20240101_100000"]
+        self.assertEqual(sorted(files), ["dump", "plot"])
+        units, _ = core.read_unit_timing(files["dump"])
+        self.assertEqual(units["ssh.service"].duration, 3.0)
+
+    def test_corrupt_member_raises_and_removes_the_partial_file(self):
+        stream = bytearray(self.stream())
+        stream[20:30] = bytes(10)
+        with self.assertRaises(zlib.error):
+            core.receive_members([bytes(stream)], self.outputs)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+class ResultStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = self.tmp.name
+        self.store = core.ResultStore(os.path.join(self.output_dir, core.STORE_FILENAME))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def make_run(self, run, dump=DUMP):
+        run_dir = os.path.join(self.output_dir, core.RUN_DIR_PREFIX + run)
+        os.makedirs(run_dir)
+        write_dump(run_dir, "web", run, dump)
+        with open(os.path.join(run_dir, f"web_{run}{core.PLOT_SUFFIX}"), "w", encoding="utf-8") as f:
+            f.write("<svg/>")
+        return run_dir
+
+    def test_split_dump_round_trip(self):
+        data = (DUMP.replace("\n", "\r\n", 3) + "\tStatus Text: \n\tNo newline: at end").encode()
+        sections, values = core.split_dump(data)
+        self.assertEqual(len(sections), 4)
+        self.assertEqual(core.join_dump(sections, values), data)
+        self.assertNotIn(b"812", b"".join(sections))
+
+    def test_volatile_values_do_not_change_sections(self):
+        sections, _ = core.split_dump(DUMP.encode())
+        rebooted, values = core.split_dump(DUMP.replace("812", "4242").replace("10:00:05", "10:07:00").encode())
+        self.assertEqual(sections, rebooted)
+        self.assertIn(b"4242", values)
+
+    def test_runs_round_trip_and_share_sections(self):
+        first = self.store.add_run(self.make_run("20240101_100000"))
+        second = self.store.add_run(self.make_run("20240102_100000", DUMP.replace("812", "4242")))
+        self.assertEqual(first["files"], 2)
+        self.assertLess(second["stored_bytes"], first["stored_bytes"])
+        self.assertEqual(self.store.runs(), [core.RUN_DIR_PREFIX + "20240101_100000",
+                                             core.RUN_DIR_PREFIX + "20240102_100000"])
+
+        run = core.RUN_DIR_PREFIX + "20240102_100000"
+        data = self.store.read_file(run, f"web_20240102_100000{core.DUMP_SUFFIX}")
+        self.assertEqual(data, DUMP.replace("812", "4242").encode())
+
+    def test_compact_removes_only_verified_old_runs(self):
+        old = self.make_run("20240101_100000")
+        new = self.make_run("20240102_100000")
+        self.assertEqual(self.store.compact(self.output_dir, keep=1), [old])
+        self.assertFalse(os.path.exists(old))
+        self.assertEqual(len(os.listdir(new)), 2)
+
+        restored = self.store.materialize(os.path.basename(old), os.path.join(self.output_dir, "restore"))
+        with open(os.path.join(restored, f"web_20240101_100000{core.DUMP_SUFFIX}"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), DUMP)
+
+    def test_corrupt_object_is_detected(self):
+        run_dir = self.make_run("20240101_100000")
+        self.store.add_run(run_dir)
+        run = os.path.basename(run_dir)
+        entry = self.store.manifest(run)["files"][f"web_20240101_100000{core.PLOT_SUFFIX}"]
+        with self.store.db:
+            self.store.db.execute("UPDATE objects SET data = ? WHERE id = ?",
+                                  (zlib.compress(b"<svg>"), entry["object"]))
+        with self.assertRaises(ValueError):
+            self.store.read_file(run, f"web_20240101_100000{core.PLOT_SUFFIX}")
+
+
+class ReuseResultsTest(unittest.TestCase):
+    RUN = "20240101_100000"
+    NOW = "20240102_100000"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = self.tmp.name
+        self.run_dir = os.path.join(self.output_dir, core.RUN_DIR_PREFIX + self.RUN)
+        self.local_dir = os.path.join(self.output_dir, core.RUN_DIR_PREFIX + self.NOW)
+        os.makedirs(self.run_dir)
+        os.makedirs(self.local_dir)
+        self.files = {core.DUMP_SUFFIX: DUMP, core.PLOT_SUFFIX: "<svg/>", core.TIMING_SUFFIX: TIMING}
+        for suffix, text in self.files.items():
+            with open(os.path.join(self.run_dir, f"web_{self.RUN}{suffix}"), "w", encoding="utf-8") as f:
+                f.write(text)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def reuse(self):
+        return core.reuse_host_results(self.output_dir, "web", self.RUN, self.local_dir, self.NOW)
+
+    def reused(self):
+        contents = {}
+        for name in sorted(os.listdir(self.local_dir)):
+            with open(os.path.join(self.local_dir, name), encoding="utf-8") as f:
+                contents[name] = f.read()
+        return contents
+
+    def test_parse_fingerprint(self):
+        self.assertEqual(core.parse_fingerprint("b00t\nabc123  -\n"), "b00t:abc123")
+        self.assertIsNone(core.parse_fingerprint("b00t\n"))
+        self.assertIsNone(core.parse_fingerprint("\nabc123  -\n"))
+
+    def test_reusable_run_needs_same_fingerprint_and_address(self):
+        cached = {"fingerprint": "b00t:abc", "address": "root@10.0.0.1", "run": self.RUN}
+        self.assertEqual(core.reusable_run(cached, "b00t:abc", "root@10.0.0.1"), self.RUN)
+        self.assertIsNone(core.reusable_run(cached, "b00t:def", "root@10.0.0.1"))
+        self.assertIsNone(core.reusable_run(cached, "b00t:abc", "root@10.0.0.2"))
+        self.assertIsNone(core.reusable_run(cached, None, "root@10.0.0.1"))
+        self.assertIsNone(core.reusable_run(None, "b00t:abc", "root@10.0.0.1"))
+
+    def test_update_fingerprints_keeps_entries_of_unfinished_hosts(self):
+        cached = {"db": {"fingerprint": "old", "address": "db", "run": self.RUN},
+                  "web": {"fingerprint": "old", "address": "web", "run": self.RUN}}
+        hosts = {"web": "root@web", "db": "root@db", "mail": "root@mail"}
+        updated = core.update_fingerprints(cached, hosts, {"web": "new", "db": "new", "mail": None},
+                                           ["web", "mail"], self.NOW)
+        self.assertEqual(updated["web"], {"fingerprint": "new", "address": "root@web", "run": self.NOW})
+        self.assertEqual(updated["db"], cached["db"])
+        self.assertNotIn("mail", updated)
+        self.assertEqual(cached["web"]["fingerprint"], "old")
+
+    def test_files_are_reused_from_the_run_folder(self):
+        self.assertEqual(len(self.reuse()), 3)
+        self.assertEqual(self.reused(), {f"web_{self.NOW}{suffix}": text for suffix, text in self.files.items()})
+
+    def test_files_are_read_from_the_store_once_the_folder_is_removed(self):
+        with core.ResultStore(os.path.join(self.output_dir, core.STORE_FILENAME)) as store:
+            store.add_run(self.run_dir)
+        shutil.rmtree(self.run_dir)
+        self.reuse()
+        self.assertEqual(self.reused()[f"web_{self.NOW}{core.DUMP_SUFFIX}"], DUMP)
+        self.assertEqual(len(self.reused()), 3)
+
+    def test_missing_timing_file_is_skipped(self):
+        os.remove(os.path.join(self.run_dir, f"web_{self.RUN}{core.TIMING_SUFFIX}"))
+        self.assertEqual(len(self.reuse()), 2)
+        self.assertEqual(sorted(self.reused()),
+                         [f"web_{self.NOW}{core.DUMP_SUFFIX}", f"web_{self.NOW}{core.PLOT_SUFFIX}"])
+
+    def test_partially_copied_files_are_removed_on_failure(self):
+        os.remove(os.path.join(self.run_dir, f"web_{self.RUN}{core.PLOT_SUFFIX}"))
+        with self.assertRaises(KeyError):
+            self.reuse()
+        self.assertEqual(os.listdir(self.local_dir), [])
+
+        with core.ResultStore(os.path.join(self.output_dir, core.STORE_FILENAME)):
+            pass
+        with self.assertRaises(KeyError):
+            self.reuse()
+        self.assertEqual(os.listdir(self.local_dir), [])
+
+
+def naive_regressions(values, window, min_runs):
+    found = []
+    for position, value in enumerate(values):
+        samples = [v for v in values[:position] if v == v][-window:]
+        baseline = sorted(samples)
+        count = len(baseline)
+        if count < min_runs:
+            continue
+        median = (baseline[(count - 1) // 2] + baseline[count // 2]) / 2
+        lower, upper = baseline[count // 4], baseline[(3 * count) // 4]
+        threshold = max(upper + core.REGRESSION_IQR_FACTOR * (upper - lower), median + core.REGRESSION_MIN_SECONDS)
+        if value > threshold:
+            found.append((position, median, threshold))
+    return found
+
+
+class RollingRegressionsTest(unittest.TestCase):
+    def test_spike_after_enough_runs_is_flagged(self):
+        values = [1.0] * 10 + [5.0]
+        self.assertEqual(list(core.rolling_regressions(values)), [(10, 1.0, 1.5)])
+        self.assertEqual(list(core.rolling_regressions(values[:5] + [5.0])), [])
+
+    def test_small_changes_stay_below_the_minimum_threshold(self):
+        self.assertEqual(list(core.rolling_regressions([1.0] * 10 + [1.4])), [])
+
+    def test_missing_samples_are_skipped(self):
+        nan = float("nan")
+        values = [1.0, nan] * 10 + [nan, 5.0]
+        self.assertEqual(list(core.rolling_regressions(values)), [(21, 1.0, 1.5)])
+
+    def test_baseline_slides_to_a_new_level(self):
+        values = [1.0] * 10 + [5.0] * 20
+        self.assertEqual([position for position, _, _ in core.rolling_regressions(values, window=10)],
+                         [10, 11, 12])
+        self.assertEqual([position for position, _, _ in core.rolling_regressions(values, window=10, start=12)],
+                         [12])
+
+    def test_matches_a_full_recomputation(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(0, 0.3) + (4 if rng.random() < 0.05 else 0) for _ in range(400)]
+        values[50:60] = [math.nan] * 10
+        self.assertEqual(list(core.rolling_regressions(values, window=30)), naive_regressions(values, 30, 10))
+
+
+class BootHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history = core.BootHistory(os.path.join(self.tmp.name, core.HISTORY_FILENAME))
+
+    def tearDown(self):
+        self.history.close()
+        self.tmp.cleanup()
+
+    def add(self, host, day, durations, boot_time=10.0):
+        units = {name: core.UnitTiming(name, [name], [], 1.0, 1.0 + duration) for name, duration in durations.items()}
+        return self.history.add_run(host, f"202401{day:02d}_100000", units, boot_time)
+
+    def test_series_fill_missing_units_with_nan(self):
+        self.assertEqual(self.add("web", 1, {"a.service": 1.0}), 2)
+        self.add("web", 2, {"a.service": 2.0, "b.service": 0.5})
+        runs, series = self.history.series("web")
+        self.assertEqual(runs, ["20240101_100000", "20240102_100000"])
+        self.assertEqual(list(series["a.service"]), [1.0, 2.0])
+        self.assertTrue(math.isnan(series["b.service"][0]))
+        self.assertEqual(list(series[core.BOOT_SERIES]), [10.0, 10.0])
+        self.assertEqual(list(self.history.series("web", until="20240101_100000", units=["b.service"])[1]), [])
+
+    def test_regressions_in_latest_run(self):
+        for day in range(1, 12):
+            self.add("web", day, {"a.service": 1.0, "b.service": 0.25})
+            self.add("db", day, {"a.service": 1.0})
+        self.add("web", 12, {"a.service": 4.0, "b.service": 0.25}, boot_time=15.0)
+        self.add("db", 12, {"a.service": 1.0})
+
+        found = self.history.regressions()
+        self.assertEqual([(r.host, r.run, r.unit) for r in found],
+                         [("web", "20240112_100000", core.BOOT_SERIES), ("web", "20240112_100000", "a.service")])
+        self.assertEqual((found[1].baseline, found[1].excess), (1.0, 3.0))
+        self.assertEqual(self.history.regressions(host="db"), [])
+        self.assertEqual(self.history.regressions(run="20240111_100000"), [])
+
+    def test_every_run_scans_the_whole_history(self):
+        for day in range(1, 12):
+            self.add("web", day, {"a.service": 4.0 if day == 11 else 1.0})
+        self.add("web", 12, {"a.service": 1.0})
+        self.assertEqual(self.history.regressions(), [])
+        self.assertEqual([r.run for r in self.history.regressions(every_run=True)], ["20240111_100000"])
+
+    def test_units_added_by_another_connection_are_resolved(self):
+        self.add("web", 1, {"a.service": 1.0})
+        with core.BootHistory(self.history.path) as other:
+            other.add_run("web", "20240102_100000", {"b.service": core.UnitTiming("b.service", [], [], 1.0, 3.0)}, 9.0)
+        _, series = self.history.series("web")
+        self.assertEqual(list(series["b.service"])[1:], [2.0])
+        self.add("web", 3, {"b.service": 0.5})
+        self.assertEqual(list(self.history.series("web")[1]["b.service"])[1:], [2.0, 0.5])
+
+    def test_rolled_back_names_are_not_cached(self):
+        class Failing(dict):
+            def items(self):
+                yield from super().items()
+                raise sqlite3.OperationalError("disk I/O error")
+
+        failing = Failing({"lost.service": core.UnitTiming("lost.service", [], [], 1.0, 2.0)})
+        with self.assertRaises(sqlite3.OperationalError):
+            self.history.add_run("web", "20240101_100000", failing, 10.0)
+        self.assertNotIn("lost.service", self.history.name_ids)
+        self.add("web", 2, {"kept.service": 1.0})
+        self.assertEqual(sorted(self.history.series("web")[1]), [core.BOOT_SERIES, "kept.service"])
+
+
+class DaemonThreadsTest(unittest.TestCase):
+    def test_every_item_is_yielded_after_a_failure(self):
+        def work(item):
+            if item == 0:
+                raise ValueError("boom")
+            time.sleep(0.05)
+            return item * 10
+
+        outcomes = list(core.run_on_daemon_threads(work, range(4), 2))
+        self.assertEqual(outcomes[0][0], 0)
+        self.assertIsInstance(outcomes[0][2], ValueError)
+        self.assertEqual(sorted((item, result) for item, result, error in outcomes[1:] if error is None),
+                         [(1, 10), (2, 20), (3, 30)])
+
+    def test_at_most_max_workers_run_at_once(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def work(item):
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        self.assertEqual(len(list(core.run_on_daemon_threads(work, range(8), 3))), 8)
+        self.assertLessEqual(running[1], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()